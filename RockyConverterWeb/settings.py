@@ -160,8 +160,42 @@ MEDIA_ROOT = os.getenv('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
 
 # Upload settings
 DATA_UPLOAD_MAX_NUMBER_FILES = int(os.getenv('DATA_UPLOAD_MAX_NUMBER_FILES', '5000'))
-DATA_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('DATA_UPLOAD_MAX_MEMORY_SIZE', '5368709120'))  # 5 GB
-FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('FILE_UPLOAD_MAX_MEMORY_SIZE', '5368709120'))  # 5 GB
+# Taille des champs de formulaire hors fichiers (les fichiers ne comptent pas dans cette limite)
+DATA_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('DATA_UPLOAD_MAX_MEMORY_SIZE', '10485760'))  # 10 MB
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('FILE_UPLOAD_MAX_MEMORY_SIZE', '2621440'))  # 2.5 MB
+# Les fichiers uploadés sont toujours écrits sur disque au fil de la réception,
+# à côté des albums (même système de fichiers : déplacés sans copie)
+FILE_UPLOAD_HANDLERS = ['converter.uploadhandlers.HashingFileUploadHandler']
+FILE_UPLOAD_TEMP_DIR = os.getenv('FILE_UPLOAD_TEMP_DIR', os.path.join(MEDIA_ROOT, 'albums', '.incoming'))
+# Upload en plusieurs morceaux (reprenable) : taille des morceaux envoyés par la page d'upload
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+UPLOAD_CHUNK_MAX_SIZE = int(os.getenv('UPLOAD_CHUNK_MAX_SIZE', str(64 * 1024 * 1024)))
+# Taille totale maximale d'un album envoyé en plusieurs morceaux (même limite
+# que client_max_body_size pour le formulaire, voir nginx.conf.example)
+UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', str(5 * 1024 * 1024 * 1024)))  # 5 GB
+# Nombre de morceaux envoyés en parallèle
+UPLOAD_PARALLEL_CHUNKS = int(os.getenv('UPLOAD_PARALLEL_CHUNKS', '3'))
+# Durée de conservation des uploads non terminés (heures)
+UPLOAD_SESSION_EXPIRY_HOURS = int(os.getenv('UPLOAD_SESSION_EXPIRY_HOURS', '48'))
+# Archives ZIP uploadées : 'extract' (images extraites dans l'album) ou 'direct'
+# (archive conservée, images décodées directement depuis l'archive à la conversion)
+ARCHIVE_INGEST_MODE = os.getenv('ARCHIVE_INGEST_MODE', 'extract').lower()
+# Conversion lancée dès la création de l'album ; avec l'upload par morceaux, chaque
+# fichier est converti dès qu'il est entièrement reçu, pendant que les suivants arrivent
+AUTO_CONVERT = os.getenv('AUTO_CONVERT', 'False').lower() in ('true', '1', 'yes', 'on')
+# Délai sans morceau reçu (secondes) après lequel une conversion pendant l'upload
+# se met en pause une fois les fichiers reçus convertis, libérant sa place dans le worker
+AUTO_CONVERT_IDLE_TIMEOUT = int(os.getenv('AUTO_CONVERT_IDLE_TIMEOUT', '1800'))
+
+# Cache (progression des conversions en direct)
+# Doit être partagé entre les workers gunicorn : fichiers (défaut) ou Redis
+# (CACHE_BACKEND=django.core.cache.backends.redis.RedisCache, CACHE_LOCATION=redis://127.0.0.1:6379)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')),
+    }
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -191,3 +225,65 @@ if not DEBUG:
 # Rocky Converter specific settings
 CLEANUP_DAYS = int(os.getenv('CLEANUP_DAYS', '14'))
 CLEANUP_LOG_PATH = os.getenv('CLEANUP_LOG_PATH', os.path.join(BASE_DIR.parent, 'rocky_converter_cleanup.log'))
+
+# Conversion des images (pool de processus)
+# CONVERSION_MAX_WORKERS=0 : nombre de processus automatique (coeurs et mémoire disponibles)
+CONVERSION_MAX_WORKERS = int(os.getenv('CONVERSION_MAX_WORKERS', '0'))
+# Mémoire réservée par processus de conversion, utilisée pour dimensionner le pool
+CONVERSION_WORKER_MEMORY_MB = int(os.getenv('CONVERSION_WORKER_MEMORY_MB', '512'))
+# Mémoire maximale des images en cours de décodage, toutes conversions confondues
+# (0 = la moitié de la mémoire disponible au démarrage du worker)
+CONVERSION_MEMORY_BUDGET_MB = int(os.getenv('CONVERSION_MEMORY_BUDGET_MB', '0'))
+# Décodage JPEG à échelle réduite (1/2, 1/4, 1/8) avant le redimensionnement final
+CONVERSION_JPEG_DRAFT = os.getenv('CONVERSION_JPEG_DRAFT', 'True').lower() in ('true', '1', 'yes', 'on')
+# Copie sans réencodage des JPEG déjà à la taille cible (métadonnées retirées,
+# orientation corrigée sans perte si jpegtran est installé)
+CONVERSION_PASSTHROUGH = os.getenv('CONVERSION_PASSTHROUGH', 'True').lower() in ('true', '1', 'yes', 'on')
+
+# Archive ZIP de chaque album construite à la fin de la conversion (téléchargements
+# immédiats et reprenables ; double l'espace disque occupé par les albums convertis)
+ALBUM_ARCHIVES = os.getenv('ALBUM_ARCHIVES', 'True').lower() in ('true', '1', 'yes', 'on')
+# Envoi des archives délégué à nginx (X-Accel-Redirect vers une location "internal"
+# qui pointe sur MEDIA_ROOT, voir nginx.conf.example)
+DOWNLOAD_X_ACCEL_REDIRECT = os.getenv('DOWNLOAD_X_ACCEL_REDIRECT', 'False').lower() in ('true', '1', 'yes', 'on')
+DOWNLOAD_X_ACCEL_PREFIX = os.getenv('DOWNLOAD_X_ACCEL_PREFIX', '/protected-media/')
+
+# Cache des images converties (adressé par le contenu des sources)
+# Laisser CONVERSION_CACHE_DIR vide pour désactiver le cache
+CONVERSION_CACHE_DIR = os.getenv('CONVERSION_CACHE_DIR', os.path.join(BASE_DIR, 'conversion_cache'))
+CONVERSION_CACHE_MAX_SIZE_MB = int(os.getenv('CONVERSION_CACHE_MAX_SIZE_MB', '10240'))  # 10 GB
+
+# Nombre d'albums convertis simultanément par la commande conversion_worker
+# (les images de tous ces albums partagent le même pool de processus)
+CONVERSION_WORKER_CONCURRENCY = int(os.getenv('CONVERSION_WORKER_CONCURRENCY', '2'))
+
+# Délai (secondes) sans progression après lequel une conversion est considérée interrompue
+# et remise en file d'attente par le worker de conversion
+CONVERSION_STALE_AFTER = int(os.getenv('CONVERSION_STALE_AFTER', '300'))
+
+# Progression des conversions : publication dans le cache au plus toutes les
+# CONVERSION_PROGRESS_INTERVAL secondes, écriture en base tous les
+# CONVERSION_PROGRESS_DB_STEP % ou au moins toutes les CONVERSION_PROGRESS_DB_INTERVAL secondes
+CONVERSION_PROGRESS_INTERVAL = float(os.getenv('CONVERSION_PROGRESS_INTERVAL', '0.5'))
+CONVERSION_PROGRESS_DB_STEP = int(os.getenv('CONVERSION_PROGRESS_DB_STEP', '10'))
+CONVERSION_PROGRESS_DB_INTERVAL = int(os.getenv('CONVERSION_PROGRESS_DB_INTERVAL', '60'))
+
+# Profils de conversion : chaque profil produit un ou plusieurs rendus à partir d'un seul
+# décodage de l'image source. Avec plusieurs rendus, chacun est écrit dans un sous-dossier
+# de l'album portant son nom. Formats possibles : JPEG, WEBP, PNG.
+CONVERSION_PROFILES = {
+    'default': {
+        'label': '1920x1080',
+        'renditions': [
+            {'name': 'full', 'size': (1920, 1080), 'format': 'JPEG', 'quality': 85},
+        ],
+    },
+    'web': {
+        'label': '1920x1080 + 1280x720 (web) + miniatures 320x320',
+        'renditions': [
+            {'name': '1920', 'size': (1920, 1080), 'format': 'JPEG', 'quality': 85},
+            {'name': 'web', 'size': (1280, 720), 'format': 'JPEG', 'quality': 80},
+            {'name': 'thumbnails', 'size': (320, 320), 'format': 'JPEG', 'quality': 75},
+        ],
+    },
+}
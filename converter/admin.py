@@ -3,7 +3,8 @@ from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
 # Register your models here.
-from .models import Album, UserProfile
+from .models import Album, ConversionJob, UserProfile
+from .permissions import clear_approval_cache
 
 class UserProfileInline(admin.StackedInline):
     model = UserProfile
@@ -27,15 +28,26 @@ class UserProfileAdmin(admin.ModelAdmin):
     actions = ['approve_users', 'disapprove_users']
     
     def approve_users(self, request, queryset):
-        queryset.update(approved=True)
-        self.message_user(request, f"{queryset.count()} utilisateur(s) approuvé(s).")
+        # Identifiants lus avant update() : la sélection peut être filtrée sur approved
+        user_ids = list(queryset.values_list('user_id', flat=True))
+        updated = queryset.update(approved=True)
+        # update() n'envoie pas de signal : invalider le cache d'approbation
+        clear_approval_cache(user_ids)
+        self.message_user(request, f"{updated} utilisateur(s) approuvé(s).")
     approve_users.short_description = "Approuver les utilisateurs sélectionnés"
     
     def disapprove_users(self, request, queryset):
-        queryset.update(approved=False)
-        self.message_user(request, f"{queryset.count()} utilisateur(s) désapprouvé(s).")
+        user_ids = list(queryset.values_list('user_id', flat=True))
+        updated = queryset.update(approved=False)
+        clear_approval_cache(user_ids)
+        self.message_user(request, f"{updated} utilisateur(s) désapprouvé(s).")
     disapprove_users.short_description = "Désapprouver les utilisateurs sélectionnés"
 
+@admin.register(ConversionJob)
+class ConversionJobAdmin(admin.ModelAdmin):
+    list_display = ('album', 'status', 'created_at', 'started_at', 'finished_at', 'worker', 'attempts')
+    list_filter = ('status',)
+
 # Re-register UserAdmin
 admin.site.unregister(User)
 admin.site.register(User, UserAdmin)
@@ -1,4 +1,7 @@
+import os
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ConverterConfig(AppConfig):
@@ -7,3 +10,12 @@ class ConverterConfig(AppConfig):
     
     def ready(self):
         import converter.signals
+
+        # Le dossier de réception des uploads doit exister avant les vérifications
+        # de Django (files.E001), y compris sur une installation neuve
+        if settings.FILE_UPLOAD_TEMP_DIR:
+            try:
+                os.makedirs(settings.FILE_UPLOAD_TEMP_DIR, exist_ok=True)
+            except OSError:
+                # Dossier non créable : l'erreur est signalée par la vérification files.E001
+                pass
@@ -0,0 +1,81 @@
+"""
+Archives ZIP préconstruites des albums convertis.
+
+L'archive est construite une fois par le worker de conversion lorsque
+l'album est converti, et enregistrée à côté du dossier de l'album
+(<dossier>.zip). Elle est supprimée dès que l'album change (nouvelle
+conversion, suppression) ; tant qu'elle n'existe pas, le téléchargement
+génère l'archive à la volée.
+"""
+
+import logging
+import os
+
+from django.conf import settings
+
+from .imaging import get_partial_path
+from .manifest import get_album_files
+from .zipstream import iter_album_files, iter_zip
+
+logger = logging.getLogger(__name__)
+
+
+def get_archive_path(album):
+    """Chemin de l'archive préconstruite d'un album"""
+    return f"{album.old_path.rstrip(os.sep)}.zip"
+
+
+def get_album_archive(album):
+    """
+    Retourne le chemin de l'archive de l'album si elle est à jour
+    (construite après la dernière conversion), None sinon
+    """
+    if album.conversion_status != 'completed' or album.conversion_date is None:
+        return None
+
+    archive_path = get_archive_path(album)
+    try:
+        if os.path.getmtime(archive_path) >= album.conversion_date.timestamp():
+            return archive_path
+    except OSError:
+        pass
+    return None
+
+
+def remove_album_archive(album):
+    """Supprime l'archive d'un album (contenu modifié ou album supprimé)"""
+    archive_path = get_archive_path(album)
+    for path in (archive_path, get_partial_path(archive_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def build_album_archive(album):
+    """
+    Construit l'archive d'un album converti
+    L'archive est écrite dans un fichier temporaire puis renommée : un
+    téléchargement ne voit jamais d'archive incomplète
+    Retourne le chemin de l'archive, ou None si la construction est désactivée
+    """
+    if not settings.ALBUM_ARCHIVES or not os.path.isdir(album.old_path):
+        return None
+
+    archive_path = get_archive_path(album)
+    partial_path = get_partial_path(archive_path)
+    album_files = get_album_files(album)
+    if album_files is None:
+        album_files = iter_album_files(album.old_path)
+    try:
+        with open(partial_path, 'wb') as archive_file:
+            for chunk in iter_zip(album_files):
+                archive_file.write(chunk)
+        os.replace(partial_path, archive_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    logger.info(
+        f'Archive de l\'album "{album.name}" construite '
+        f'({os.path.getsize(archive_path) / (1024 * 1024):.1f} MB)'
+    )
+    return archive_path
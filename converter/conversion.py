@@ -0,0 +1,761 @@
+"""
+Moteur de conversion des albums.
+
+Les images sont converties en parallèle dans un pool de processus (voir
+converter.imaging pour le traitement d'une image). Ces fonctions sont
+utilisées par le worker de conversion (commande conversion_worker).
+"""
+
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import conversion_cache
+from .imaging import (
+    TRANSPOSED_ORIENTATIONS, ArchiveMember, discover_images, estimate_decode_memory, get_available_memory, get_output_filename, get_passthrough_mode,
+    get_pool_size, get_source_name, get_thumbnail_size, is_valid_output, probe_image, process_image,
+)
+from .manifest import FAILED_DIR_NAME, get_failed_path, get_relative_path, record_conversion, record_retry
+from .models import Album
+from .progress import ProgressReporter, clear_live_progress
+
+logger = logging.getLogger(__name__)
+
+# Intervalle de recherche des nouveaux fichiers d'un album en cours d'upload (secondes)
+UPLOAD_POLL_INTERVAL = 2
+# Intervalle de vérification d'une demande d'annulation (secondes)
+CANCEL_CHECK_INTERVAL = 1
+# Dossier de sortie (caché dans l'album) d'un nouvel essai des images en échec
+RETRY_DIR_NAME = '.retry'
+
+
+class AlbumDeletedError(Exception):
+    """L'album a été supprimé pendant sa conversion"""
+
+
+class ConversionCancelled(Exception):
+    """L'annulation de la conversion a été demandée (vue cancel)"""
+
+
+class ConversionInterrupted(Exception):
+    """L'arrêt du worker a été demandé pendant la conversion (reprise au redémarrage)"""
+
+
+class ConversionPoolBroken(ConversionInterrupted):
+    """
+    Un processus du pool de conversion s'est arrêté brutalement (mémoire
+    insuffisante, signal) : le pool est inutilisable et doit être recréé,
+    la conversion reprend avec le nouveau pool
+    """
+
+
+class ConversionPaused(Exception):
+    """
+    Upload de l'album sans activité (AUTO_CONVERT_IDLE_TIMEOUT) : les fichiers
+    reçus sont convertis, puis la conversion s'arrête en attendant la fin de
+    l'upload, qui la relance (seules les nouvelles images sont alors converties)
+    """
+
+
+def check_album_state(album):
+    """
+    Relit l'état de l'album en base pendant sa conversion
+    Lève AlbumDeletedError ou ConversionCancelled si l'album a été supprimé
+    ou si l'annulation a été demandée ; retourne True si l'upload est terminé
+    """
+    state = Album.objects.filter(pk=album.pk).values_list('conversion_status', 'upload_complete').first()
+    if state is None:
+        raise AlbumDeletedError(f'L\'album "{album.name}" a été supprimé')
+    conversion_status, upload_complete = state
+    if conversion_status == 'cancelling':
+        raise ConversionCancelled(f'Conversion de l\'album "{album.name}" annulée')
+    return upload_complete
+
+
+def get_upload_idle_seconds(album):
+    """Secondes écoulées depuis le dernier morceau reçu pour l'album (upload par morceaux)"""
+    upload_activity = Album.objects.filter(pk=album.pk).values_list('upload_activity', flat=True).first()
+    if upload_activity is None:
+        return float('inf')
+    return (timezone.now() - upload_activity).total_seconds()
+
+
+def pause_conversion(album):
+    """
+    Met en pause la conversion d'un album dont l'upload n'est pas terminé :
+    l'album redevient "à convertir", ses fichiers sources et le dossier de
+    sortie (point de reprise) sont conservés
+    Retourne False si l'upload vient de se terminer : la conversion continue
+    avec les derniers fichiers (verrou partagé avec finalize_album_upload)
+    """
+    with transaction.atomic():
+        state = Album.objects.select_for_update().filter(pk=album.pk).values_list('upload_complete', flat=True).first()
+        if state is None:
+            raise AlbumDeletedError(f'L\'album "{album.name}" a été supprimé')
+        if state:
+            return False
+        reset_album_progress(album, 'pending')
+    return True
+
+
+def get_conversion_pool_size():
+    """Nombre de processus de conversion, selon les coeurs, la mémoire et la configuration"""
+    return get_pool_size(
+        max_workers=settings.CONVERSION_MAX_WORKERS,
+        worker_memory=settings.CONVERSION_WORKER_MEMORY_MB * 1024 * 1024,
+    )
+
+
+def get_conversion_executor(max_workers=None):
+    """
+    Crée le pool de processus utilisé pour la conversion des images
+    Dimensionné selon le nombre de coeurs et la mémoire disponible
+    """
+    if max_workers is None:
+        max_workers = get_conversion_pool_size()
+    # "spawn" plutôt que "fork" : les conversions sont lancées depuis des threads,
+    # et forker un processus multi-threadé n'est pas sûr
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+    )
+
+
+class MemoryBudget:
+    """
+    Mémoire réservée par les images en cours de décodage, partagée par toutes
+    les conversions du processus
+    Une image n'est soumise au pool que si sa taille décodée estimée tient dans
+    le budget restant ; une image plus grande que le budget est admise seule
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.peak = 0
+        self._condition = threading.Condition()
+
+    def try_acquire(self, amount):
+        with self._condition:
+            if self.used and self.used + amount > self.limit:
+                return False
+            self.used += amount
+            self.peak = max(self.peak, self.used)
+            return True
+
+    def release(self, amount):
+        with self._condition:
+            self.used -= amount
+            self._condition.notify_all()
+
+    def wait_for_release(self, timeout):
+        """Attend qu'une autre conversion libère de la mémoire"""
+        with self._condition:
+            self._condition.wait(timeout)
+
+
+_memory_budget = None
+_memory_budget_lock = threading.Lock()
+
+
+def get_memory_budget():
+    """
+    Budget mémoire des conversions (CONVERSION_MEMORY_BUDGET_MB, ou la moitié
+    de la mémoire disponible au démarrage si 0 ; si elle est inconnue, la
+    mémoire réservée par processus multipliée par le nombre de processus)
+    """
+    global _memory_budget
+    with _memory_budget_lock:
+        if _memory_budget is None:
+            limit = settings.CONVERSION_MEMORY_BUDGET_MB * 1024 * 1024
+            if not limit:
+                available_memory = get_available_memory()
+                if available_memory:
+                    limit = available_memory // 2
+                else:
+                    limit = get_conversion_pool_size() * settings.CONVERSION_WORKER_MEMORY_MB * 1024 * 1024
+            _memory_budget = MemoryBudget(limit)
+        return _memory_budget
+
+
+def prune_conversion_cache():
+    """Limite la taille du cache de conversion (éviction LRU)"""
+    if not settings.CONVERSION_CACHE_DIR:
+        return
+    try:
+        removed_count, removed_size = conversion_cache.prune(
+            settings.CONVERSION_CACHE_DIR,
+            settings.CONVERSION_CACHE_MAX_SIZE_MB * 1024 * 1024,
+        )
+        if removed_count:
+            logger.info(f"Cache de conversion: {removed_count} entrée(s) supprimée(s) ({removed_size / (1024 * 1024):.1f} MB)")
+    except OSError as e:
+        logger.warning(f"Erreur lors du nettoyage du cache de conversion: {str(e)}")
+
+
+def get_conversion_renditions(profile_name='default'):
+    """Liste des rendus (taille, format, qualité) d'un profil de conversion"""
+    profiles = settings.CONVERSION_PROFILES
+    profile = profiles.get(profile_name) or profiles['default']
+    return profile['renditions']
+
+
+def get_rendition_targets(image_file, input_dir, output_dir, renditions, claimed_outputs):
+    """
+    Chemins de sortie d'une image pour chaque rendu : [(rendu, chemin)]
+    Avec un seul rendu, les images sont à la racine du dossier de sortie ;
+    sinon chaque rendu a son sous-dossier (nom du rendu). Le sous-dossier de
+    l'image dans l'album est conservé ; deux images qui donneraient la même
+    sortie (photo.png et photo.jpg) sont distinguées par un suffixe (photo_2.jpg)
+    claimed_outputs : chemins de sortie déjà attribués (complété par la fonction)
+    """
+    if isinstance(image_file, ArchiveMember):
+        relative_dir = os.path.dirname(image_file.path)
+    else:
+        relative_dir = os.path.dirname(os.path.relpath(image_file, input_dir))
+
+    suffix = 1
+    while True:
+        targets = []
+        for rendition in renditions:
+            rendition_dir = output_dir if len(renditions) == 1 else os.path.join(output_dir, rendition['name'])
+            output_filename = get_output_filename(image_file, rendition.get('format', 'JPEG'))
+            if suffix > 1:
+                name, extension = os.path.splitext(output_filename)
+                output_filename = f"{name}_{suffix}{extension}"
+            targets.append((rendition, os.path.normpath(os.path.join(rendition_dir, relative_dir, output_filename))))
+        # Comparaison insensible à la casse : l'archive peut être extraite sur un système qui l'est
+        keys = [output_path.lower() for _, output_path in targets]
+        if not any(key in claimed_outputs for key in keys):
+            claimed_outputs.update(keys)
+            return targets
+        suffix += 1
+
+
+def get_output_dimensions(entry, rendition):
+    """Dimensions d'une image convertie, d'après l'en-tête de l'image source"""
+    if 'error' in entry:
+        return None
+    orientation = entry.get('orientation', 1)
+    width, height = get_thumbnail_size((entry['width'], entry['height']), rendition['size'], orientation) or (entry['width'], entry['height'])
+    # L'orientation EXIF est appliquée à l'image convertie
+    if orientation in TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def get_conversion_result(entry, targets, input_dir, output_dir, error=None, error_type=''):
+    """Résultat de la conversion d'une image, pour l'inventaire de l'album (voir record_conversion)"""
+    result = {
+        'source': entry['path'],
+        'source_path': get_relative_path(entry['path'], input_dir),
+        'status': 'error' if error else 'converted',
+    }
+    if error:
+        result['error'] = error
+        result['error_type'] = error_type
+    else:
+        result['outputs'] = [
+            (
+                os.path.relpath(output_path, output_dir).replace(os.sep, '/'),
+                os.path.getsize(output_path),
+                get_output_dimensions(entry, rendition),
+            )
+            for rendition, output_path in targets
+        ]
+    return result
+
+
+def get_manifest_stats(manifest):
+    """Résumé de l'inventaire d'un dossier : nombre d'images, pixels à décoder, formats"""
+    readable = [entry for entry in manifest if 'error' not in entry]
+    formats = {}
+    for entry in readable:
+        formats[entry['format']] = formats.get(entry['format'], 0) + 1
+    total_pixels = sum(entry['pixels'] for entry in readable)
+    return {
+        'total_files': len(manifest),
+        'unreadable_files': len(manifest) - len(readable),
+        'total_megapixels': round(total_pixels / 1_000_000, 1),
+        'max_megapixels': round(max((entry['pixels'] for entry in readable), default=0) / 1_000_000, 1),
+        'total_bytes': sum(entry['file_size'] for entry in readable),
+        'formats': formats,
+    }
+
+
+def resize_images_with_pillow(input_dir, output_dir, album=None, executor=None, renditions=None, stats=None, results=None,
+                              stop_event=None, claimed_outputs=None):
+    """
+    Redimensionne toutes les images d'un dossier en utilisant Pillow
+    (1920x1080 par défaut, ou les rendus du profil de conversion de l'album)
+    Les images sont converties en parallèle dans un pool de processus,
+    chaque image n'étant décodée qu'une fois pour tous ses rendus
+    Les JPEG déjà à la bonne taille sont copiés sans réencodage
+    Met à jour la progression si un album est fourni, et complète le dict
+    stats (inventaire des images, traitement appliqué) s'il est fourni
+    La liste results, si elle est fournie, reçoit le résultat de chaque image
+    (voir get_conversion_result)
+    stop_event (threading.Event) : arrêt du worker, la conversion s'interrompt
+    entre deux images en conservant les images déjà converties (ConversionInterrupted)
+    claimed_outputs : chemins de sortie déjà pris, que les images ne doivent
+    pas remplacer (voir get_rendition_targets)
+    """
+    if results is None:
+        results = []
+    if claimed_outputs is None:
+        claimed_outputs = set()
+    if renditions is None:
+        renditions = get_conversion_renditions(album.conversion_profile if album else 'default')
+
+    # Album encore en cours d'upload (AUTO_CONVERT) : les fichiers sont convertis
+    # au fur et à mesure de leur arrivée, jusqu'à la fin de l'upload
+    upload_in_progress = album is not None and not album.upload_complete
+
+    # Inventaire des images : un seul parcours du dossier, chaque fichier une seule fois
+    image_files = discover_images(input_dir)
+    
+    if not image_files and not upload_in_progress:
+        raise Exception("Aucune image trouvée dans le dossier")
+    
+    # Créer le dossier de sortie (et les sous-dossiers des rendus) s'il n'existe pas
+    os.makedirs(output_dir, exist_ok=True)
+    if len(renditions) > 1:
+        for rendition in renditions:
+            os.makedirs(os.path.join(output_dir, rendition['name']), exist_ok=True)
+    
+    own_executor = executor is None
+    if own_executor:
+        executor = get_conversion_executor()
+
+    manifest = []
+    seen_files = set()
+    converted_count = 0
+    errors = []
+    # Traitement appliqué à chaque image (copie, transformation sans perte, cache, réencodage)
+    image_modes = {'resumed': 0, 'passthrough': 0, 'lossless': 0, 'cached': 0, 'reencoded': 0}
+    pending_files = []
+
+    def add_images(new_files):
+        """Inventorie de nouvelles images et les ajoute aux images à convertir"""
+        nonlocal converted_count
+        seen_files.update(str(image_file) for image_file in new_files)
+        # Lecture des en-têtes (format, dimensions) sans décoder les images
+        entries = list(executor.map(probe_image, new_files, chunksize=32))
+        manifest.extend(entries)
+
+        # Reprise : les sorties déjà présentes et valides (run précédent interrompu) sont conservées
+        new_pending = []
+        for entry in entries:
+            image_file = entry['path']
+            targets = get_rendition_targets(image_file, input_dir, output_dir, renditions, claimed_outputs)
+            entry['targets'] = targets
+            if all(is_valid_output(output_path, rendition.get('format', 'JPEG')) for rendition, output_path in targets):
+                converted_count += 1
+                image_modes['resumed'] += 1
+                results.append(get_conversion_result(entry, targets, input_dir, output_dir))
+            elif 'error' in entry:
+                # Image illisible : inutile de l'envoyer au pool de conversion
+                error_msg = f"Erreur lors de la conversion de {image_file}: {entry['error']}"
+                logger.error(error_msg)
+                errors.append(error_msg)
+                results.append(get_conversion_result(
+                    entry, targets, input_dir, output_dir, error=entry['error'], error_type=entry.get('error_type', ''),
+                ))
+            else:
+                new_pending.append(entry)
+        # Les images sont prises en fin de liste : les plus anciennes d'abord
+        pending_files[:0] = reversed(new_pending)
+
+    try:
+        add_images(image_files)
+    except BrokenProcessPool as e:
+        raise ConversionPoolBroken('Pool de conversion arrêté brutalement') from e
+    manifest_stats = get_manifest_stats(manifest)
+    logger.info(
+        f"Inventaire: {manifest_stats['total_files']} image(s), "
+        f"{manifest_stats['total_megapixels']} Mpx à décoder"
+        + (f", {manifest_stats['unreadable_files']} illisible(s)" if manifest_stats['unreadable_files'] else '')
+        + (" (upload en cours)" if upload_in_progress else '')
+    )
+
+    total_files = len(manifest)
+    processed_count = converted_count + len(errors)
+
+    reporter = ProgressReporter(album, total_files)
+    if converted_count:
+        logger.info(f"Reprise de la conversion: {converted_count}/{total_files} image(s) déjà converties")
+    if processed_count:
+        reporter.update(processed_count, force=True)
+
+    # Admission des images selon leur taille décodée estimée (budget mémoire partagé)
+    budget = get_memory_budget()
+    sizes = [tuple(rendition['size']) for rendition in renditions]
+    memory_stats = {'budget_mb': budget.limit // (1024 * 1024), 'peak_mb': 0, 'largest_image_mb': 0, 'throttled': 0}
+    reserved = 0
+    futures = {}
+    last_scan = last_check = last_upload_activity = time.monotonic()
+
+    try:
+        while pending_files or futures or upload_in_progress:
+            if stop_event is not None and stop_event.is_set():
+                raise ConversionInterrupted('Conversion interrompue par l\'arrêt du worker')
+
+            if album is not None and time.monotonic() - last_check >= CANCEL_CHECK_INTERVAL:
+                # Annulation demandée ou album supprimé : arrêt entre deux images
+                check_album_state(album)
+                last_check = time.monotonic()
+
+            if (upload_in_progress and not pending_files and not futures
+                    and time.monotonic() - last_upload_activity >= settings.AUTO_CONVERT_IDLE_TIMEOUT):
+                # Les morceaux reçus comptent aussi : un gros fichier peut être en cours d'envoi
+                idle_seconds = get_upload_idle_seconds(album)
+                last_upload_activity = max(last_upload_activity, time.monotonic() - idle_seconds)
+                if idle_seconds >= settings.AUTO_CONVERT_IDLE_TIMEOUT:
+                    # Upload abandonné : les fichiers reçus sont convertis, la place du worker
+                    # est libérée (la fin de l'upload, si elle arrive, relance la conversion)
+                    if pause_conversion(album):
+                        raise ConversionPaused(
+                            f"Aucun fichier reçu depuis {settings.AUTO_CONVERT_IDLE_TIMEOUT} s, "
+                            f"conversion de \"{album.name}\" en pause jusqu'à la fin de l'upload"
+                        )
+                    # Upload terminé entre-temps : dernier parcours des fichiers
+                    last_scan = None
+
+            if upload_in_progress and not pending_files and (last_scan is None or time.monotonic() - last_scan >= UPLOAD_POLL_INTERVAL):
+                # Statut relu avant le parcours : les fichiers placés avant la fin de l'upload sont vus
+                upload_in_progress = not check_album_state(album)
+                new_files = [image_file for image_file in discover_images(input_dir) if str(image_file) not in seen_files]
+                last_scan = time.monotonic()
+                if new_files:
+                    last_upload_activity = last_scan
+                    errors_before = len(errors)
+                    resumed_before = converted_count
+                    add_images(new_files)
+                    total_files = len(manifest)
+                    reporter.total_files = total_files
+                    processed_count += (converted_count - resumed_before) + (len(errors) - errors_before)
+                    reporter.update(processed_count, reporter.current_file_name, force=True)
+
+            if not pending_files and not futures:
+                if upload_in_progress:
+                    # En attente des prochains fichiers (la progression sert de signe de vie)
+                    reporter.update(processed_count, reporter.current_file_name)
+                    time.sleep(UPLOAD_POLL_INTERVAL)
+                continue
+
+            # Soumettre les images tant que le budget mémoire le permet
+            throttled = False
+            while pending_files:
+                entry = pending_files[-1]
+                if settings.CONVERSION_PASSTHROUGH and all(get_passthrough_mode(entry, rendition) for rendition in renditions):
+                    cost = 0
+                else:
+                    cost = estimate_decode_memory(entry, sizes, settings.CONVERSION_JPEG_DRAFT)
+                if not budget.try_acquire(cost):
+                    throttled = True
+                    break
+                pending_files.pop()
+                reserved += cost
+                memory_stats['peak_mb'] = max(memory_stats['peak_mb'], reserved // (1024 * 1024))
+                memory_stats['largest_image_mb'] = max(memory_stats['largest_image_mb'], cost // (1024 * 1024))
+
+                image_file = entry['path']
+                targets = entry['targets']
+                future = executor.submit(
+                    process_image, image_file, targets,
+                    draft=settings.CONVERSION_JPEG_DRAFT,
+                    cache_dir=settings.CONVERSION_CACHE_DIR,
+                    probe=entry if settings.CONVERSION_PASSTHROUGH else None,
+                )
+                futures[future] = (entry, targets, cost)
+
+            if throttled:
+                memory_stats['throttled'] += 1
+                if not futures:
+                    # Mémoire occupée par d'autres conversions : attendre qu'elle se libère
+                    # (la progression sert de signe de vie pendant l'attente)
+                    reporter.update(processed_count, reporter.current_file_name)
+                    budget.wait_for_release(1.0)
+                    continue
+
+            # Attente bornée : prise en compte des nouveaux fichiers (upload en cours) et des annulations
+            timeout = UPLOAD_POLL_INTERVAL if upload_in_progress else CANCEL_CHECK_INTERVAL if album else None
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Images longues à convertir : signe de vie
+                reporter.update(processed_count, reporter.current_file_name)
+            for future in done:
+                entry, targets, cost = futures.pop(future)
+                image_file = entry['path']
+                budget.release(cost)
+                reserved -= cost
+
+                output_filename = get_output_filename(image_file, renditions[0].get('format', 'JPEG'))
+                processed_count += 1
+                progress = (processed_count * 100) // total_files
+
+                try:
+                    mode = future.result()
+                    image_modes[mode] += 1
+                    converted_count += 1
+                    current_file_name = output_filename
+                    logger.info(f"Progression: {progress}% ({processed_count}/{total_files}) - {output_filename} ({mode})")
+                    results.append(get_conversion_result(entry, targets, input_dir, output_dir))
+                except BrokenProcessPool:
+                    # Ce n'est pas une erreur de l'image : elle sera convertie à la reprise
+                    raise
+                except Exception as e:
+                    error_msg = f"Erreur lors de la conversion de {image_file}: {str(e)}"
+                    logger.error(error_msg)
+                    errors.append(error_msg)
+                    results.append(get_conversion_result(
+                        entry, targets, input_dir, output_dir, error=str(e), error_type=type(e).__name__,
+                    ))
+                    current_file_name = f"Erreur: {get_source_name(image_file)}"
+
+                # Mettre à jour la progression (y compris en cas d'erreur)
+                reporter.update(processed_count, current_file_name)
+
+        if album is not None:
+            # Annulation ou suppression demandée pendant les dernières images
+            check_album_state(album)
+    except BrokenProcessPool as e:
+        # Les sorties complètes sont conservées pour la reprise
+        reporter.album = None
+        raise ConversionPoolBroken('Pool de conversion arrêté brutalement') from e
+    except (AlbumDeletedError, ConversionCancelled, ConversionInterrupted, ConversionPaused):
+        # Les images en attente sont annulées ; celles en cours de conversion sont
+        # attendues : le dossier de sortie peut être supprimé sans concurrence, ou
+        # conservé (arrêt du worker) avec des sorties complètes pour la reprise
+        for future in futures:
+            future.cancel()
+        wait([future for future in futures if not future.cancelled()])
+        # Plus de progression à enregistrer
+        reporter.album = None
+        raise
+    finally:
+        # En cas d'interruption, annuler les images de cet album encore en attente
+        # et rendre la mémoire réservée
+        for future in futures:
+            future.cancel()
+        budget.release(reserved)
+        if own_executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+        reporter.finish()
+
+    if not manifest:
+        raise Exception("Aucune image trouvée dans le dossier")
+    if stats is not None:
+        stats['manifest'] = get_manifest_stats(manifest)
+
+    if album:
+        logger.info(f"Progression enregistrée en base {reporter.db_writes} fois pour {total_files} image(s)")
+
+    logger.info(
+        f"Images: {image_modes['reencoded']} réencodée(s), {image_modes['passthrough']} copiée(s) telle(s) quelle(s), "
+        f"{image_modes['lossless']} réorientée(s) sans perte, {image_modes['cached']} depuis le cache, "
+        f"{image_modes['resumed']} déjà convertie(s)"
+    )
+    if memory_stats['throttled']:
+        logger.info(
+            f"Budget mémoire ({memory_stats['budget_mb']} MB) atteint {memory_stats['throttled']} fois, "
+            f"pic réservé: {memory_stats['peak_mb']} MB"
+        )
+    if stats is not None:
+        stats['images'] = image_modes
+        stats['memory'] = memory_stats
+        error_types = {}
+        for result in results:
+            if result['status'] == 'error':
+                error_types[result['error_type']] = error_types.get(result['error_type'], 0) + 1
+        stats['errors'] = error_types
+    prune_conversion_cache()
+    
+    if errors:
+        logger.warning(f"Conversion terminée avec {len(errors)} erreur(s)")
+        for error in errors[:5]:  # Afficher seulement les 5 premières erreurs
+            logger.warning(error)
+    
+    return converted_count, total_files
+
+
+def reset_album_progress(album, conversion_status, progress=0):
+    """Rétablit le statut et la progression de l'album après une conversion annulée"""
+    album.conversion_status = conversion_status
+    album.conversion_progress = progress
+    album.current_file_index = 0
+    album.current_file_name = ''
+    # update() : ne pas recréer l'album s'il a été supprimé entre-temps
+    Album.objects.filter(pk=album.pk).update(
+        conversion_status=conversion_status,
+        conversion_progress=progress,
+        current_file_index=0,
+        current_file_name='',
+    )
+
+
+def get_output_dir(source_dir):
+    """Dossier de sortie d'une conversion (avec suffixe _resized)"""
+    base_dir = os.path.dirname(source_dir)
+    dir_name = os.path.basename(source_dir)
+    return os.path.join(base_dir, f"{dir_name}_resized")
+
+
+def keep_failed_sources(results, output_dir):
+    """
+    Conserve les images sources en échec dans le dossier FAILED_DIR_NAME de
+    l'album converti, pour pouvoir les convertir à nouveau (retry_failed_images)
+    """
+    for result in results:
+        if result['status'] != 'error':
+            continue
+        failed_path = os.path.join(output_dir, get_failed_path(result['source_path']))
+        try:
+            os.makedirs(os.path.dirname(failed_path), exist_ok=True)
+            source = result['source']
+            if isinstance(source, ArchiveMember):
+                with open(failed_path, 'wb') as failed_file:
+                    failed_file.write(source.read())
+            else:
+                shutil.move(source, failed_path)
+        except Exception as e:
+            logger.warning(f"Image en échec non conservée ({result['source_path']}): {str(e)}")
+
+
+def run_album_conversion(album, executor=None, stats=None, stop_event=None):
+    """
+    Convertit un album et met à jour son statut
+    Les images déjà converties dans le dossier _resized sont conservées,
+    ce qui permet de reprendre une conversion interrompue
+    Le dict stats, s'il est fourni, est complété avec les statistiques de la conversion
+    stop_event : arrêt du worker (voir resize_images_with_pillow)
+    Retourne (converted_count, total_files)
+    """
+    source_dir = album.old_path
+    output_dir = get_output_dir(source_dir)
+    results = []
+
+    try:
+        converted_count, total_files = resize_images_with_pillow(
+            source_dir, output_dir, album, executor=executor, stats=stats, results=results, stop_event=stop_event,
+        )
+    except ConversionInterrupted:
+        # L'album reste "en cours de conversion" : le dossier de sortie sert de point de reprise
+        raise
+    except ConversionPaused:
+        # Upload non terminé : les sources restent en place, le dossier de sortie sert de point de reprise
+        raise
+    except AlbumDeletedError:
+        shutil.rmtree(output_dir, ignore_errors=True)
+        raise
+    except ConversionCancelled:
+        # Les images sources sont intactes : l'album redevient à convertir
+        shutil.rmtree(output_dir, ignore_errors=True)
+        reset_album_progress(album, 'pending')
+        raise
+    except Exception:
+        # Le dossier de sortie est conservé : il sert de point de reprise
+        # (update() : ne pas recréer l'album s'il a été supprimé entre-temps)
+        album.conversion_status = 'error'
+        Album.objects.filter(pk=album.pk).update(conversion_status='error')
+        raise
+    finally:
+        # La progression finale est en base : l'entrée du cache n'est plus utile
+        clear_live_progress(album.id)
+
+    if converted_count > 0:
+        # Supprimer l'ancien dossier et renommer le nouveau
+        keep_failed_sources(results, output_dir)
+        if os.path.exists(source_dir):
+            shutil.rmtree(source_dir)
+        os.rename(output_dir, source_dir)
+        # L'inventaire de l'album décrit maintenant les images converties
+        record_conversion(album, results)
+
+        # Mettre à jour la base de données
+        album.conversion_status = 'completed'
+        album.conversion_date = timezone.now()
+        album.conversion_progress = 100
+        # Seuls les champs de la conversion : l'upload a pu modifier l'album entre-temps (AUTO_CONVERT)
+        album.save(update_fields=['conversion_status', 'conversion_date', 'conversion_progress'])
+    else:
+        album.conversion_status = 'error'
+        album.save(update_fields=['conversion_status'])
+        # Nettoyer le dossier de sortie s'il est vide
+        if os.path.exists(output_dir) and not os.listdir(output_dir):
+            os.rmdir(output_dir)
+
+    return converted_count, total_files
+
+
+def retry_failed_images(album, executor=None, stats=None, stop_event=None):
+    """
+    Convertit à nouveau les seules images en échec d'un album converti
+    Les images converties sont ajoutées à celles de l'album ; les images
+    toujours en échec restent dans FAILED_DIR_NAME
+    Retourne (converted_count, total_files)
+    """
+    failed_dir = os.path.join(album.old_path, FAILED_DIR_NAME)
+    # Dossier de sortie caché dans l'album : les images n'y apparaissent qu'une fois toutes converties
+    output_dir = os.path.join(album.old_path, RETRY_DIR_NAME)
+    results = []
+
+    # Les images de l'album ne sont jamais remplacées : une image convertie à nouveau
+    # qui prendrait la place d'une autre (photo.png et photo.jpg) reçoit un suffixe (photo_2.jpg)
+    claimed_outputs = {
+        os.path.normpath(os.path.join(output_dir, path)).lower()
+        for path in album.images.exclude(status='error').values_list('path', flat=True)
+    }
+    for dir_path, dir_names, file_names in os.walk(album.old_path):
+        dir_names[:] = [name for name in dir_names if not name.startswith('.')]
+        relative_dir = os.path.relpath(dir_path, album.old_path)
+        claimed_outputs.update(os.path.normpath(os.path.join(output_dir, relative_dir, name)).lower() for name in file_names)
+
+    try:
+        converted_count, total_files = resize_images_with_pillow(
+            failed_dir, output_dir, album, executor=executor, stats=stats, results=results, stop_event=stop_event,
+            claimed_outputs=claimed_outputs,
+        )
+    except ConversionInterrupted:
+        raise
+    except ConversionCancelled:
+        # L'album garde ses images déjà converties et ses images en échec
+        shutil.rmtree(output_dir, ignore_errors=True)
+        reset_album_progress(album, 'completed', progress=100)
+        raise
+    except Exception:
+        # L'album garde ses images déjà converties
+        album.conversion_status = 'completed'
+        Album.objects.filter(pk=album.pk).update(conversion_status='completed')
+        raise
+    finally:
+        clear_live_progress(album.id)
+
+    # Fusionner les nouvelles images converties avec celles de l'album
+    for result in results:
+        if result['status'] != 'converted':
+            continue
+        for output_path, _, _ in result['outputs']:
+            destination_path = os.path.join(album.old_path, output_path)
+            os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+            os.replace(os.path.join(output_dir, output_path), destination_path)
+        os.remove(result['source'])
+    shutil.rmtree(output_dir, ignore_errors=True)
+    if not discover_images(failed_dir):
+        shutil.rmtree(failed_dir, ignore_errors=True)
+    record_retry(album, results)
+
+    album.conversion_status = 'completed'
+    album.conversion_date = timezone.now()
+    album.conversion_progress = 100
+    album.save(update_fields=['conversion_status', 'conversion_date', 'conversion_progress'])
+    return converted_count, total_files
@@ -0,0 +1,141 @@
+"""
+Cache disque des images converties, adressé par contenu.
+
+La clé d'une entrée est le hash SHA-256 des octets de l'image source combiné
+aux paramètres de conversion : une même photo convertie avec les mêmes
+paramètres est simplement recopiée (lien physique ou copie) au lieu d'être
+décodée et réencodée. L'éviction se fait par ordre de dernier accès (LRU),
+la date de modification des entrées étant mise à jour à chaque utilisation.
+
+Comme converter.imaging, ce module ne dépend pas de Django.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+
+# À incrémenter quand le rendu de la conversion change, pour invalider le cache
+CACHE_VERSION = 1
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    """Retourne le hash SHA-256 (hexadécimal) du contenu d'un fichier"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_cache_key(source_hash, **params):
+    """Construit la clé de cache à partir du hash source et des paramètres de conversion"""
+    description = ';'.join(f'{name}={params[name]!r}' for name in sorted(params))
+    key_source = f'v{CACHE_VERSION};{source_hash};{description}'
+    return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+
+def get_entry_path(cache_dir, key):
+    """Chemin d'une entrée du cache (sous-dossiers sur les 2 premiers caractères)"""
+    return os.path.join(cache_dir, key[:2], key)
+
+
+def link_or_copy(source_path, destination_path):
+    """Crée un lien physique, ou une copie si le lien est impossible (autre système de fichiers)"""
+    if os.path.exists(destination_path):
+        os.remove(destination_path)
+    try:
+        os.link(source_path, destination_path)
+    except OSError:
+        shutil.copyfile(source_path, destination_path)
+
+
+def fetch(cache_dir, key, output_path):
+    """
+    Place l'entrée du cache à output_path si elle existe
+    Retourne True en cas de succès
+    """
+    entry_path = get_entry_path(cache_dir, key)
+    try:
+        link_or_copy(entry_path, output_path)
+    except FileNotFoundError:
+        return False
+
+    # Marquer l'entrée comme récemment utilisée (LRU)
+    try:
+        os.utime(entry_path)
+    except OSError:
+        pass
+    return True
+
+
+def store(cache_dir, key, output_path):
+    """Ajoute un fichier converti au cache (écriture atomique)"""
+    entry_path = get_entry_path(cache_dir, key)
+    entry_dir = os.path.dirname(entry_path)
+    os.makedirs(entry_dir, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=entry_dir, prefix='.tmp-')
+    os.close(fd)
+    try:
+        link_or_copy(output_path, temp_path)
+        os.replace(temp_path, entry_path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def iter_entries(cache_dir):
+    """Itère sur les entrées du cache : (chemin, taille, date de dernier accès)"""
+    if not os.path.isdir(cache_dir):
+        return
+
+    with os.scandir(cache_dir) as buckets:
+        for bucket in buckets:
+            if not bucket.is_dir(follow_symlinks=False):
+                continue
+            with os.scandir(bucket.path) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.') or not entry.is_file(follow_symlinks=False):
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+
+def get_stats(cache_dir):
+    """Retourne (nombre d'entrées, taille totale en octets)"""
+    count = 0
+    total_size = 0
+    for _, size, _ in iter_entries(cache_dir):
+        count += 1
+        total_size += size
+    return count, total_size
+
+
+def prune(cache_dir, max_size):
+    """
+    Supprime les entrées les moins récemment utilisées jusqu'à ce que
+    le cache ne dépasse plus max_size octets
+    Retourne (nombre d'entrées supprimées, octets libérés)
+    """
+    entries = sorted(iter_entries(cache_dir), key=lambda entry: entry[2])
+    total_size = sum(size for _, size, _ in entries)
+
+    removed_count = 0
+    removed_size = 0
+    for path, size, _ in entries:
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_size -= size
+        removed_count += 1
+        removed_size += size
+
+    return removed_count, removed_size
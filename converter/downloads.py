@@ -0,0 +1,154 @@
+"""
+Envoi des fichiers téléchargés (archives d'albums).
+
+Gère les requêtes conditionnelles (ETag, Last-Modified) et les requêtes
+partielles (Range), afin qu'un téléchargement répété ou interrompu ne
+renvoie que ce qui manque.
+
+Avec DOWNLOAD_X_ACCEL_REDIRECT, Django ne fait que vérifier les droits :
+l'envoi du fichier est délégué à nginx (en-tête X-Accel-Redirect vers une
+location interne, voir nginx.conf.example), qui gère lui-même les requêtes
+conditionnelles et partielles.
+"""
+
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.encoding import smart_str
+from django.utils.http import http_date, parse_http_date_safe
+
+from .zipstream import ZIP_CHUNK_SIZE
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def get_download_filename(album):
+    """Nom du fichier ZIP proposé au téléchargement"""
+    # Nettoyer le nom du fichier pour éviter les problèmes
+    safe_name = re.sub(r'[^a-zA-Z0-9_\-\s]', '', album.name)
+    safe_name = re.sub(r'\s+', '_', safe_name.strip())
+    return f"{safe_name}.zip"
+
+
+def get_file_etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(range_header, size):
+    """
+    Analyse un en-tête Range à une seule plage
+    Retourne (début, fin incluse), None si l'en-tête est ignoré (absent,
+    plages multiples), ou False si la plage est hors du fichier
+    """
+    match = RANGE_RE.match(range_header.strip()) if range_header else None
+    if not match:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # Les N derniers octets
+        length = int(end)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def is_range_current(request, etag, last_modified):
+    """If-Range : la plage n'est envoyée que si le fichier n'a pas changé"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def iter_file_range(file_path, start, length, chunk_size=ZIP_CHUNK_SIZE):
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def get_x_accel_redirect(file_path):
+    """
+    URI interne nginx d'un fichier de MEDIA_ROOT (DOWNLOAD_X_ACCEL_PREFIX),
+    ou None si la délégation à nginx est désactivée ou si le fichier est hors de MEDIA_ROOT
+    """
+    if not settings.DOWNLOAD_X_ACCEL_REDIRECT:
+        return None
+
+    media_root = os.path.realpath(settings.MEDIA_ROOT)
+    real_path = os.path.realpath(file_path)
+    if os.path.commonpath([media_root, real_path]) != media_root:
+        return None
+
+    relative_path = os.path.relpath(real_path, media_root).replace(os.sep, '/')
+    return settings.DOWNLOAD_X_ACCEL_PREFIX.rstrip('/') + '/' + quote(relative_path)
+
+
+def serve_file(request, file_path, filename, content_type='application/zip'):
+    """
+    Envoie un fichier en pièce jointe avec ETag/Last-Modified,
+    réponses 304 et envoi partiel (206) sur demande
+    """
+    x_accel_redirect = get_x_accel_redirect(file_path)
+    if x_accel_redirect:
+        # nginx envoie le fichier (sendfile) : le worker est libéré immédiatement
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = x_accel_redirect
+        response['Content-Disposition'] = f'attachment; filename="{smart_str(filename)}"'
+        return response
+
+    stat = os.stat(file_path)
+    etag = get_file_etag(stat)
+    last_modified = int(stat.st_mtime)
+
+    def set_headers(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    # If-None-Match / If-Modified-Since (304) et If-Match / If-Unmodified-Since (412)
+    conditional_response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional_response is not None:
+        return set_headers(conditional_response)
+
+    byte_range = None
+    if request.method == 'GET' and is_range_current(request, etag, last_modified):
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), stat.st_size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return set_headers(response)
+
+    if byte_range is None:
+        response = FileResponse(open(file_path, 'rb'), as_attachment=True, filename=filename, content_type=content_type)
+        return set_headers(response)
+
+    start, end = byte_range
+    length = end - start + 1
+    response = StreamingHttpResponse(iter_file_range(file_path, start, length), status=206, content_type=content_type)
+    response['Content-Length'] = str(length)
+    response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    response['Content-Disposition'] = f'attachment; filename="{smart_str(filename)}"'
+    return set_headers(response)
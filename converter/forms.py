@@ -1,6 +1,10 @@
 from django import forms
+from django.conf import settings
 from .models import Album
 
+def get_conversion_profile_choices():
+    return [(name, profile.get('label', name)) for name, profile in settings.CONVERSION_PROFILES.items()]
+
 class MultipleFileInput(forms.ClearableFileInput):
     allow_multiple_selected = True
 
@@ -28,6 +32,16 @@ class AlbumUploadForm(forms.ModelForm):
         label='Nom de l\'album'
     )
     
+    # Profil de conversion (formats produits pour chaque image)
+    conversion_profile = forms.ChoiceField(
+        choices=get_conversion_profile_choices,
+        initial='default',
+        widget=forms.Select(attrs={
+            'class': 'form-control'
+        }),
+        label='Format de conversion'
+    )
+    
     # Champ pour télécharger plusieurs fichiers images
     photos = MultipleFileField(
         widget=MultipleFileInput(attrs={
@@ -50,7 +64,7 @@ class AlbumUploadForm(forms.ModelForm):
     
     class Meta:
         model = Album
-        fields = ['name']
+        fields = ['name', 'conversion_profile']
     
     def clean(self):
         cleaned_data = super().clean()
@@ -0,0 +1,629 @@
+"""
+Traitement d'une image isolée avec Pillow.
+
+Ce module ne dépend pas de Django : ses fonctions sont exécutées dans les
+processus du pool de conversion (voir resize_images_with_pillow) et doivent
+rester importables et sérialisables (pickle) sans configuration Django.
+"""
+
+import functools
+import hashlib
+import io
+import os
+import posixpath
+import re
+import shutil
+import subprocess
+import zipfile
+
+from PIL import Image, ImageOps
+
+from . import conversion_cache
+
+
+# Taille cible par défaut des images converties
+TARGET_SIZE = (1920, 1080)
+
+# Paramètres d'encodage JPEG par défaut
+JPEG_QUALITY = 85
+
+# Extension des fichiers de sortie selon le format
+OUTPUT_EXTENSIONS = {
+    'JPEG': '.jpg',
+    'WEBP': '.webp',
+    'PNG': '.png',
+}
+
+
+# Archive ZIP conservée telle quelle dans le dossier d'un album (ARCHIVE_INGEST_MODE=direct) :
+# ses images sont converties sans être extraites
+SOURCE_ARCHIVE_NAME = '.source.zip'
+
+
+class ArchiveMember:
+    """
+    Image source lue directement dans l'archive ZIP d'un album
+    name : nom du membre dans l'archive (lecture) ; path : chemin normalisé
+    et sûr (voir get_safe_member_path), seul utilisé pour les chemins de sortie
+    """
+
+    def __init__(self, archive_path, name, size=0, path=None):
+        self.archive_path = archive_path
+        self.name = name
+        self.size = size
+        self.path = path or name
+
+    def __str__(self):
+        return f"{self.archive_path}/{self.name}"
+
+    def open(self):
+        return _open_zip(self.archive_path).open(self.name)
+
+    def read(self):
+        with self.open() as member:
+            return member.read()
+
+
+@functools.lru_cache(maxsize=4)
+def _open_zip_cached(archive_path, mtime_ns):
+    return zipfile.ZipFile(archive_path)
+
+
+def _open_zip(archive_path):
+    # Chaque processus du pool garde l'archive ouverte (lecture du répertoire central une seule fois)
+    return _open_zip_cached(archive_path, os.stat(archive_path).st_mtime_ns)
+
+
+def get_source_name(image_file):
+    """Nom de fichier d'une image source (chemin ou membre d'archive)"""
+    if isinstance(image_file, ArchiveMember):
+        return posixpath.basename(image_file.path)
+    return os.path.basename(image_file)
+
+
+def open_source(image_file):
+    """
+    Ouvre une image source en lecture : chemin, membre d'archive ou contenu
+    déjà lu (bytes)
+    """
+    if isinstance(image_file, bytes):
+        return io.BytesIO(image_file)
+    if isinstance(image_file, ArchiveMember):
+        return image_file.open()
+    return open(image_file, 'rb')
+
+
+def get_output_filename(image_file, image_format='JPEG'):
+    """Retourne le nom du fichier de sortie (.jpg par défaut) pour une image source"""
+    name_without_ext = os.path.splitext(get_source_name(image_file))[0]
+    return f"{name_without_ext}{OUTPUT_EXTENSIONS[image_format.upper()]}"
+
+
+# Extensions des images converties
+CONVERTIBLE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tiff', '.bmp', '.webp')
+
+
+# Nom de lecteur Windows en tête de chemin (C:)
+DRIVE_PATTERN = re.compile(r'^[A-Za-z]:')
+
+
+def get_safe_member_path(name):
+    """
+    Chemin normalisé (séparateur /) d'un membre d'archive, ou None si le nom
+    n'est pas sûr : chemin absolu, lecteur, antislash, composant '..' ou
+    composant caché
+    Les chemins de sortie étant dérivés de ce chemin, un membre accepté ne
+    peut rien écrire hors du dossier de l'album
+    """
+    if not name or '\\' in name or name.startswith('/') or DRIVE_PATTERN.match(name):
+        return None
+    parts = [part for part in name.split('/') if part not in ('', '.')]
+    if not parts or any(part == '..' or part.startswith('.') for part in parts):
+        return None
+    return '/'.join(parts)
+
+
+def list_archive_images(archive_path):
+    """
+    Images d'une archive ZIP, dans l'ordre de l'archive
+    Les fichiers cachés et les membres dont le chemin n'est pas sûr sont
+    ignorés ; si plusieurs membres ont le même chemin, le dernier est conservé
+    (comme lors d'une extraction)
+    """
+    members = {}
+    with zipfile.ZipFile(archive_path) as zip_file:
+        for info in zip_file.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(CONVERTIBLE_EXTENSIONS):
+                continue
+            path = get_safe_member_path(info.filename)
+            if path is None:
+                continue
+            members.pop(path, None)
+            members[path] = ArchiveMember(archive_path, info.filename, info.file_size, path)
+    return list(members.values())
+
+
+def discover_images(input_dir):
+    """
+    Liste les images d'un dossier et de ses sous-dossiers en un seul parcours
+    Chaque fichier n'apparaît qu'une fois ; les fichiers et dossiers cachés
+    (sorties partielles, fichiers système) sont ignorés
+    Retourne les chemins triés par chemin relatif (ordre stable), suivis des
+    images de l'archive source de l'album s'il y en a une (voir ArchiveMember)
+    """
+    image_files = []
+    archive_members = []
+    seen = set()
+    pending_dirs = [input_dir]
+
+    while pending_dirs:
+        current_dir = pending_dirs.pop()
+        try:
+            with os.scandir(current_dir) as entries:
+                for entry in entries:
+                    if entry.name == SOURCE_ARCHIVE_NAME and current_dir == input_dir:
+                        archive_members.extend(list_archive_images(entry.path))
+                        continue
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        pending_dirs.append(entry.path)
+                    elif entry.is_file() and entry.name.lower().endswith(CONVERTIBLE_EXTENSIONS):
+                        # Un même fichier atteint par deux chemins (lien) n'est traité qu'une fois
+                        stat = entry.stat()
+                        file_id = (stat.st_dev, stat.st_ino)
+                        if file_id not in seen:
+                            seen.add(file_id)
+                            image_files.append(entry.path)
+        except OSError:
+            continue
+
+    image_files.sort(key=lambda path: os.path.relpath(path, input_dir))
+    return image_files + archive_members
+
+
+def probe_image(image_file):
+    """
+    Lit l'en-tête d'une image sans la décoder
+    Retourne un dict : format, largeur, hauteur, canaux, pixels, orientation EXIF
+    et taille du fichier, ou {'path', 'error'} si l'image est illisible
+    """
+    try:
+        with open_source(image_file) as source, Image.open(source) as img:
+            width, height = img.size
+            return {
+                'path': image_file,
+                'format': img.format,
+                'mode': img.mode,
+                'width': width,
+                'height': height,
+                'bands': len(img.getbands()),
+                'pixels': width * height,
+                'orientation': img.getexif().get(0x0112, 1),
+                'file_size': image_file.size if isinstance(image_file, ArchiveMember) else os.path.getsize(image_file),
+            }
+    except Exception as e:
+        return {'path': image_file, 'error': str(e), 'error_type': type(e).__name__}
+
+
+# Valeurs du tag EXIF Orientation qui échangent largeur et hauteur
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def get_thumbnail_size(image_size, size, orientation=1):
+    """
+    Calcule la taille finale (dans le sens du fichier source) d'une image
+    réduite pour tenir dans size, en tenant compte de l'orientation EXIF
+    Retourne None si l'image est déjà assez petite
+    """
+    if orientation in TRANSPOSED_ORIENTATIONS:
+        size = (size[1], size[0])
+
+    width, height = image_size
+    ratio = min(size[0] / width, size[1] / height)
+    if ratio >= 1:
+        return None
+
+    return (max(1, round(width * ratio)), max(1, round(height * ratio)))
+
+
+def apply_draft(img, *sizes):
+    """
+    Demande au décodeur JPEG une réduction à l'échelle 1/2, 1/4 ou 1/8
+    (réduction dans le domaine DCT) tout en restant au moins à la taille finale
+    de chacun des formats demandés
+    Le rééchantillonnage final est fait ensuite par thumbnail()
+    Retourne l'échelle appliquée (1 si aucune réduction)
+    """
+    if img.format != 'JPEG':
+        return 1
+
+    orientation = img.getexif().get(0x0112, 1)
+    requested_sizes = [get_thumbnail_size(img.size, size, orientation) for size in sizes]
+    if not requested_sizes or None in requested_sizes:
+        return 1
+    requested_size = (
+        max(size[0] for size in requested_sizes),
+        max(size[1] for size in requested_sizes),
+    )
+
+    original_width = img.size[0]
+    result = img.draft(None, requested_size)
+    if result is None:
+        return 1
+
+    # result = (mode, (0, 0, largeur / échelle, hauteur / échelle))
+    return round(original_width / result[1][2])
+
+
+def open_image(image_file, sizes, draft=True):
+    """
+    Ouvre et décode une image (une seule fois pour tous les formats de sortie)
+    Retourne une image RGB dans le bon sens (orientation EXIF appliquée)
+    """
+    # Ouvrir l'image avec Pillow
+    with open_source(image_file) as source, Image.open(source) as img:
+        # Décoder directement à une échelle réduite pour les grands JPEG
+        # (doit être fait avant tout accès aux pixels)
+        if draft:
+            apply_draft(img, *sizes)
+
+        # Corriger l'orientation EXIF si nécessaire
+        img = ImageOps.exif_transpose(img)
+
+        # Convertir en RGB si nécessaire (pour les images RGBA, CMYK, etc.)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            # Créer un fond blanc pour les images transparentes
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            if img.mode == 'P':
+                img = img.convert('RGBA')
+            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        img.load()
+    return img
+
+
+def save_rendition(img, output_path, rendition):
+    """Enregistre une image dans le format et la qualité d'un rendu"""
+    image_format = rendition.get('format', 'JPEG').upper()
+    quality = rendition.get('quality', JPEG_QUALITY)
+
+    if image_format == 'JPEG':
+        # Qualité réduite et encodage progressif pour économiser l'espace
+        img.save(output_path, 'JPEG', quality=quality, optimize=True, progressive=True)
+    elif image_format == 'WEBP':
+        img.save(output_path, 'WEBP', quality=quality, method=4)
+    else:
+        img.save(output_path, image_format, optimize=True)
+
+
+def render_image(image_file, targets, draft=True):
+    """
+    Produit tous les rendus d'une image à partir d'un seul décodage
+    targets : liste de (rendu, chemin de sortie), un rendu étant un dict
+    {'name', 'size', 'format', 'quality'}
+    Chaque rendu est calculé à partir du plus petit rendu déjà produit qui
+    reste plus grand que lui, plutôt qu'à partir de l'image complète
+    """
+    targets = sorted(targets, key=lambda target: target[0]['size'][0] * target[0]['size'][1], reverse=True)
+    base = open_image(image_file, [tuple(rendition['size']) for rendition, _ in targets], draft)
+
+    intermediates = [base]
+    for rendition, output_path in targets:
+        size = tuple(rendition['size'])
+        final_size = get_thumbnail_size(base.size, size) or base.size
+
+        # Plus petite image intermédiaire encore assez grande pour ce rendu
+        source = base
+        for intermediate in intermediates:
+            if intermediate.size[0] >= final_size[0] and intermediate.size[1] >= final_size[1]:
+                source = intermediate
+
+        # Redimensionner l'image en conservant les proportions
+        # Utilise LANCZOS pour une meilleure qualité
+        img = source.copy()
+        img.thumbnail(size, Image.LANCZOS)
+        save_rendition(img, output_path, rendition)
+        intermediates.append(img)
+
+
+def convert_image(image_file, output_path, size=TARGET_SIZE, quality=JPEG_QUALITY, draft=True):
+    """
+    Redimensionne une image et l'enregistre en JPEG
+    Retourne le chemin du fichier de sortie
+    """
+    rendition = {'name': 'full', 'size': size, 'format': 'JPEG', 'quality': quality}
+    render_image(image_file, [(rendition, output_path)], draft=draft)
+    return output_path
+
+
+# Segments JPEG conservés lors du nettoyage des métadonnées :
+# APP0 (JFIF), APP14 (Adobe, nécessaire au décodage des couleurs) et profil ICC (APP2)
+KEPT_JPEG_SEGMENTS = (0xE0, 0xEE)
+ICC_PROFILE_SIGNATURE = b'ICC_PROFILE\0'
+
+# Options jpegtran correspondant à chaque valeur du tag EXIF Orientation
+JPEGTRAN_TRANSFORMS = {
+    2: ['-flip', 'horizontal'],
+    3: ['-rotate', '180'],
+    4: ['-flip', 'vertical'],
+    5: ['-transpose'],
+    6: ['-rotate', '90'],
+    7: ['-transverse'],
+    8: ['-rotate', '270'],
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_jpegtran_path():
+    """Chemin de jpegtran (libjpeg) s'il est installé, None sinon"""
+    return shutil.which('jpegtran')
+
+
+def get_passthrough_mode(probe, rendition):
+    """
+    Indique si un rendu peut être produit sans décoder ni réencoder l'image :
+    - 'passthrough' : JPEG déjà à la bonne taille et dans le bon sens, copié
+      tel quel (métadonnées retirées)
+    - 'lossless' : seule l'orientation est à corriger, faite sans perte par jpegtran
+    Retourne None si l'image doit être réencodée
+    """
+    if not probe or 'error' in probe:
+        return None
+    if rendition.get('format', 'JPEG').upper() != 'JPEG' or probe['format'] != 'JPEG':
+        return None
+    # CMYK et autres modes sont convertis en RGB par le réencodage
+    if probe['mode'] not in ('RGB', 'L'):
+        return None
+
+    orientation = probe['orientation']
+    if get_thumbnail_size((probe['width'], probe['height']), tuple(rendition['size']), orientation) is not None:
+        return None
+
+    if orientation in JPEGTRAN_TRANSFORMS:
+        return 'lossless' if get_jpegtran_path() else None
+    return 'passthrough'
+
+
+def strip_jpeg_metadata(image_file, output_path):
+    """
+    Copie un JPEG sans ses métadonnées (EXIF, XMP, IPTC, commentaires, aperçus)
+    Les données de l'image sont recopiées octet par octet, sans décodage
+    """
+    with open_source(image_file) as src, open(output_path, 'wb') as dst:
+        if src.read(2) != b'\xff\xd8':
+            raise ValueError('Fichier JPEG invalide')
+        dst.write(b'\xff\xd8')
+
+        while True:
+            byte = src.read(1)
+            if not byte:
+                raise ValueError('Fichier JPEG tronqué')
+            if byte != b'\xff':
+                raise ValueError('Structure JPEG invalide')
+            marker = src.read(1)
+            # Octets de remplissage 0xFF entre deux segments
+            while marker == b'\xff':
+                marker = src.read(1)
+            if not marker:
+                raise ValueError('Fichier JPEG tronqué')
+
+            marker_code = marker[0]
+            # Marqueurs sans segment (TEM, RSTn)
+            if marker_code == 0x01 or 0xD0 <= marker_code <= 0xD7:
+                dst.write(b'\xff' + marker)
+                continue
+
+            length_bytes = src.read(2)
+            if len(length_bytes) != 2:
+                raise ValueError('Fichier JPEG tronqué')
+            segment = src.read(int.from_bytes(length_bytes, 'big') - 2)
+
+            is_metadata = 0xE1 <= marker_code <= 0xEF or marker_code == 0xFE
+            keep = (
+                not is_metadata
+                or marker_code in KEPT_JPEG_SEGMENTS
+                or (marker_code == 0xE2 and segment.startswith(ICC_PROFILE_SIGNATURE))
+            )
+            if keep:
+                dst.write(b'\xff' + marker + length_bytes + segment)
+
+            # Début des données compressées (SOS) : le reste est recopié tel quel
+            if marker_code == 0xDA:
+                shutil.copyfileobj(src, dst)
+                return
+
+
+def transform_jpeg_lossless(image_file, output_path, orientation):
+    """Applique l'orientation EXIF sans perte avec jpegtran (métadonnées retirées)"""
+    command = [
+        get_jpegtran_path(), '-copy', 'none', '-perfect', '-optimize',
+        *JPEGTRAN_TRANSFORMS[orientation], '-outfile', output_path,
+    ]
+    if isinstance(image_file, bytes):
+        # Contenu lu depuis une archive : transmis sur l'entrée standard
+        subprocess.run(command, input=image_file, check=True, capture_output=True)
+    else:
+        subprocess.run([*command, image_file], check=True, capture_output=True)
+
+
+def copy_passthrough(image_file, output_path, mode, probe):
+    """
+    Produit un rendu sans réencodage (voir get_passthrough_mode)
+    Retourne False si la transformation sans perte est impossible
+    (dimensions non multiples des blocs JPEG, par exemple)
+    """
+    try:
+        if mode == 'lossless':
+            transform_jpeg_lossless(image_file, output_path, probe['orientation'])
+        else:
+            strip_jpeg_metadata(image_file, output_path)
+        return True
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return False
+
+
+def estimate_decode_memory(probe, sizes, draft=True):
+    """
+    Estime la mémoire (octets) nécessaire pour décoder et redimensionner une
+    image, à partir de son en-tête (voir probe_image) : largeur x hauteur x canaux
+    à l'échelle de décodage (voir apply_draft), pour l'image décodée et sa copie
+    de travail
+    """
+    width, height = probe['width'], probe['height']
+    scale = 1
+    if draft and probe['format'] == 'JPEG':
+        requested_sizes = [get_thumbnail_size((width, height), size, probe['orientation']) for size in sizes]
+        if requested_sizes and None not in requested_sizes:
+            requested_width = max(size[0] for size in requested_sizes)
+            requested_height = max(size[1] for size in requested_sizes)
+            for candidate in (8, 4, 2):
+                if -(-width // candidate) >= requested_width and -(-height // candidate) >= requested_height:
+                    scale = candidate
+                    break
+
+    decoded_pixels = -(-width // scale) * -(-height // scale)
+    # Les images sont converties en RGB (3 canaux) ou plus pendant le traitement
+    return decoded_pixels * max(probe['bands'], 3) * 2
+
+
+def get_available_memory():
+    """Retourne la mémoire disponible en octets (None si inconnue)"""
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def get_pool_size(max_workers=0, worker_memory=512 * 1024 * 1024):
+    """
+    Calcule le nombre de processus du pool de conversion
+    Limité par le nombre de coeurs et par la mémoire disponible
+    (max_workers=0 : automatique)
+    """
+    cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    workers = cpu_count
+
+    available_memory = get_available_memory()
+    if available_memory and worker_memory > 0:
+        workers = min(workers, available_memory // worker_memory)
+
+    if max_workers > 0:
+        workers = min(workers, max_workers)
+
+    return max(1, int(workers))
+
+
+def get_partial_path(output_path):
+    """Chemin temporaire (fichier caché) utilisé pendant l'écriture d'une sortie"""
+    output_dir, output_filename = os.path.split(output_path)
+    return os.path.join(output_dir, f'.{output_filename}.part')
+
+
+def is_valid_output(output_path, image_format='JPEG'):
+    """
+    Vérifie qu'une image convertie existe et est lisible (point de reprise)
+    Les sorties étant écrites de façon atomique, un fichier présent est complet
+    """
+    try:
+        if os.path.getsize(output_path) == 0:
+            return False
+        with Image.open(output_path) as img:
+            return img.format == image_format.upper() and img.size[0] > 0 and img.size[1] > 0
+    except Exception:
+        return False
+
+
+def process_image(image_file, targets, draft=True, cache_dir=None, probe=None):
+    """
+    Produit les rendus d'une image en réutilisant le cache de conversion si possible
+    image_file : chemin de l'image ou membre d'archive (ArchiveMember)
+    targets : liste de (rendu, chemin de sortie)
+    probe : en-tête de l'image (voir probe_image) ; s'il est fourni, les rendus
+    qui n'ont pas besoin d'être réencodés sont copiés (voir get_passthrough_mode)
+    Les sorties sont écrites dans des fichiers temporaires puis renommées, afin
+    qu'une conversion interrompue ne laisse jamais de fichier incomplet
+    Retourne le traitement appliqué : 'reencoded' si au moins un rendu a été
+    réencodé, sinon 'cached', 'lossless' ou 'passthrough'
+    """
+    if isinstance(image_file, ArchiveMember):
+        # Membre d'archive décompressé une seule fois, en mémoire
+        image_file = image_file.read()
+
+    partial_targets = [(rendition, get_partial_path(output_path)) for rendition, output_path in targets]
+    # Les sous-dossiers de l'album sont reproduits dans le dossier de sortie
+    for _, output_path in targets:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    try:
+        status = _process_image(image_file, partial_targets, draft, cache_dir, probe)
+        for (_, output_path), (_, partial_path) in zip(targets, partial_targets):
+            os.replace(partial_path, output_path)
+    finally:
+        for _, partial_path in partial_targets:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+    return status
+
+
+def _process_image(image_file, targets, draft, cache_dir, probe):
+    modes = set()
+    remaining = []
+    for rendition, output_path in targets:
+        mode = get_passthrough_mode(probe, rendition)
+        if mode and copy_passthrough(image_file, output_path, mode, probe):
+            modes.add(mode)
+        else:
+            remaining.append((rendition, output_path))
+
+    if remaining:
+        modes.add(_render_targets(image_file, remaining, draft, cache_dir))
+
+    for mode in ('reencoded', 'cached', 'lossless'):
+        if mode in modes:
+            return mode
+    return 'passthrough'
+
+
+def _render_targets(image_file, targets, draft, cache_dir):
+    if not cache_dir:
+        render_image(image_file, targets, draft=draft)
+        return 'reencoded'
+
+    if isinstance(image_file, bytes):
+        source_hash = hashlib.sha256(image_file).hexdigest()
+    else:
+        source_hash = conversion_cache.hash_file(image_file)
+    missing = []
+    for rendition, output_path in targets:
+        key = conversion_cache.get_cache_key(
+            source_hash,
+            size=tuple(rendition['size']),
+            quality=rendition.get('quality', JPEG_QUALITY),
+            format=rendition.get('format', 'JPEG').upper(),
+            draft=draft,
+        )
+        if not conversion_cache.fetch(cache_dir, key, output_path):
+            missing.append((rendition, output_path, key))
+
+    if not missing:
+        return 'cached'
+
+    render_image(image_file, [(rendition, output_path) for rendition, output_path, _ in missing], draft=draft)
+    for _, output_path, key in missing:
+        try:
+            conversion_cache.store(cache_dir, key, output_path)
+        except OSError:
+            # Le cache est une optimisation : une erreur d'écriture ne doit pas faire échouer la conversion
+            pass
+    return 'reencoded'
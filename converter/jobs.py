@@ -0,0 +1,307 @@
+"""
+File d'attente des conversions.
+
+La vue convert ajoute une tâche ConversionJob ; les tâches sont exécutées par
+la commande conversion_worker, en dehors des workers gunicorn, avec un nombre
+limité de conversions simultanées.
+"""
+
+import logging
+import os
+import shutil
+import socket
+import time
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .archives import build_album_archive, remove_album_archive
+from .conversion import (
+    RETRY_DIR_NAME,
+    AlbumDeletedError,
+    ConversionCancelled,
+    ConversionInterrupted,
+    ConversionPaused,
+    ConversionPoolBroken,
+    get_output_dir,
+    reset_album_progress,
+    retry_failed_images,
+    run_album_conversion,
+)
+from .models import Album, ConversionJob
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_JOB_STATUSES = ('queued', 'running')
+
+
+# Distingue ce processus d'un processus précédent de même pid (conteneur redémarré)
+PROCESS_TOKEN = uuid.uuid4().hex[:8]
+
+
+def get_worker_name():
+    """Identifiant du processus worker (hôte:pid:jeton)"""
+    return f"{socket.gethostname()}:{os.getpid()}:{PROCESS_TOKEN}"
+
+
+def is_worker_alive(worker_name):
+    """
+    Indique si le processus worker d'une tâche tourne encore
+    Seuls les workers de cette machine peuvent être vérifiés : pour les autres,
+    seul le signe de vie de la conversion compte
+    """
+    host, _, pid = worker_name.partition(':')
+    pid = pid.partition(':')[0]
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return worker_name == get_worker_name()
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Processus d'un autre utilisateur
+        return True
+    return True
+
+
+def enqueue_conversion(album, failed_only=False):
+    """
+    Ajoute la conversion d'un album à la file d'attente (ou, avec failed_only,
+    un nouvel essai de ses seules images en échec)
+    Retourne la tâche créée, ou la tâche déjà en attente / en cours pour cet album
+    """
+    with transaction.atomic():
+        album = Album.objects.select_for_update().get(pk=album.pk)
+        jobs = album.conversion_jobs.filter(status__in=ACTIVE_JOB_STATUSES)
+        if album.conversion_status not in ('converting', 'cancelling'):
+            # Tâche en cours qui se termine (annulation, conversion en pause) : la nouvelle
+            # tâche attend qu'elle soit finie (voir claim_next_job)
+            jobs = jobs.filter(status='queued')
+        job = jobs.first()
+        if job is not None:
+            return job
+
+        # Mettre le statut à "en cours de conversion" et réinitialiser la progression
+        album.conversion_status = 'converting'
+        album.conversion_progress = 0
+        album.current_file_index = 0
+        album.current_file_name = ''
+        album.conversion_heartbeat = timezone.now()
+        album.save()
+
+        # Le contenu de l'album va changer : l'archive préconstruite n'est plus valable
+        remove_album_archive(album)
+
+        return ConversionJob.objects.create(album=album, failed_only=failed_only)
+
+
+def cancel_conversion(album):
+    """
+    Annule la conversion d'un album
+    Une tâche en file d'attente est annulée immédiatement ; pour une tâche en
+    cours, l'album passe au statut "cancelling" et le worker s'arrête entre
+    deux images (voir conversion.check_album_state)
+    Retourne la tâche (statut "cancelled" si elle a été annulée immédiatement),
+    ou None si aucune conversion n'est active
+    """
+    with transaction.atomic():
+        album = Album.objects.select_for_update().get(pk=album.pk)
+        job = album.conversion_jobs.filter(status__in=ACTIVE_JOB_STATUSES).first()
+        if job is None:
+            return None
+
+        # Mise à jour conditionnelle : la tâche a pu être attribuée à un worker entre-temps
+        cancelled = ConversionJob.objects.filter(pk=job.pk, status='queued').update(
+            status='cancelled',
+            finished_at=timezone.now(),
+            error='Conversion annulée',
+        )
+        if not cancelled:
+            album.conversion_status = 'cancelling'
+            album.save(update_fields=['conversion_status'])
+            return job
+
+        job.status = 'cancelled'
+        if job.failed_only:
+            # Nouvel essai des images en échec : l'album reste converti
+            reset_album_progress(album, 'completed', progress=100)
+        else:
+            reset_album_progress(album, 'pending')
+        return job
+
+
+def claim_next_job(worker_name):
+    """
+    Attribue au worker la plus ancienne tâche en attente
+    Retourne la tâche (avec son album) ou None si la file est vide
+    """
+    candidates = (
+        ConversionJob.objects
+        .filter(status='queued')
+        .exclude(album__conversion_jobs__status='running')
+        .order_by('created_at')
+        .values_list('pk', flat=True)[:10]
+    )
+
+    for job_id in candidates:
+        # Mise à jour conditionnelle : une tâche n'est attribuée qu'à un seul worker
+        claimed = ConversionJob.objects.filter(pk=job_id, status='queued').update(
+            status='running',
+            started_at=timezone.now(),
+            worker=worker_name,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return ConversionJob.objects.select_related('album').get(pk=job_id)
+
+    return None
+
+
+def run_job(job, executor=None, stop_event=None):
+    """
+    Exécute une tâche de conversion et enregistre son résultat et ses durées
+    stop_event (threading.Event) : arrêt du worker ; la conversion s'interrompt
+    entre deux images et la tâche est remise en file d'attente (reprise)
+    Si le pool de processus est cassé, la tâche est remise en file d'attente et
+    ConversionPoolBroken est propagée : l'appelant doit recréer le pool
+    """
+    album = job.album
+    start = time.monotonic()
+    fields = {'status': 'failed', 'error': ''}
+    stats = dict(job.stats)
+
+    album.conversion_heartbeat = timezone.now()
+    album.save(update_fields=['conversion_heartbeat'])
+
+    try:
+        if not os.path.exists(album.old_path):
+            album.conversion_status = 'error'
+            album.save()
+            raise Exception(f'Le dossier source n\'existe pas: {album.old_path}')
+
+        convert = retry_failed_images if job.failed_only else run_album_conversion
+        converted_count, total_files = convert(album, executor=executor, stats=stats, stop_event=stop_event)
+
+        fields['converted_count'] = converted_count
+        fields['total_files'] = total_files
+        if converted_count > 0:
+            fields['status'] = 'completed'
+            archive_start = time.monotonic()
+            try:
+                if build_album_archive(album):
+                    stats['archive_seconds'] = round(time.monotonic() - archive_start, 3)
+            except Exception as e:
+                # L'archive est une optimisation : le téléchargement la générera à la volée
+                logger.warning(f'Erreur lors de la construction de l\'archive de "{album.name}": {str(e)}')
+        else:
+            fields['error'] = 'Aucune image n\'a pu être convertie.'
+    except ConversionInterrupted as e:
+        # Les images déjà converties sont conservées : la conversion reprendra là où elle s'est arrêtée
+        fields['status'] = 'queued'
+        fields['worker'] = ''
+        logger.info(f'{str(e)} ("{album.name}"), remise en file d\'attente')
+        if isinstance(e, ConversionPoolBroken):
+            raise
+    except ConversionPaused as e:
+        # L'album redevient "à convertir" : la fin de l'upload relancera la conversion
+        fields['status'] = 'cancelled'
+        fields['error'] = str(e)
+        logger.info(str(e))
+    except (ConversionCancelled, AlbumDeletedError) as e:
+        fields['status'] = 'cancelled'
+        fields['error'] = str(e)
+        logger.info(str(e))
+    except Exception as e:
+        fields['error'] = str(e)
+        logger.error(f'Erreur lors de la conversion de l\'album "{album.name}": {str(e)}')
+    finally:
+        duration = time.monotonic() - start
+        stats['queue_wait_seconds'] = round((job.started_at - job.created_at).total_seconds(), 3)
+        stats['duration_seconds'] = round(duration, 3)
+        if fields.get('total_files') and duration > 0:
+            stats['images_per_second'] = round(fields['total_files'] / duration, 2)
+
+        fields['stats'] = stats
+        if fields['status'] != 'queued':
+            fields['finished_at'] = timezone.now()
+        # update() plutôt que save() : ne pas recréer la tâche si l'album a été supprimé entre-temps
+        ConversionJob.objects.filter(pk=job.pk).update(**fields)
+
+    logger.info(
+        f'Tâche de conversion {job.pk} ("{album.name}") terminée: {fields["status"]} '
+        f'en {stats["duration_seconds"]} s'
+    )
+    return fields['status']
+
+
+def requeue_stale_conversions(stale_after):
+    """
+    Remet en file d'attente les albums restés "en cours de conversion" sans
+    signe de vie depuis stale_after secondes (worker arrêté ou tué) ; les
+    tâches dont le worker tourne encore ne sont pas reprises
+    La conversion reprend là où elle s'était arrêtée (sorties déjà présentes conservées)
+    Retourne la liste des albums remis en file d'attente
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=stale_after)
+    finish_stale_cancellations(cutoff)
+    stale_albums = Album.objects.filter(conversion_status='converting').filter(
+        Q(conversion_heartbeat__lt=cutoff) | Q(conversion_heartbeat__isnull=True)
+    )
+
+    requeued = []
+    for album in stale_albums:
+        # Une tâche en attente d'un worker n'est pas interrompue
+        if album.conversion_jobs.filter(status='queued').exists():
+            continue
+        # Conversion lente mais toujours en cours (worker vivant)
+        workers = album.conversion_jobs.filter(status='running').values_list('worker', flat=True)
+        if any(is_worker_alive(worker) for worker in workers):
+            continue
+
+        # Mise à jour conditionnelle : un seul processus peut reprendre un album donné
+        updated = Album.objects.filter(
+            pk=album.pk,
+            conversion_status='converting',
+            conversion_heartbeat=album.conversion_heartbeat,
+        ).update(conversion_heartbeat=now)
+        if not updated:
+            continue
+
+        running_jobs = album.conversion_jobs.filter(status='running')
+        if running_jobs.exists():
+            running_jobs.update(status='queued', worker='')
+        else:
+            # Conversion lancée sans tâche (ancienne version) : créer la tâche
+            ConversionJob.objects.create(album=album)
+        requeued.append(album)
+
+    return requeued
+
+
+def finish_stale_cancellations(cutoff):
+    """
+    Termine les annulations dont le worker s'est arrêté avant de les traiter
+    (albums restés "cancelling" sans signe de vie depuis cutoff)
+    """
+    stale_albums = Album.objects.filter(conversion_status='cancelling').filter(
+        Q(conversion_heartbeat__lt=cutoff) | Q(conversion_heartbeat__isnull=True)
+    )
+    for album in stale_albums:
+        running_jobs = album.conversion_jobs.filter(status='running')
+        failed_only = running_jobs.filter(failed_only=True).exists()
+        running_jobs.update(status='cancelled', finished_at=timezone.now(), error='Conversion annulée')
+
+        # Supprimer la sortie partielle, comme le worker l'aurait fait
+        if failed_only:
+            shutil.rmtree(os.path.join(album.old_path, RETRY_DIR_NAME), ignore_errors=True)
+            reset_album_progress(album, 'completed', progress=100)
+        else:
+            shutil.rmtree(get_output_dir(album.old_path), ignore_errors=True)
+            reset_album_progress(album, 'pending')
+        logger.info(f'Annulation de la conversion de "{album.name}" terminée (worker arrêté)')
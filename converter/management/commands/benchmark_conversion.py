@@ -0,0 +1,125 @@
+import math
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image, ImageChops, ImageStat
+
+from converter.imaging import apply_draft, convert_image, get_output_filename
+
+
+def compute_psnr(reference_path, candidate_path):
+    """Calcule le PSNR (dB) entre deux images (inf si identiques)"""
+    with Image.open(reference_path) as reference, Image.open(candidate_path) as candidate:
+        reference = reference.convert('RGB')
+        candidate = candidate.convert('RGB')
+        if candidate.size != reference.size:
+            candidate = candidate.resize(reference.size, Image.LANCZOS)
+
+        diff = ImageChops.difference(reference, candidate)
+        mse = sum(rms ** 2 for rms in ImageStat.Stat(diff).rms) / len(diff.getbands())
+
+    if mse == 0:
+        return math.inf
+    return 20 * math.log10(255 / math.sqrt(mse))
+
+
+class Command(BaseCommand):
+    help = 'Compare la conversion avec et sans décodage JPEG réduit (vitesse et PSNR)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input_dir',
+            help='Dossier contenant des images JPEG de test'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Nombre maximal d\'images à comparer (défaut: 20)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=1,
+            help='Nombre de conversions par image et par méthode (défaut: 1)'
+        )
+
+    def handle(self, *args, **options):
+        input_dir = options['input_dir']
+        repeat = max(1, options['repeat'])
+
+        if not os.path.isdir(input_dir):
+            raise CommandError(f'Le dossier n\'existe pas: {input_dir}')
+
+        image_files = sorted(
+            os.path.join(input_dir, name) for name in os.listdir(input_dir)
+            if name.lower().endswith(('.jpg', '.jpeg'))
+        )[:options['limit']]
+
+        if not image_files:
+            raise CommandError('Aucune image JPEG trouvée dans le dossier')
+
+        temp_dir = tempfile.mkdtemp()
+        total_full = 0
+        total_draft = 0
+        psnr_values = []
+        skipped = []
+
+        try:
+            for image_file in image_files:
+                output_filename = get_output_filename(image_file)
+                full_path = os.path.join(temp_dir, f'full_{output_filename}')
+                draft_path = os.path.join(temp_dir, f'draft_{output_filename}')
+
+                # Une image illisible ou tronquée est ignorée, sans interrompre la mesure
+                try:
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        convert_image(image_file, full_path, draft=False)
+                    full_time = (time.perf_counter() - start) / repeat
+
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        convert_image(image_file, draft_path, draft=True)
+                    draft_time = (time.perf_counter() - start) / repeat
+
+                    with Image.open(image_file) as img:
+                        original_size = img.size
+                        scale = apply_draft(img, (1920, 1080))
+                        decoded_size = img.size
+
+                    psnr = compute_psnr(full_path, draft_path)
+                except Exception as e:
+                    skipped.append(image_file)
+                    self.stdout.write(self.style.WARNING(f'  - {os.path.basename(image_file)}: ignorée ({str(e)})'))
+                    continue
+                psnr_values.append(psnr)
+                total_full += full_time
+                total_draft += draft_time
+
+                self.stdout.write(
+                    f'  - {os.path.basename(image_file)}: {original_size[0]}x{original_size[1]} '
+                    f'-> décodage 1/{scale} {decoded_size[0]}x{decoded_size[1]}, '
+                    f'{full_time * 1000:.0f} ms -> {draft_time * 1000:.0f} ms, PSNR {psnr:.2f} dB'
+                )
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        if not psnr_values:
+            raise CommandError(f'Aucune image n\'a pu être convertie ({len(skipped)} ignorée(s))')
+
+        finite_psnr = [value for value in psnr_values if math.isfinite(value)]
+        mean_psnr = sum(finite_psnr) / len(finite_psnr) if finite_psnr else math.inf
+        speedup = total_full / total_draft if total_draft > 0 else 0
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n=== RÉSULTATS ({len(psnr_values)} image(s), {len(skipped)} ignorée(s)) ===\n'
+                f'Décodage complet: {total_full:.2f} s\n'
+                f'Décodage réduit: {total_draft:.2f} s (x{speedup:.1f})\n'
+                f'PSNR moyen: {mean_psnr:.2f} dB, minimum: {min(psnr_values):.2f} dB'
+            )
+        )
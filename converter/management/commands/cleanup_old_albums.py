@@ -2,8 +2,13 @@ import os
 import shutil
 from datetime import datetime, timedelta
 from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.db.models import Q, Sum
 from django.utils import timezone
-from converter.models import Album
+from converter.archives import remove_album_archive
+from converter.conversion import get_output_dir
+from converter.models import Album, UploadSession
+from converter.views.uploads import remove_session_files
 
 
 class Command(BaseCommand):
@@ -26,11 +31,15 @@ class Command(BaseCommand):
         days = options['days']
         dry_run = options['dry_run']
         
+        self.cleanup_upload_sessions(dry_run)
+        
         # Calculer la date limite (il y a X jours)
         cutoff_date = timezone.now() - timedelta(days=days)
         
         # Trouver tous les albums plus anciens que la date limite
-        old_albums = Album.objects.filter(date__lt=cutoff_date)
+        old_albums = Album.objects.filter(date__lt=cutoff_date).annotate(
+            manifest_size=Sum('images__size', filter=~Q(images__status='error')),
+        )
         
         if not old_albums.exists():
             self.stdout.write(
@@ -47,10 +56,10 @@ class Command(BaseCommand):
         
         for album in old_albums:
             age_days = (timezone.now() - album.date).days
-            album_size = 0
+            # Taille de l'album d'après son inventaire, ou en parcourant le dossier (anciens albums)
+            album_size = album.manifest_size or 0
             
-            # Calculer la taille du dossier
-            if os.path.exists(album.old_path):
+            if not album_size and os.path.exists(album.old_path):
                 try:
                     for dirpath, dirnames, filenames in os.walk(album.old_path):
                         for filename in filenames:
@@ -74,6 +83,7 @@ class Command(BaseCommand):
                     if os.path.exists(album.old_path):
                         shutil.rmtree(album.old_path)
                         self.stdout.write(f'    ✓ Dossier supprimé: {album.old_path}')
+                    remove_album_archive(album)
                     
                     # Supprimer l'enregistrement de la base de données
                     album.delete()
@@ -111,3 +121,28 @@ class Command(BaseCommand):
                 self.stdout.write(
                     self.style.ERROR(f'{error_count} erreur(s) rencontrée(s).')
                 )
+
+    def cleanup_upload_sessions(self, dry_run):
+        """Supprime les uploads en plusieurs morceaux abandonnés (et les morceaux reçus)"""
+        cutoff_date = timezone.now() - timedelta(hours=settings.UPLOAD_SESSION_EXPIRY_HOURS)
+        expired_sessions = UploadSession.objects.filter(created_at__lt=cutoff_date).exclude(status='finalizing')
+        session_count = expired_sessions.count()
+        if not session_count:
+            return
+
+        if dry_run:
+            self.stdout.write(f'{session_count} session(s) d\'upload expirée(s) seraient supprimées.')
+            return
+
+        for session in expired_sessions:
+            remove_session_files(session)
+            album = session.album
+            if album is not None and not album.upload_complete:
+                # Album converti pendant un upload jamais terminé (AUTO_CONVERT),
+                # avec ses images déjà converties (conversion en pause)
+                if os.path.exists(album.old_path):
+                    shutil.rmtree(album.old_path)
+                shutil.rmtree(get_output_dir(album.old_path), ignore_errors=True)
+                album.delete()
+            session.delete()
+        self.stdout.write(f'{session_count} session(s) d\'upload expirée(s) supprimée(s).')
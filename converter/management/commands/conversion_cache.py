@@ -0,0 +1,60 @@
+import shutil
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from converter import conversion_cache
+
+
+class Command(BaseCommand):
+    help = 'Affiche l\'état du cache de conversion et supprime les entrées les moins utilisées'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Supprime les entrées les moins récemment utilisées au-delà de la taille maximale'
+        )
+        parser.add_argument(
+            '--max-size',
+            type=int,
+            default=None,
+            help=f'Taille maximale du cache en MB (défaut: CONVERSION_CACHE_MAX_SIZE_MB={settings.CONVERSION_CACHE_MAX_SIZE_MB})'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Vide entièrement le cache'
+        )
+
+    def handle(self, *args, **options):
+        cache_dir = settings.CONVERSION_CACHE_DIR
+        if not cache_dir:
+            raise CommandError('Le cache de conversion est désactivé (CONVERSION_CACHE_DIR vide).')
+
+        count, total_size = conversion_cache.get_stats(cache_dir)
+        self.stdout.write(
+            f'Cache de conversion: {cache_dir}\n'
+            f'  {count} entrée(s), {total_size / (1024 * 1024):.1f} MB '
+            f'(maximum: {settings.CONVERSION_CACHE_MAX_SIZE_MB} MB)'
+        )
+
+        if options['clear']:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            self.stdout.write(
+                self.style.SUCCESS(f'Cache vidé: {count} entrée(s) supprimée(s).')
+            )
+            return
+
+        if options['prune']:
+            max_size_mb = options['max_size']
+            if max_size_mb is None:
+                max_size_mb = settings.CONVERSION_CACHE_MAX_SIZE_MB
+
+            removed_count, removed_size = conversion_cache.prune(cache_dir, max_size_mb * 1024 * 1024)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'{removed_count} entrée(s) supprimée(s), '
+                    f'{removed_size / (1024 * 1024):.1f} MB libéré(s).'
+                )
+            )
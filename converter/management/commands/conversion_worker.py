@@ -0,0 +1,116 @@
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from converter.conversion import ConversionPoolBroken, get_conversion_executor, get_conversion_pool_size
+from converter.jobs import claim_next_job, get_worker_name, requeue_stale_conversions, run_job
+
+
+class Command(BaseCommand):
+    help = 'Exécute les conversions d\'albums en file d\'attente'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.CONVERSION_WORKER_CONCURRENCY,
+            help=f'Nombre maximal d\'albums convertis simultanément (défaut: {settings.CONVERSION_WORKER_CONCURRENCY})'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Intervalle entre deux consultations de la file d\'attente, en secondes (défaut: 2)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Traite les tâches en attente puis s\'arrête'
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        poll_interval = options['poll_interval']
+        worker_name = get_worker_name()
+
+        stop_event = threading.Event()
+
+        def request_stop(signum, frame):
+            self.stdout.write('Arrêt demandé, interruption des conversions en cours (reprise au redémarrage)...')
+            stop_event.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        # Un seul pool de processus partagé par toutes les conversions du worker
+        # (recréé si l'un de ses processus s'arrête brutalement, voir replace_broken_executor)
+        pool_size = get_conversion_pool_size()
+        self.pool_size = pool_size
+        self.executor = get_conversion_executor(pool_size)
+        self.executor_lock = threading.Lock()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Worker de conversion {worker_name} démarré '
+                f'({concurrency} album(s) simultané(s), {pool_size} processus)'
+            )
+        )
+
+        last_recovery = None
+        running = set()
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='conversion') as threads:
+                while not stop_event.is_set():
+                    # Reprise des conversions interrompues, au démarrage puis périodiquement
+                    now = time.monotonic()
+                    if last_recovery is None or now - last_recovery >= settings.CONVERSION_STALE_AFTER / 2:
+                        for album in requeue_stale_conversions(settings.CONVERSION_STALE_AFTER):
+                            self.stdout.write(f'Conversion interrompue remise en file d\'attente: "{album.name}"')
+                        last_recovery = now
+
+                    running = {future for future in running if not future.done()}
+                    while len(running) < concurrency:
+                        job = claim_next_job(worker_name)
+                        if job is None:
+                            break
+                        self.stdout.write(f'Conversion de l\'album "{job.album.name}" (tâche {job.pk})')
+                        running.add(threads.submit(self.process_job, job, stop_event))
+
+                    if options['once'] and not running:
+                        break
+
+                    stop_event.wait(poll_interval)
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+        self.stdout.write(self.style.SUCCESS('Worker de conversion arrêté.'))
+
+    def process_job(self, job, stop_event):
+        executor = self.executor
+        try:
+            status = run_job(job, executor, stop_event)
+            self.stdout.write(f'  Tâche {job.pk} ("{job.album.name}"): {status}')
+        except ConversionPoolBroken:
+            # La tâche a été remise en file d'attente : elle reprendra avec le nouveau pool
+            self.stdout.write(f'  Tâche {job.pk} ("{job.album.name}"): pool de conversion arrêté, remise en file d\'attente')
+            self.replace_broken_executor(executor)
+        finally:
+            # Chaque thread utilise sa propre connexion à la base de données
+            connection.close()
+
+    def replace_broken_executor(self, broken_executor):
+        """
+        Remplace le pool de processus cassé
+        Toutes les conversions en cours échouent en même temps : le pool n'est
+        recréé qu'une fois
+        """
+        with self.executor_lock:
+            if self.executor is not broken_executor:
+                return
+            self.executor = get_conversion_executor(self.pool_size)
+        broken_executor.shutdown(wait=False, cancel_futures=True)
+        self.stdout.write(self.style.WARNING('Pool de conversion recréé après l\'arrêt brutal d\'un processus'))
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from converter.jobs import requeue_stale_conversions
+
+
+class Command(BaseCommand):
+    help = 'Remet en file d\'attente les conversions interrompues (albums bloqués "en cours de conversion")'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=settings.CONVERSION_STALE_AFTER,
+            help=f'Délai sans progression (secondes) après lequel une conversion est considérée interrompue '
+                 f'(défaut: {settings.CONVERSION_STALE_AFTER})'
+        )
+
+    def handle(self, *args, **options):
+        albums = requeue_stale_conversions(options['stale_after'])
+
+        if not albums:
+            self.stdout.write(self.style.SUCCESS('Aucune conversion interrompue.'))
+            return
+
+        self.stdout.write(f'{len(albums)} conversion(s) interrompue(s) remise(s) en file d\'attente:')
+        for album in albums:
+            self.stdout.write(f'  - "{album.name}" ({album.current_file_index}/{album.file_count} images)')
@@ -0,0 +1,171 @@
+"""
+Inventaire des fichiers des albums (modèle AlbumImage).
+
+L'inventaire est enregistré à l'upload (nom, taille, dimensions, empreinte)
+puis remplacé à la fin de la conversion par les images converties. Les
+téléchargements, la construction des archives et le nettoyage l'utilisent
+au lieu de parcourir le dossier de l'album ; les albums sans inventaire
+(créés avant son introduction) sont toujours parcourus.
+"""
+
+import os
+
+from django.db import transaction
+
+from .imaging import SOURCE_ARCHIVE_NAME, ArchiveMember
+from .models import AlbumImage
+
+# Dossier (caché) de l'album où sont conservées les images sources en échec,
+# pour un nouvel essai (voir conversion.retry_failed_images)
+FAILED_DIR_NAME = '.failed'
+
+
+def get_relative_path(image_file, album_dir):
+    """Chemin d'une image relatif au dossier de l'album (membre d'archive compris)"""
+    if isinstance(image_file, ArchiveMember):
+        return f"{SOURCE_ARCHIVE_NAME}/{image_file.path}"
+    return os.path.relpath(image_file, album_dir).replace(os.sep, '/')
+
+
+def get_failed_path(source_path):
+    """Chemin relatif où une image source en échec est conservée dans l'album"""
+    archive_prefix = f"{SOURCE_ARCHIVE_NAME}/"
+    if source_path.startswith(archive_prefix):
+        source_path = source_path[len(archive_prefix):]
+    return f"{FAILED_DIR_NAME}/{source_path}"
+
+
+def replace_album_images(album, records):
+    """
+    Enregistre des fichiers dans l'inventaire d'un album en remplaçant ceux de
+    même chemin (fichier uploadé à nouveau)
+    Suppression puis insertion dans une transaction : fonctionne avec toutes
+    les bases (bulk_create(update_conflicts=True) n'est pas disponible avec MySQL)
+    """
+    with transaction.atomic():
+        album.images.filter(path__in=list(records)).delete()
+        AlbumImage.objects.bulk_create(records.values(), batch_size=500)
+
+
+def add_album_images(album, images):
+    """
+    Ajoute des fichiers à l'inventaire d'un album
+    images : liste de dicts (path, size, et facultativement width, height, sha256)
+    """
+    records = {
+        image['path']: AlbumImage(
+            album=album,
+            path=image['path'],
+            size=image['size'],
+            width=image.get('width'),
+            height=image.get('height'),
+            sha256=image.get('sha256') or '',
+        )
+        for image in images
+    }
+    replace_album_images(album, records)
+
+
+def record_conversion(album, results):
+    """
+    Remplace l'inventaire d'un album par le résultat de sa conversion
+    results : liste de dicts (source_path, status, et pour les images
+    converties outputs : [(chemin relatif, taille, (largeur, hauteur))])
+    """
+    sources = {image.path: image for image in album.images.all()}
+    # Indexé par chemin : deux sources de même nom (photo.png, photo.jpg) donnent la même image convertie
+    records = {}
+    for result in results:
+        source = sources.get(result['source_path'])
+        if result['status'] == 'error':
+            # L'image source reste inventoriée, en erreur (conservée dans FAILED_DIR_NAME)
+            failed_path = get_failed_path(result['source_path'])
+            records[failed_path] = AlbumImage(
+                album=album,
+                path=failed_path,
+                source_path=result['source_path'],
+                size=source.size if source else 0,
+                width=source.width if source else None,
+                height=source.height if source else None,
+                sha256=source.sha256 if source else '',
+                status='error',
+                error_type=result['error_type'],
+                error_message=result['error'],
+            )
+            continue
+        for output_path, size, dimensions in result['outputs']:
+            width, height = dimensions or (None, None)
+            records[output_path] = AlbumImage(
+                album=album,
+                path=output_path,
+                source_path=result['source_path'],
+                size=size,
+                width=width,
+                height=height,
+                sha256=source.sha256 if source else '',
+                status='converted',
+            )
+
+    with transaction.atomic():
+        album.images.all().delete()
+        AlbumImage.objects.bulk_create(records.values(), batch_size=500)
+
+
+def record_retry(album, results):
+    """
+    Met à jour l'inventaire d'un album après un nouvel essai des images en échec
+    results : résultats de la conversion du dossier FAILED_DIR_NAME (chemins relatifs à ce dossier)
+    """
+    failed_images = {image.path: image for image in album.images.filter(status='error')}
+    records = {}
+    with transaction.atomic():
+        for result in results:
+            image = failed_images.get(f"{FAILED_DIR_NAME}/{result['source_path']}")
+            if result['status'] == 'error':
+                if image is not None:
+                    image.error_type = result['error_type']
+                    image.error_message = result['error']
+                    image.save(update_fields=['error_type', 'error_message'])
+                continue
+
+            for output_path, size, dimensions in result['outputs']:
+                width, height = dimensions or (None, None)
+                records[output_path] = AlbumImage(
+                    album=album,
+                    path=output_path,
+                    source_path=image.source_path if image else result['source_path'],
+                    size=size,
+                    width=width,
+                    height=height,
+                    sha256=image.sha256 if image else '',
+                    status='converted',
+                )
+            if image is not None:
+                image.delete()
+
+        replace_album_images(album, records)
+
+
+def get_album_files(album):
+    """
+    Fichiers d'un album d'après son inventaire : [(chemin, nom dans l'archive)]
+    Les images en erreur ne sont pas incluses ; les images d'une archive
+    source (ARCHIVE_INGEST_MODE=direct) sont représentées par l'archive
+    Retourne None si l'album n'a pas d'inventaire
+    """
+    paths = list(album.images.exclude(status='error').values_list('path', flat=True))
+    if not paths:
+        return None
+
+    files = []
+    archive_prefix = f"{SOURCE_ARCHIVE_NAME}/"
+    has_source_archive = False
+    for path in paths:
+        if path.startswith(archive_prefix):
+            has_source_archive = True
+            continue
+        files.append((os.path.join(album.old_path, path), path))
+    if has_source_archive:
+        files.append((os.path.join(album.old_path, SOURCE_ARCHIVE_NAME), SOURCE_ARCHIVE_NAME))
+    return sorted(files, key=lambda item: item[1])
+
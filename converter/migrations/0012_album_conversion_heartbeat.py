@@ -0,0 +1,21 @@
+# Generated by Django 5.0 on 2026-10-17 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "converter",
+            "0011_album_conversion_progress_album_current_file_index_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="album",
+            name="conversion_heartbeat",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
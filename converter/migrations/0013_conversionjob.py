@@ -0,0 +1,61 @@
+# Generated by Django 5.0 on 2026-10-17 12:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("converter", "0012_album_conversion_heartbeat"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ConversionJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "En file d'attente"),
+                            ("running", "En cours"),
+                            ("completed", "Terminée"),
+                            ("failed", "Échouée"),
+                        ],
+                        default="queued",
+                        max_length=20,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("worker", models.CharField(blank=True, max_length=255)),
+                ("attempts", models.IntegerField(default=0)),
+                ("converted_count", models.IntegerField(default=0)),
+                ("total_files", models.IntegerField(default=0)),
+                ("error", models.TextField(blank=True)),
+                ("stats", models.JSONField(blank=True, default=dict)),
+                (
+                    "album",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="conversion_jobs",
+                        to="converter.album",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["created_at"],
+            },
+        ),
+    ]
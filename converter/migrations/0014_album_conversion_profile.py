@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-17 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("converter", "0013_conversionjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="album",
+            name="conversion_profile",
+            field=models.CharField(default="default", max_length=50),
+        ),
+    ]
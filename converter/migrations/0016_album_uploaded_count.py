@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-17 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("converter", "0015_uploadsession"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="album",
+            name="upload_complete",
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name="album",
+            name="uploaded_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="uploadfile",
+            name="placed",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0 on 2026-10-17 12:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("converter", "0016_album_uploaded_count"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="album",
+            index=models.Index(fields=["date", "id"], name="album_date_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="album",
+            index=models.Index(
+                fields=["conversion_status", "date", "id"],
+                name="album_status_date_id_idx",
+            ),
+        ),
+    ]
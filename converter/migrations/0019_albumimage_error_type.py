@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-17 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("converter", "0018_albumimage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="albumimage",
+            name="error_message",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="albumimage",
+            name="error_type",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="conversionjob",
+            name="failed_only",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0 on 2026-10-17 12:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("converter", "0019_albumimage_error_type"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="album",
+            name="conversion_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "En attente"),
+                    ("converting", "En cours de conversion"),
+                    ("cancelling", "Annulation en cours"),
+                    ("completed", "Converti"),
+                    ("error", "Erreur"),
+                ],
+                default="pending",
+                max_length=20,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="conversionjob",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("queued", "En file d'attente"),
+                    ("running", "En cours"),
+                    ("completed", "Terminée"),
+                    ("failed", "Échouée"),
+                    ("cancelled", "Annulée"),
+                ],
+                default="queued",
+                max_length=20,
+            ),
+        ),
+    ]
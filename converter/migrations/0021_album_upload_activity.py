@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-17 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("converter", "0020_cancel_conversion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="album",
+            name="upload_activity",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -5,6 +7,7 @@ class Album(models.Model):
     CONVERSION_STATUS_CHOICES = [
         ('pending', 'En attente'),
         ('converting', 'En cours de conversion'),
+        ('cancelling', 'Annulation en cours'),
         ('completed', 'Converti'),
         ('error', 'Erreur'),
     ]
@@ -16,18 +19,141 @@ class Album(models.Model):
     file_count = models.IntegerField(default=0)
     conversion_date = models.DateTimeField(null=True, blank=True)
     conversion_status = models.CharField(max_length=20, choices=CONVERSION_STATUS_CHOICES, default='pending')
+    conversion_profile = models.CharField(max_length=50, default='default')  # Clé de settings.CONVERSION_PROFILES
     
     # Champs pour le suivi de progression
     conversion_progress = models.IntegerField(default=0)  # Pourcentage de progression (0-100)
     current_file_index = models.IntegerField(default=0)  # Index du fichier en cours
     current_file_name = models.CharField(max_length=255, blank=True)  # Nom du fichier en cours
+    conversion_heartbeat = models.DateTimeField(null=True, blank=True)  # Dernier signe de vie de la conversion
+
+    # Conversion pendant l'upload (AUTO_CONVERT) : fichiers reçus, et fin de l'upload
+    uploaded_count = models.IntegerField(default=0)
+    upload_complete = models.BooleanField(default=True)
+    upload_activity = models.DateTimeField(null=True, blank=True)  # Dernier morceau reçu (voir AUTO_CONVERT_IDLE_TIMEOUT)
+
+    class Meta:
+        indexes = [
+            # Liste des albums paginée par (date, id), avec ou sans filtre de statut
+            models.Index(fields=['date', 'id'], name='album_date_id_idx'),
+            models.Index(fields=['conversion_status', 'date', 'id'], name='album_status_date_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+class AlbumImage(models.Model):
+    """
+    Fichier image d'un album (inventaire) : enregistré à l'upload, remplacé
+    par les images converties à la fin de la conversion
+    Les tailles d'album, téléchargements et nettoyages lisent cet inventaire
+    plutôt que de parcourir le dossier
+    """
+    STATUS_CHOICES = [
+        ('pending', 'À convertir'),
+        ('converted', 'Convertie'),
+        ('error', 'Erreur'),
+    ]
+
+    album = models.ForeignKey(Album, on_delete=models.CASCADE, related_name='images')
+    path = models.CharField(max_length=500)  # Chemin relatif au dossier de l'album
+    source_path = models.CharField(max_length=500, blank=True)  # Image source d'une image convertie
+    size = models.BigIntegerField(default=0)  # Taille en octets
+    width = models.IntegerField(null=True, blank=True)
+    height = models.IntegerField(null=True, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True)  # Empreinte du fichier uploadé, si connue
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Échec de conversion : classe de l'exception et message
+    error_type = models.CharField(max_length=100, blank=True)
+    error_message = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['path']
+        unique_together = [('album', 'path')]
+
+    def __str__(self):
+        return f"{self.album.name}/{self.path}"
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     approved = models.BooleanField(default=False)
     
     def __str__(self):
-        return f"{self.user.username} - {'Approuvé' if self.approved else 'En attente'}"
\ No newline at end of file
+        return f"{self.user.username} - {'Approuvé' if self.approved else 'En attente'}"
+
+class ConversionJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'En file d\'attente'),
+        ('running', 'En cours'),
+        ('completed', 'Terminée'),
+        ('failed', 'Échouée'),
+        ('cancelled', 'Annulée'),
+    ]
+
+    album = models.ForeignKey(Album, on_delete=models.CASCADE, related_name='conversion_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=255, blank=True)  # hôte:pid:jeton du worker qui traite la tâche
+    attempts = models.IntegerField(default=0)
+    failed_only = models.BooleanField(default=False)  # Nouvel essai des seules images en échec
+
+    # Résultat de la conversion
+    converted_count = models.IntegerField(default=0)
+    total_files = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    stats = models.JSONField(default=dict, blank=True)  # Durées et compteurs de la conversion
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.album.name} - {self.get_status_display()}"
+
+class UploadSession(models.Model):
+    """Upload d'un album en plusieurs morceaux (reprenable, voir views/uploads.py)"""
+    STATUS_CHOICES = [
+        ('open', 'En cours'),
+        ('finalizing', 'Finalisation'),
+        ('finalized', 'Terminé'),
+    ]
+
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    album_name = models.CharField(max_length=255)
+    conversion_profile = models.CharField(max_length=50, default='default')
+    chunk_size = models.IntegerField()  # Taille des morceaux en octets (le dernier peut être plus petit)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    created_at = models.DateTimeField(auto_now_add=True)
+    album = models.ForeignKey(Album, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_sessions')
+
+    def __str__(self):
+        return f"{self.album_name} - {self.get_status_display()}"
+
+class UploadFile(models.Model):
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='files')
+    index = models.IntegerField()  # Position du fichier dans la session
+    name = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    placed = models.BooleanField(default=False)  # Fichier complet déjà placé dans l'album (AUTO_CONVERT)
+
+    class Meta:
+        ordering = ['index']
+        unique_together = [('session', 'index')]
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.size // self.session.chunk_size))
+
+    def __str__(self):
+        return self.name
+
+class UploadChunk(models.Model):
+    upload_file = models.ForeignKey(UploadFile, on_delete=models.CASCADE, related_name='chunks')
+    number = models.IntegerField()
+    size = models.IntegerField()
+    checksum = models.CharField(max_length=64, blank=True)  # SHA-256 du morceau
+
+    class Meta:
+        unique_together = [('upload_file', 'number')]
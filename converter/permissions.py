@@ -0,0 +1,43 @@
+"""
+Approbation des utilisateurs.
+
+L'état d'approbation est gardé dans le cache Django (partagé entre les
+workers) : les vues protégées ne font plus de requête sur UserProfile. Le
+cache est invalidé à chaque modification d'un profil (signaux, actions de
+l'administration) ; la durée de vie des entrées n'est qu'une sécurité.
+"""
+
+from django.core.cache import cache
+
+from .models import UserProfile
+
+# Durée de vie de l'état d'approbation en cache (secondes)
+APPROVAL_CACHE_TIMEOUT = 300
+
+# États d'approbation d'un utilisateur
+APPROVED = 'approved'
+PENDING = 'pending'
+MISSING_PROFILE = 'missing'
+
+
+def get_approval_cache_key(user_id):
+    return f'user_approval:{user_id}'
+
+
+def get_approval_status(user):
+    """État d'approbation d'un utilisateur connecté : APPROVED, PENDING ou MISSING_PROFILE"""
+    cache_key = get_approval_cache_key(user.pk)
+    status = cache.get(cache_key)
+    if status is None:
+        approved = UserProfile.objects.filter(user=user).values_list('approved', flat=True).first()
+        if approved is None:
+            status = MISSING_PROFILE
+        else:
+            status = APPROVED if approved else PENDING
+        cache.set(cache_key, status, APPROVAL_CACHE_TIMEOUT)
+    return status
+
+
+def clear_approval_cache(user_ids):
+    """Invalide l'état d'approbation en cache des utilisateurs donnés"""
+    cache.delete_many([get_approval_cache_key(user_id) for user_id in user_ids])
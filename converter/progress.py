@@ -0,0 +1,202 @@
+"""
+Suivi de la progression des conversions.
+
+La progression "en direct" est publiée dans le cache Django (partagé entre
+les workers gunicorn : fichiers ou Redis selon CACHES), au plus une fois
+toutes les CONVERSION_PROGRESS_INTERVAL secondes. La base de données n'est
+mise à jour qu'aux paliers (tous les CONVERSION_PROGRESS_DB_STEP %) ou au
+moins toutes les CONVERSION_PROGRESS_DB_INTERVAL secondes, ce qui sert aussi
+de signe de vie pour la reprise des conversions interrompues.
+"""
+
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Album, ConversionJob
+
+
+# Durée de vie des entrées de progression dans le cache
+PROGRESS_CACHE_TIMEOUT = 60 * 60
+
+
+def get_progress_cache_key(album_id):
+    return f'conversion_progress:{album_id}'
+
+
+def get_live_progress(album_id):
+    """Retourne la progression en direct d'un album (dict) ou None"""
+    return cache.get(get_progress_cache_key(album_id))
+
+
+def clear_live_progress(album_id):
+    cache.delete(get_progress_cache_key(album_id))
+
+
+# Champs de l'album lus pour l'affichage de la progression
+PROGRESS_FIELDS = (
+    'name', 'file_count', 'conversion_date', 'conversion_status', 'conversion_progress',
+    'current_file_index', 'current_file_name', 'uploaded_count', 'upload_complete',
+)
+
+
+def get_progress_data(album, live_progress=None, queued=False):
+    """
+    Progression d'un album telle que renvoyée aux pages (dict sérialisable en JSON)
+    live_progress : progression en direct (cache), queued : tâche en file d'attente
+    """
+    total_files = album.file_count
+    current_file_index = album.current_file_index
+    current_file_name = album.current_file_name
+    progress = album.conversion_progress
+
+    # Pendant la conversion, la progression à jour est dans le cache (la base n'a que les paliers)
+    if album.conversion_status == 'converting' and live_progress:
+        progress = live_progress['progress']
+        current_file_index = live_progress['current_file_index']
+        current_file_name = live_progress['current_file_name']
+        # Nombre d'images de l'inventaire (hors fichiers non convertibles)
+        total_files = live_progress['total_files']
+
+    data = {
+        'album_id': album.id,
+        'album_name': album.name,
+        'status': album.conversion_status,
+        'progress': progress,
+        'current_file_index': current_file_index,
+        'current_file_name': current_file_name,
+        'total_files': total_files,
+        # Upload et conversion suivis séparément (AUTO_CONVERT)
+        'uploaded_count': album.uploaded_count if not album.upload_complete else album.file_count,
+        'converted_count': current_file_index,
+        'upload_complete': album.upload_complete,
+    }
+
+    # Ajouter des informations supplémentaires selon le statut
+    if album.conversion_status == 'completed':
+        data['completion_date'] = album.conversion_date.strftime('%d/%m/%Y %H:%M:%S') if album.conversion_date else None
+        data['message'] = f'Conversion terminée ! {current_file_index}/{album.file_count} images traitées.'
+    elif album.conversion_status == 'converting' and queued:
+        data['message'] = 'En file d\'attente de conversion'
+    elif album.conversion_status == 'converting' and not album.upload_complete:
+        data['message'] = f'Upload en cours ({album.uploaded_count} fichier(s) reçu(s))... {current_file_index}/{total_files} images converties'
+    elif album.conversion_status == 'converting':
+        data['message'] = f'Conversion en cours... {current_file_index}/{total_files} images'
+        if current_file_name:
+            data['current_message'] = f'Traitement de: {current_file_name}'
+    elif album.conversion_status == 'cancelling':
+        data['message'] = 'Annulation en cours...'
+    elif album.conversion_status == 'error':
+        data['message'] = 'Erreur lors de la conversion'
+        data['error'] = True
+    else:  # pending
+        data['message'] = 'En attente de conversion'
+
+    return data
+
+
+def get_progress_version(albums):
+    """Empreinte de la progression d'un ensemble d'albums (version, ETag)"""
+    content = json.dumps(albums, sort_keys=True, default=str)
+    return hashlib.sha1(content.encode()).hexdigest()[:16]
+
+
+def get_albums_progress(album_ids):
+    """
+    Progression de plusieurs albums : {id: données}
+    Une requête pour les albums, une pour les tâches en file d'attente et une
+    lecture groupée du cache, quel que soit le nombre d'albums
+    """
+    albums = list(Album.objects.filter(pk__in=album_ids).only(*PROGRESS_FIELDS))
+    converting_ids = [album.id for album in albums if album.conversion_status == 'converting']
+
+    live_progress = {}
+    queued_ids = set()
+    if converting_ids:
+        live_progress = cache.get_many([get_progress_cache_key(album_id) for album_id in converting_ids])
+        queued_ids = set(
+            ConversionJob.objects
+            .filter(album_id__in=converting_ids, status='queued')
+            .values_list('album_id', flat=True)
+        )
+
+    return {
+        album.id: get_progress_data(album, live_progress.get(get_progress_cache_key(album.id)), album.id in queued_ids)
+        for album in albums
+    }
+
+
+class ProgressReporter:
+    """Regroupe les mises à jour de progression d'une conversion"""
+
+    def __init__(self, album, total_files):
+        self.album = album
+        self.total_files = total_files
+        self.processed_count = 0
+        self.current_file_name = ''
+        self.db_writes = 0
+        self._last_cache_write = None
+        self._last_db_write = None
+        self._last_db_progress = None
+
+    @property
+    def progress(self):
+        if not self.total_files:
+            return 0
+        return (self.processed_count * 100) // self.total_files
+
+    def update(self, processed_count, current_file_name='', force=False):
+        """Enregistre l'avancement ; les écritures sont espacées dans le temps"""
+        self.processed_count = processed_count
+        self.current_file_name = current_file_name
+
+        if self.album is None:
+            return
+
+        now = time.monotonic()
+        if force or self._last_cache_write is None or now - self._last_cache_write >= settings.CONVERSION_PROGRESS_INTERVAL:
+            self._write_cache()
+            self._last_cache_write = now
+
+        if force or self._is_db_milestone(now):
+            self._write_db()
+            self._last_db_write = now
+            self._last_db_progress = self.progress
+
+    def finish(self):
+        """Écrit l'état final (cache et base de données)"""
+        self.update(self.processed_count, self.current_file_name, force=True)
+
+    def _is_db_milestone(self, now):
+        if self._last_db_write is None:
+            return True
+        if now - self._last_db_write >= settings.CONVERSION_PROGRESS_DB_INTERVAL:
+            return True
+        step = settings.CONVERSION_PROGRESS_DB_STEP
+        return self.progress // step > self._last_db_progress // step
+
+    def _write_cache(self):
+        cache.set(get_progress_cache_key(self.album.id), {
+            'progress': self.progress,
+            'current_file_index': self.processed_count,
+            'current_file_name': self.current_file_name,
+            'total_files': self.total_files,
+        }, PROGRESS_CACHE_TIMEOUT)
+
+    def _write_db(self):
+        self.album.conversion_progress = self.progress
+        self.album.current_file_index = self.processed_count
+        self.album.current_file_name = self.current_file_name[:255]
+        self.album.conversion_heartbeat = timezone.now()
+        # update() : un album supprimé pendant sa conversion est détecté par conversion.check_album_state
+        Album.objects.filter(pk=self.album.pk).update(
+            conversion_progress=self.album.conversion_progress,
+            current_file_index=self.album.current_file_index,
+            current_file_name=self.album.current_file_name,
+            conversion_heartbeat=self.album.conversion_heartbeat,
+        )
+        self.db_writes += 1
@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 from .models import UserProfile
+from .permissions import clear_approval_cache
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -11,6 +12,7 @@ def create_user_profile(sender, instance, created, **kwargs):
     """
     if created:
         UserProfile.objects.get_or_create(user=instance)
+    clear_approval_cache([instance.pk])
 
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
@@ -20,3 +22,12 @@ def save_user_profile(sender, instance, **kwargs):
     """
     if hasattr(instance, 'userprofile'):
         instance.userprofile.save()
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def clear_user_approval(sender, instance, **kwargs):
+    """
+    Signal pour invalider l'état d'approbation en cache
+    quand le UserProfile est modifié ou supprimé
+    """
+    clear_approval_cache([instance.user_id])
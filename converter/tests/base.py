@@ -0,0 +1,50 @@
+"""Outils communs aux tests du convertisseur"""
+
+import io
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from ..models import Album
+
+
+def make_jpeg(width=64, height=48, color='red', **save_options):
+    """Contenu d'un JPEG de test"""
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), color).save(buffer, 'JPEG', **save_options)
+    return buffer.getvalue()
+
+
+class MediaTestCase(TestCase):
+    """Albums et uploads dans un dossier temporaire, cache en mémoire"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            FILE_UPLOAD_TEMP_DIR=os.path.join(self.media_root, 'albums', '.incoming'),
+            CONVERSION_CACHE_DIR='',
+            AUTO_CONVERT=False,
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+    def login(self, username='photographe'):
+        user = User.objects.create_user(username, password='secret')
+        user.userprofile.approved = True
+        user.userprofile.save()
+        self.client.force_login(user)
+        return user
+
+    def create_album(self, name='vacances', **fields):
+        album_path = os.path.join(self.media_root, 'albums', name)
+        os.makedirs(album_path, exist_ok=True)
+        return Album.objects.create(name=name, old_path=album_path, **fields)
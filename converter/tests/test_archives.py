@@ -0,0 +1,88 @@
+import io
+import os
+import warnings
+import zipfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+
+from ..conversion import get_conversion_executor, run_album_conversion
+from ..imaging import SOURCE_ARCHIVE_NAME, get_safe_member_path, list_archive_images
+from ..views.converter import save_uploaded_files
+from .base import MediaTestCase, make_jpeg
+
+
+def make_zip(names):
+    """Archive ZIP de test : un JPEG distinct par membre"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_file, warnings.catch_warnings():
+        # Membres en double volontaires
+        warnings.simplefilter('ignore', UserWarning)
+        for index, name in enumerate(names):
+            zip_file.writestr(name, make_jpeg(width=40 + index))
+    return buffer.getvalue()
+
+
+# Membres qui écriraient hors de l'album s'ils étaient utilisés tels quels
+UNSAFE_NAMES = ['../../escaped.jpg', '/absolu.jpg', 'C:/lecteur.jpg', 'dossier\\antislash.jpg', 'sub/../../remonte.jpg']
+
+
+class SafeMemberPathTests(SimpleTestCase):
+    def test_normalises_safe_paths(self):
+        self.assertEqual(get_safe_member_path('photo.jpg'), 'photo.jpg')
+        self.assertEqual(get_safe_member_path('sub//./photo.jpg'), 'sub/photo.jpg')
+
+    def test_rejects_unsafe_paths(self):
+        for name in UNSAFE_NAMES + ['.cache/photo.jpg', '']:
+            with self.subTest(name=name):
+                self.assertIsNone(get_safe_member_path(name))
+
+
+class DirectIngestTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.album = self.create_album()
+        self.archive_path = os.path.join(self.album.old_path, SOURCE_ARCHIVE_NAME)
+
+    def write_archive(self, names):
+        with open(self.archive_path, 'wb') as f:
+            f.write(make_zip(names))
+
+    def test_members_keyed_by_full_path(self):
+        self.write_archive(['sub/a.jpg', 'other/a.jpg', 'sub/a.jpg', 'notes.txt'] + UNSAFE_NAMES)
+
+        members = list_archive_images(self.archive_path)
+
+        # Le dernier membre d'un même chemin l'emporte, les chemins dangereux sont ignorés
+        self.assertEqual([member.path for member in members], ['other/a.jpg', 'sub/a.jpg'])
+        self.assertEqual(members[1].size, len(make_jpeg(width=42)))
+
+    @override_settings(ARCHIVE_INGEST_MODE='direct')
+    def test_upload_keeps_archive(self):
+        images = []
+        archive = SimpleUploadedFile('photos.zip', make_zip(['sub/a.jpg', 'other/a.jpg', '../../escaped.jpg']))
+
+        file_count = save_uploaded_files(self.album.name, compressed_file=archive, images=images)
+
+        self.assertEqual(file_count, 2)
+        self.assertEqual(
+            sorted(image['path'] for image in images),
+            [f'{SOURCE_ARCHIVE_NAME}/other/a.jpg', f'{SOURCE_ARCHIVE_NAME}/sub/a.jpg'],
+        )
+        self.assertTrue(os.path.exists(self.archive_path))
+
+    def test_conversion_stays_in_album(self):
+        self.write_archive(['sub/a.jpg', 'other/a.jpg'] + UNSAFE_NAMES)
+        executor = get_conversion_executor(1)
+        self.addCleanup(executor.shutdown)
+
+        converted_count, total_files = run_album_conversion(self.album, executor=executor)
+
+        self.assertEqual((converted_count, total_files), (2, 2))
+        # Les deux images de même nom sont converties, chacune dans son sous-dossier
+        self.assertTrue(os.path.exists(os.path.join(self.album.old_path, 'sub', 'a.jpg')))
+        self.assertTrue(os.path.exists(os.path.join(self.album.old_path, 'other', 'a.jpg')))
+        # Rien n'est écrit hors de l'album
+        albums_dir = os.path.dirname(self.album.old_path)
+        self.assertEqual(sorted(os.listdir(albums_dir)), [self.album.name])
+        self.assertEqual(sorted(os.listdir(self.media_root)), ['albums'])
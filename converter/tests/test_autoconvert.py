@@ -0,0 +1,101 @@
+import json
+import os
+from datetime import timedelta
+
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..conversion import ConversionPaused, get_conversion_executor, get_output_dir, get_upload_idle_seconds, pause_conversion, run_album_conversion
+from ..jobs import claim_next_job, enqueue_conversion, run_job
+from ..models import Album, UploadChunk, UploadFile, UploadSession
+from .base import MediaTestCase, make_jpeg
+
+
+@override_settings(AUTO_CONVERT_IDLE_TIMEOUT=0)
+class IdleUploadTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.login()
+        self.album = self.create_album(upload_complete=False, uploaded_count=1, conversion_profile='web')
+        self.add_photo('a.jpg')
+        self.executor = get_conversion_executor(1)
+        self.addCleanup(self.executor.shutdown)
+
+    def add_photo(self, name):
+        with open(os.path.join(self.album.old_path, name), 'wb') as f:
+            f.write(make_jpeg(color='green'))
+
+    def run_next_job(self):
+        job = claim_next_job('test')
+        status = run_job(job, self.executor)
+        job.refresh_from_db()
+        self.album.refresh_from_db()
+        return status, job
+
+    def test_idle_upload_pauses_conversion(self):
+        Album.objects.filter(pk=self.album.pk).update(upload_activity=timezone.now() - timedelta(hours=1))
+
+        with self.assertRaises(ConversionPaused):
+            run_album_conversion(self.album, executor=self.executor)
+
+        self.album.refresh_from_db()
+        self.assertEqual(self.album.conversion_status, 'pending')
+        # Les sources restent en place (l'upload peut encore en ajouter), les images converties sont conservées
+        self.assertTrue(os.path.exists(os.path.join(self.album.old_path, 'a.jpg')))
+        self.assertTrue(os.path.exists(os.path.join(get_output_dir(self.album.old_path), '1920', 'a.jpg')))
+
+    def test_finalize_converts_only_new_files(self):
+        enqueue_conversion(self.album)
+        status, job = self.run_next_job()
+        self.assertEqual((status, self.album.conversion_status), ('cancelled', 'pending'))
+
+        # Fin de l'upload : un dernier fichier, reçu après la mise en pause
+        self.add_photo('b.jpg')
+        Album.objects.filter(pk=self.album.pk).update(uploaded_count=2)
+        session = UploadSession.objects.create(
+            user=self.user, album_name=self.album.name, chunk_size=256, album=self.album,
+        )
+        upload_file = UploadFile.objects.create(session=session, index=0, name='b.jpg', size=1, placed=True)
+        UploadChunk.objects.create(upload_file=upload_file, number=0, size=1)
+        response = self.client.post(reverse('finalize_upload', args=[session.token]))
+        self.assertEqual(response.status_code, 200)
+
+        status, job = self.run_next_job()
+
+        self.assertEqual((status, self.album.conversion_status, self.album.file_count), ('completed', 'completed', 2))
+        self.assertEqual(job.stats['images']['resumed'], 1)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.album.old_path, '1920'))), ['a.jpg', 'b.jpg'])
+        self.assertEqual(sorted(os.listdir(self.album.old_path)), ['1920', 'thumbnails', 'web'])
+        self.assertFalse(os.path.exists(get_output_dir(self.album.old_path)))
+
+    def test_upload_finished_during_pause(self):
+        Album.objects.filter(pk=self.album.pk).update(upload_complete=True, conversion_status='converting')
+
+        self.assertFalse(pause_conversion(self.album))
+
+        self.album.refresh_from_db()
+        self.assertEqual(self.album.conversion_status, 'converting')
+
+
+class UploadActivityTests(MediaTestCase):
+    def test_chunks_count_as_activity(self):
+        self.login()
+        with self.settings(AUTO_CONVERT=True):
+            response = self.client.post(
+                reverse('create_upload'),
+                json.dumps({'name': 'montagne', 'chunk_size': 256, 'files': [{'name': 'photo.jpg', 'size': 1000}]}),
+                content_type='application/json',
+            )
+        session_id = response.json()['session_id']
+        album = UploadSession.objects.get(token=session_id).album
+        Album.objects.filter(pk=album.pk).update(upload_activity=timezone.now() - timedelta(hours=1))
+        self.assertGreater(get_upload_idle_seconds(album), 3000)
+
+        # Un morceau d'un fichier encore incomplet
+        response = self.client.put(
+            reverse('upload_chunk', args=[session_id, 0, 0]), b'x' * 256, content_type='application/octet-stream',
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertLess(get_upload_idle_seconds(album), 60)
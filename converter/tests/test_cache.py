@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from .. import conversion_cache
+from ..imaging import process_image
+from .base import make_jpeg
+
+
+class ConversionCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        self.cache_dir = os.path.join(self.work_dir, 'cache')
+        self.rendition = {'name': 'mini', 'size': (320, 320), 'format': 'JPEG', 'quality': 80}
+
+    def write(self, name, data):
+        file_path = os.path.join(self.work_dir, name)
+        with open(file_path, 'wb') as f:
+            f.write(data)
+        return file_path
+
+    def convert(self, source_path, name, rendition=None):
+        output_path = os.path.join(self.work_dir, 'sortie', name)
+        mode = process_image(source_path, [(rendition or self.rendition, output_path)], cache_dir=self.cache_dir)
+        with open(output_path, 'rb') as f:
+            return mode, f.read()
+
+    def test_identical_image_is_reused(self):
+        photo = make_jpeg(width=1200, height=800, color='purple')
+        first_mode, first_output = self.convert(self.write('a.jpg', photo), 'a.jpg')
+
+        # Même contenu sous un autre nom (album uploadé une seconde fois)
+        second_mode, second_output = self.convert(self.write('copie.jpg', photo), 'copie.jpg')
+
+        self.assertEqual((first_mode, second_mode), ('reencoded', 'cached'))
+        self.assertEqual(first_output, second_output)
+        self.assertEqual(conversion_cache.get_stats(self.cache_dir)[0], 1)
+
+    def test_parameters_are_part_of_the_key(self):
+        source_path = self.write('a.jpg', make_jpeg(width=1200, height=800))
+        self.convert(source_path, 'a.jpg')
+
+        mode, _ = self.convert(source_path, 'b.jpg', dict(self.rendition, quality=60))
+
+        self.assertEqual(mode, 'reencoded')
+        self.assertNotEqual(
+            conversion_cache.get_cache_key('abc', size=(320, 320), quality=80),
+            conversion_cache.get_cache_key('abc', size=(320, 320), quality=60),
+        )
+
+    def test_missing_entry(self):
+        output_path = os.path.join(self.work_dir, 'a.jpg')
+
+        self.assertFalse(conversion_cache.fetch(self.cache_dir, 'ab' * 32, output_path))
+        self.assertFalse(os.path.exists(output_path))
+
+    def test_prune_removes_least_recently_used(self):
+        for index, key in enumerate(('aa' * 32, 'bb' * 32, 'cc' * 32)):
+            source_path = self.write(f'{index}.jpg', b'x' * 100)
+            conversion_cache.store(self.cache_dir, key, source_path)
+            entry_path = conversion_cache.get_entry_path(self.cache_dir, key)
+            os.utime(entry_path, (1000 + index, 1000 + index))
+        # Entrée la plus ancienne utilisée à nouveau : elle devient la plus récente
+        conversion_cache.fetch(self.cache_dir, 'aa' * 32, os.path.join(self.work_dir, 'lu.jpg'))
+
+        removed_count, removed_size = conversion_cache.prune(self.cache_dir, 200)
+
+        self.assertEqual((removed_count, removed_size), (1, 100))
+        self.assertFalse(os.path.exists(conversion_cache.get_entry_path(self.cache_dir, 'bb' * 32)))
+        self.assertEqual(conversion_cache.get_stats(self.cache_dir), (2, 200))
@@ -0,0 +1,88 @@
+import os
+
+from django.urls import reverse
+
+from ..conversion import ConversionCancelled, check_album_state, get_output_dir
+from ..jobs import cancel_conversion, claim_next_job, enqueue_conversion, requeue_stale_conversions
+from ..models import Album, ConversionJob
+from .base import MediaTestCase
+
+
+class CancelConversionTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.album = self.create_album()
+
+    def test_no_active_job(self):
+        self.assertIsNone(cancel_conversion(self.album))
+        self.album.refresh_from_db()
+        self.assertEqual(self.album.conversion_status, 'pending')
+
+    def test_queued_job_is_cancelled(self):
+        job = enqueue_conversion(self.album)
+
+        cancelled_job = cancel_conversion(self.album)
+
+        self.assertEqual(cancelled_job.status, 'cancelled')
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'cancelled')
+        self.assertIsNotNone(job.finished_at)
+        self.album.refresh_from_db()
+        self.assertEqual(self.album.conversion_status, 'pending')
+        self.assertEqual(self.album.conversion_progress, 0)
+        # Plus rien à attribuer à un worker
+        self.assertIsNone(claim_next_job('test'))
+
+    def test_queued_retry_keeps_album_converted(self):
+        Album.objects.filter(pk=self.album.pk).update(conversion_status='completed')
+        enqueue_conversion(self.album, failed_only=True)
+
+        cancel_conversion(self.album)
+
+        self.album.refresh_from_db()
+        self.assertEqual(self.album.conversion_status, 'completed')
+        self.assertEqual(self.album.conversion_progress, 100)
+
+    def test_running_job_is_signalled(self):
+        enqueue_conversion(self.album)
+        job = claim_next_job('test')
+
+        cancelled_job = cancel_conversion(self.album)
+
+        self.assertEqual(cancelled_job.pk, job.pk)
+        self.assertEqual(cancelled_job.status, 'running')
+        self.album.refresh_from_db()
+        self.assertEqual(self.album.conversion_status, 'cancelling')
+        # Le worker s'arrête à sa prochaine vérification
+        with self.assertRaises(ConversionCancelled):
+            check_album_state(self.album)
+        # Pas de nouvelle conversion tant que l'annulation est en cours
+        self.assertEqual(enqueue_conversion(self.album).pk, job.pk)
+
+    def test_stale_cancellation_is_finished(self):
+        enqueue_conversion(self.album)
+        job = claim_next_job('test')
+        cancel_conversion(self.album)
+        output_dir = get_output_dir(self.album.old_path)
+        os.makedirs(output_dir)
+        # Worker arrêté avant d'avoir traité l'annulation
+        Album.objects.filter(pk=self.album.pk).update(conversion_heartbeat=None)
+
+        self.assertEqual(requeue_stale_conversions(60), [])
+
+        self.album.refresh_from_db()
+        self.assertEqual(self.album.conversion_status, 'pending')
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'cancelled')
+        self.assertFalse(os.path.exists(output_dir))
+
+    def test_cancel_view(self):
+        self.login()
+        enqueue_conversion(self.album)
+
+        response = self.client.post(reverse('cancel_conversion'), {'album_id': self.album.pk})
+
+        self.assertRedirects(response, reverse('index'), fetch_redirect_response=False)
+        self.album.refresh_from_db()
+        self.assertEqual(self.album.conversion_status, 'pending')
+        self.assertEqual(ConversionJob.objects.get(album=self.album).status, 'cancelled')
@@ -0,0 +1,82 @@
+import io
+import os
+
+from django.test import SimpleTestCase
+from PIL import Image
+
+from ..conversion import get_conversion_executor, resize_images_with_pillow
+from ..imaging import get_pool_size
+from .base import MediaTestCase, make_jpeg
+
+
+class ParallelConversionTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.input_dir = os.path.join(self.media_root, 'source')
+        self.output_dir = os.path.join(self.media_root, 'sortie')
+        self.executor = get_conversion_executor(2)
+        self.addCleanup(self.executor.shutdown)
+
+    def write(self, relative_path, data):
+        file_path = os.path.join(self.input_dir, relative_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as f:
+            f.write(data)
+
+    def convert(self, **options):
+        results = []
+        counts = resize_images_with_pillow(self.input_dir, self.output_dir, executor=self.executor, results=results, **options)
+        return counts, results
+
+    def get_size(self, relative_path):
+        with Image.open(os.path.join(self.output_dir, relative_path)) as img:
+            return img.size
+
+    def test_images_are_resized(self):
+        self.write('grande.jpg', make_jpeg(width=3840, height=2160))
+        self.write('portrait.jpg', make_jpeg(width=1000, height=3000))
+        self.write('vacances/petite.jpg', make_jpeg(width=640, height=480))
+
+        (converted_count, total_files), results = self.convert()
+
+        self.assertEqual((converted_count, total_files), (3, 3))
+        self.assertEqual(self.get_size('grande.jpg'), (1920, 1080))
+        self.assertEqual(self.get_size('portrait.jpg'), (360, 1080))
+        # Les sous-dossiers de l'album sont conservés
+        self.assertEqual(self.get_size('vacances/petite.jpg'), (640, 480))
+        self.assertEqual(
+            sorted(output[0] for result in results for output in result['outputs']),
+            ['grande.jpg', 'portrait.jpg', 'vacances/petite.jpg'],
+        )
+
+    def test_same_output_name_gets_suffix(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (80, 60), 'blue').save(buffer, 'PNG')
+        self.write('photo.png', buffer.getvalue())
+        self.write('photo.jpg', make_jpeg())
+
+        (converted_count, _), results = self.convert()
+
+        self.assertEqual(converted_count, 2)
+        self.assertEqual(sorted(os.listdir(self.output_dir)), ['photo.jpg', 'photo_2.jpg'])
+        outputs = {result['source_path']: result['outputs'][0][0] for result in results}
+        self.assertEqual(outputs, {'photo.jpg': 'photo.jpg', 'photo.png': 'photo_2.jpg'})
+
+    def test_unreadable_image_does_not_stop_conversion(self):
+        self.write('a.jpg', make_jpeg())
+        self.write('illisible.jpg', b'pas une image')
+
+        with self.assertLogs('converter.conversion', 'ERROR'):
+            (converted_count, total_files), results = self.convert()
+
+        self.assertEqual((converted_count, total_files), (1, 2))
+        errors = [result for result in results if result['status'] == 'error']
+        self.assertEqual([result['source_path'] for result in errors], ['illisible.jpg'])
+        self.assertEqual(errors[0]['error_type'], 'UnidentifiedImageError')
+
+
+class PoolSizeTests(SimpleTestCase):
+    def test_max_workers(self):
+        self.assertEqual(get_pool_size(max_workers=1), 1)
+        # Mémoire disponible insuffisante pour un processus : au moins un processus
+        self.assertEqual(get_pool_size(worker_memory=2 ** 62), 1)
@@ -0,0 +1,108 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+
+from django.test import SimpleTestCase
+from PIL import Image
+
+from ..conversion import get_manifest_stats
+from ..imaging import SOURCE_ARCHIVE_NAME, ArchiveMember, discover_images, probe_image
+from .base import make_jpeg
+
+
+class DiscoverImagesTests(SimpleTestCase):
+    def setUp(self):
+        self.input_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.input_dir, ignore_errors=True)
+
+    def write(self, relative_path, data=b''):
+        file_path = os.path.join(self.input_dir, relative_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as f:
+            f.write(data or make_jpeg())
+        return file_path
+
+    def get_relative_paths(self):
+        return [
+            image_file.path if isinstance(image_file, ArchiveMember) else os.path.relpath(image_file, self.input_dir)
+            for image_file in discover_images(self.input_dir)
+        ]
+
+    def test_single_pass_listing(self):
+        for relative_path in ('b.JPG', 'a.png', 'sous/c.webp', 'sous/profond/d.tiff'):
+            self.write(relative_path)
+        self.write('notes.txt', b'texte')
+        # Fichiers et dossiers cachés : sorties partielles, métadonnées système
+        self.write('.a.jpg.part')
+        self.write('.failed/e.jpg')
+
+        self.assertEqual(
+            self.get_relative_paths(),
+            ['a.png', 'b.JPG', os.path.join('sous', 'c.webp'), os.path.join('sous', 'profond', 'd.tiff')],
+        )
+
+    def test_same_file_listed_once(self):
+        file_path = self.write('a.jpg')
+        os.link(file_path, os.path.join(self.input_dir, 'lien.jpg'))
+
+        self.assertEqual(len(discover_images(self.input_dir)), 1)
+
+    def test_source_archive_members_come_last(self):
+        self.write('z.jpg')
+        with zipfile.ZipFile(os.path.join(self.input_dir, SOURCE_ARCHIVE_NAME), 'w') as zip_file:
+            zip_file.writestr('a.jpg', make_jpeg())
+
+        self.assertEqual(self.get_relative_paths(), ['z.jpg', 'a.jpg'])
+
+    def test_missing_directory(self):
+        self.assertEqual(discover_images(os.path.join(self.input_dir, 'absent')), [])
+
+
+class ProbeImageTests(SimpleTestCase):
+    def setUp(self):
+        self.input_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.input_dir, ignore_errors=True)
+
+    def write(self, name, data):
+        file_path = os.path.join(self.input_dir, name)
+        with open(file_path, 'wb') as f:
+            f.write(data)
+        return file_path
+
+    def test_header_only(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        file_path = self.write('a.jpg', make_jpeg(width=400, height=300, exif=exif.tobytes()))
+
+        probe = probe_image(file_path)
+
+        self.assertEqual(
+            {key: probe[key] for key in ('format', 'width', 'height', 'bands', 'pixels', 'orientation')},
+            {'format': 'JPEG', 'width': 400, 'height': 300, 'bands': 3, 'pixels': 120000, 'orientation': 6},
+        )
+        self.assertEqual(probe['file_size'], os.path.getsize(file_path))
+
+    def test_unreadable_image(self):
+        probe = probe_image(self.write('a.jpg', b'pas une image'))
+
+        self.assertEqual(probe['error_type'], 'UnidentifiedImageError')
+        self.assertNotIn('width', probe)
+
+    def test_manifest_stats(self):
+        buffer = io.BytesIO()
+        Image.new('RGBA', (1000, 1000)).save(buffer, 'PNG')
+        manifest = [
+            probe_image(self.write('a.jpg', make_jpeg(width=2000, height=1000))),
+            probe_image(self.write('b.png', buffer.getvalue())),
+            probe_image(self.write('c.jpg', b'pas une image')),
+        ]
+
+        stats = get_manifest_stats(manifest)
+
+        self.assertEqual(stats['total_files'], 3)
+        self.assertEqual(stats['unreadable_files'], 1)
+        self.assertEqual(stats['total_megapixels'], 3.0)
+        self.assertEqual(stats['max_megapixels'], 2.0)
+        self.assertEqual(stats['formats'], {'JPEG': 1, 'PNG': 1})
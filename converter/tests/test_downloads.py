@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+
+from django.test import RequestFactory, TestCase, override_settings
+
+from ..downloads import parse_range, serve_file
+
+
+class ParseRangeTests(TestCase):
+    def test_no_header(self):
+        self.assertIsNone(parse_range(None, 100))
+        self.assertIsNone(parse_range('', 100))
+
+    def test_ignored_headers(self):
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 100))
+        self.assertIsNone(parse_range('items=0-1', 100))
+        self.assertIsNone(parse_range('bytes=-', 100))
+
+    def test_range(self):
+        self.assertEqual(parse_range('bytes=10-19', 100), (10, 19))
+        self.assertEqual(parse_range('bytes=90-', 100), (90, 99))
+        # Fin au-delà du fichier : ramenée au dernier octet
+        self.assertEqual(parse_range('bytes=90-500', 100), (90, 99))
+
+    def test_suffix_range(self):
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-500', 100), (0, 99))
+
+    def test_unsatisfiable_range(self):
+        self.assertIs(parse_range('bytes=100-', 100), False)
+        self.assertIs(parse_range('bytes=20-10', 100), False)
+        self.assertIs(parse_range('bytes=-0', 100), False)
+
+
+@override_settings(DOWNLOAD_X_ACCEL_REDIRECT=False)
+
+
+class ServeFileTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.content = bytes(range(256)) * 4
+        self.file_path = os.path.join(self.temp_dir, 'album.zip')
+        with open(self.file_path, 'wb') as f:
+            f.write(self.content)
+
+    def serve(self, **headers):
+        request = self.factory.get('/download/1/', **headers)
+        return serve_file(request, self.file_path, 'album.zip')
+
+    def test_full_file(self):
+        response = self.serve()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('attachment', response['Content-Disposition'])
+
+    def test_partial_content(self):
+        response = self.serve(HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:200])
+
+    def test_not_modified(self):
+        etag = self.serve()['ETag']
+        response = self.serve(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_range_not_satisfiable(self):
+        response = self.serve(HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_stale_if_range_sends_full_file(self):
+        response = self.serve(HTTP_RANGE='bytes=100-199', HTTP_IF_RANGE='"ancien"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
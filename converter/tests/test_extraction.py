@@ -0,0 +1,95 @@
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+
+from ..views.converter import extract_archive
+from ..views.uploads import AssembledUploadedFile
+from .base import make_jpeg
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_file:
+        for name, data in members:
+            zip_file.writestr(name, data)
+    return buffer.getvalue()
+
+
+class ExtractArchiveTests(SimpleTestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        self.album_dir = os.path.join(self.work_dir, 'album')
+        os.makedirs(self.album_dir)
+        self.photos = {name: make_jpeg(width=40 + index) for index, name in enumerate(('a.jpg', 'b.png', 'c.jpg'))}
+
+    def on_disk(self, name, data):
+        """Archive déjà reçue sur disque (lue sur place, sans copie)"""
+        archive_path = os.path.join(self.work_dir, name)
+        with open(archive_path, 'wb') as f:
+            f.write(data)
+        archive_file = AssembledUploadedFile(archive_path, name, len(data))
+        self.addCleanup(archive_file.close)
+        return archive_file
+
+    def read(self, name):
+        with open(os.path.join(self.album_dir, name), 'rb') as f:
+            return f.read()
+
+    def assert_extracted(self, extracted_files):
+        self.assertEqual(sorted(os.path.basename(path) for path in extracted_files), sorted(self.photos))
+        # Images à la racine de l'album, sans fichier temporaire restant
+        self.assertEqual(sorted(os.listdir(self.album_dir)), sorted(self.photos))
+        for name, data in self.photos.items():
+            self.assertEqual(self.read(name), data)
+
+    def test_zip_on_disk_parallel(self):
+        archive = make_zip([
+            ('vacances/a.jpg', self.photos['a.jpg']),
+            ('vacances/b.png', self.photos['b.png']),
+            ('c.jpg', self.photos['c.jpg']),
+            ('__MACOSX/vacances/._a.jpg', b'metadonnees'),
+            ('notes.txt', b'texte'),
+            ('vide/', b''),
+        ])
+
+        self.assert_extracted(extract_archive(self.on_disk('photos.zip', archive), self.album_dir))
+
+    def test_zip_in_memory(self):
+        archive = make_zip([(name, data) for name, data in self.photos.items()])
+
+        self.assert_extracted(extract_archive(SimpleUploadedFile('photos.zip', archive), self.album_dir))
+
+    def test_member_paths_stay_in_album(self):
+        archive = make_zip([('../../a.jpg', self.photos['a.jpg']), ('/abs/b.png', self.photos['b.png']), ('c.jpg', self.photos['c.jpg'])])
+
+        self.assert_extracted(extract_archive(self.on_disk('photos.zip', archive), self.album_dir))
+        self.assertEqual(sorted(os.listdir(self.work_dir)), ['album', 'photos.zip'])
+
+    def test_same_name_keeps_last_member(self):
+        archive = make_zip([('un/a.jpg', b'ancienne'), ('deux/a.jpg', self.photos['a.jpg'])])
+
+        extracted_files = extract_archive(self.on_disk('photos.zip', archive), self.album_dir)
+
+        self.assertEqual(len(extracted_files), 1)
+        self.assertEqual(self.read('a.jpg'), self.photos['a.jpg'])
+
+    def test_tar_streamed(self):
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w:gz') as tar_file:
+            for name, data in self.photos.items():
+                info = tarfile.TarInfo(f'album/{name}')
+                info.size = len(data)
+                tar_file.addfile(info, io.BytesIO(data))
+
+        self.assert_extracted(extract_archive(self.on_disk('photos.tar.gz', buffer.getvalue()), self.album_dir))
+
+    def test_corrupt_archive(self):
+        with self.assertRaisesMessage(Exception, 'Erreur lors de l\'extraction de l\'archive'):
+            extract_archive(self.on_disk('photos.zip', b'pas une archive'), self.album_dir)
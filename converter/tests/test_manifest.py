@@ -0,0 +1,49 @@
+import os
+
+from ..imaging import SOURCE_ARCHIVE_NAME
+from ..manifest import add_album_images, get_album_files, record_conversion
+from .base import MediaTestCase
+
+
+class AlbumManifestTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.album = self.create_album()
+
+    def test_upload_again_replaces_image(self):
+        add_album_images(self.album, [{'path': 'a.jpg', 'size': 10}, {'path': 'b.jpg', 'size': 20, 'width': 4, 'height': 3}])
+
+        add_album_images(self.album, [{'path': 'a.jpg', 'size': 30, 'sha256': 'abc'}, {'path': 'a.jpg', 'size': 40}])
+
+        self.assertEqual(
+            sorted(self.album.images.values_list('path', 'size', 'sha256')),
+            [('a.jpg', 40, ''), ('b.jpg', 20, '')],
+        )
+
+    def test_record_conversion_replaces_manifest(self):
+        add_album_images(self.album, [{'path': 'a.png', 'size': 10, 'sha256': 'abc'}, {'path': 'b.jpg', 'size': 20}])
+
+        record_conversion(self.album, [
+            {'source_path': 'a.png', 'status': 'converted', 'outputs': [('a.jpg', 5, (4, 3))]},
+            {'source_path': 'b.jpg', 'status': 'error', 'error': 'illisible', 'error_type': 'UnidentifiedImageError'},
+        ])
+
+        self.assertEqual(
+            sorted(self.album.images.values_list('path', 'source_path', 'status', 'sha256', 'width')),
+            [('.failed/b.jpg', 'b.jpg', 'error', '', None), ('a.jpg', 'a.png', 'converted', 'abc', 4)],
+        )
+
+    def test_album_files(self):
+        self.assertIsNone(get_album_files(self.album))
+        add_album_images(self.album, [
+            {'path': 'sub/b.jpg', 'size': 1},
+            {'path': 'a.jpg', 'size': 1},
+            {'path': f'{SOURCE_ARCHIVE_NAME}/c.jpg', 'size': 1},
+            {'path': f'{SOURCE_ARCHIVE_NAME}/d.jpg', 'size': 1},
+        ])
+
+        self.assertEqual(get_album_files(self.album), [
+            (os.path.join(self.album.old_path, SOURCE_ARCHIVE_NAME), SOURCE_ARCHIVE_NAME),
+            (os.path.join(self.album.old_path, 'a.jpg'), 'a.jpg'),
+            (os.path.join(self.album.old_path, 'sub/b.jpg'), 'sub/b.jpg'),
+        ])
@@ -0,0 +1,70 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Album
+from .base import MediaTestCase
+
+
+@mock.patch('converter.views.converter.ALBUMS_PER_PAGE', 3)
+class AlbumListPaginationTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login()
+        now = timezone.now()
+        # Deux albums créés au même instant : départagés par leur identifiant
+        dates = [now - timedelta(days=days) for days in (6, 5, 4, 4, 3, 2, 1)]
+        self.albums = []
+        for index, date in enumerate(dates):
+            album = self.create_album(f'album{index}', conversion_status='completed' if index % 2 else 'pending')
+            Album.objects.filter(pk=album.pk).update(date=date)
+            self.albums.append(album)
+        # Du plus récent au plus ancien (même date : identifiant décroissant)
+        self.expected = [album.name for album in reversed(self.albums)]
+
+    def get_page(self, **params):
+        response = self.client.get(reverse('index'), params)
+        self.assertEqual(response.status_code, 200)
+        context = response.context
+        return [album.name for album in context['latest_album_list']], context['newer_cursor'], context['older_cursor']
+
+    def test_walk_older_then_newer(self):
+        pages = []
+        names, newer_cursor, older_cursor = self.get_page()
+        self.assertIsNone(newer_cursor)
+        pages.append(names)
+        while older_cursor:
+            names, newer_cursor, older_cursor = self.get_page(before=older_cursor)
+            pages.append(names)
+
+        self.assertEqual(pages, [self.expected[0:3], self.expected[3:6], self.expected[6:]])
+
+        # Retour en arrière depuis la dernière page
+        names, newer_cursor, _ = self.get_page(after=newer_cursor)
+        self.assertEqual(names, self.expected[3:6])
+        names, newer_cursor, _ = self.get_page(after=newer_cursor)
+        self.assertEqual(names, self.expected[0:3])
+        self.assertIsNone(newer_cursor)
+
+    def test_status_filter(self):
+        names, _, older_cursor = self.get_page(status='completed')
+        self.assertEqual(names, ['album5', 'album3', 'album1'])
+        self.assertIsNone(older_cursor)
+
+    def test_invalid_cursor_and_status_are_ignored(self):
+        names, newer_cursor, _ = self.get_page(before='pas-une-position', status='inconnu')
+
+        self.assertEqual(names, self.expected[0:3])
+        self.assertIsNone(newer_cursor)
+
+    def test_query_count_does_not_depend_on_album_count(self):
+        # Session, utilisateur, albums de la page (état d'approbation en cache)
+        self.client.get(reverse('index'))
+        with self.assertNumQueries(3):
+            self.client.get(reverse('index'))
+        for index in range(20):
+            self.create_album(f'autre{index}')
+        with self.assertNumQueries(3):
+            self.client.get(reverse('index'))
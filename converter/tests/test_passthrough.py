@@ -0,0 +1,79 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+from PIL import Image, ImageCms
+
+from ..imaging import strip_jpeg_metadata
+from .base import make_jpeg
+
+
+def get_jpeg_markers(data):
+    """Marqueurs des segments d'un JPEG, jusqu'au début des données compressées (SOS)"""
+    markers = []
+    position = 2
+    while position < len(data):
+        marker = data[position + 1]
+        markers.append(marker)
+        if marker == 0xDA:
+            break
+        position += 2 + int.from_bytes(data[position + 2:position + 4], 'big')
+    return markers
+
+
+class StripJpegMetadataTests(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def strip(self, data):
+        source_path = os.path.join(self.temp_dir, 'source.jpg')
+        output_path = os.path.join(self.temp_dir, 'output.jpg')
+        with open(source_path, 'wb') as source:
+            source.write(data)
+        strip_jpeg_metadata(source_path, output_path)
+        with open(output_path, 'rb') as output:
+            return output.read()
+
+    def test_removes_exif_and_comments(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'Appareil'
+        data = make_jpeg(exif=exif.tobytes(), comment=b'commentaire')
+        self.assertIn(0xE1, get_jpeg_markers(data))
+        self.assertIn(0xFE, get_jpeg_markers(data))
+
+        stripped = self.strip(data)
+
+        markers = get_jpeg_markers(stripped)
+        self.assertNotIn(0xE1, markers)
+        self.assertNotIn(0xFE, markers)
+        with Image.open(io.BytesIO(stripped)) as image:
+            self.assertEqual(len(image.getexif()), 0)
+
+    def test_image_data_is_unchanged(self):
+        data = make_jpeg(exif=Image.Exif().tobytes())
+        stripped = self.strip(data)
+
+        # Données compressées recopiées octet par octet
+        self.assertEqual(data[data.rindex(b'\xff\xda'):], stripped[stripped.rindex(b'\xff\xda'):])
+        with Image.open(io.BytesIO(data)) as original, Image.open(io.BytesIO(stripped)) as copy:
+            self.assertEqual(list(original.getdata()), list(copy.getdata()))
+
+    def test_keeps_icc_profile(self):
+        icc_profile = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+        stripped = self.strip(make_jpeg(icc_profile=icc_profile))
+
+        with Image.open(io.BytesIO(stripped)) as image:
+            self.assertEqual(image.info.get('icc_profile'), icc_profile)
+
+    def test_invalid_file(self):
+        with self.assertRaises(ValueError):
+            self.strip(b'pas un jpeg')
+
+    def test_truncated_file(self):
+        data = make_jpeg()
+        with self.assertRaises(ValueError):
+            # Coupé au milieu des segments d'en-tête
+            self.strip(data[:30])
@@ -0,0 +1,59 @@
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.test import RequestFactory
+from django.urls import reverse
+
+from ..admin import UserProfileAdmin
+from ..models import UserProfile
+from ..permissions import APPROVED, MISSING_PROFILE, PENDING, get_approval_status
+from .base import MediaTestCase
+
+
+class ApprovalCacheTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('visiteur', password='secret')
+
+    def test_status_is_cached(self):
+        self.assertEqual(get_approval_status(self.user), PENDING)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_approval_status(self.user), PENDING)
+
+    def test_profile_change_invalidates_cache(self):
+        get_approval_status(self.user)
+
+        profile = UserProfile.objects.get(user=self.user)
+        profile.approved = True
+        profile.save()
+        self.assertEqual(get_approval_status(self.user), APPROVED)
+
+        profile.delete()
+        self.assertEqual(get_approval_status(self.user), MISSING_PROFILE)
+
+    def test_admin_action_invalidates_cache(self):
+        get_approval_status(self.user)
+        request = RequestFactory().post('/')
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        model_admin = UserProfileAdmin(UserProfile, AdminSite())
+
+        # Sélection filtrée sur approved : vide une fois les profils mis à jour
+        model_admin.approve_users(request, UserProfile.objects.filter(approved=False))
+
+        self.assertEqual(get_approval_status(self.user), APPROVED)
+
+    def test_pending_user_is_redirected(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('index'))
+
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+
+    def test_status_cached_by_protected_view(self):
+        user = self.login()
+        self.client.get(reverse('index'))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_approval_status(user), APPROVED)
@@ -0,0 +1,37 @@
+from django.urls import reverse
+
+from ..models import Album
+from .base import MediaTestCase
+
+
+class BatchedProgressTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login()
+        self.albums = [self.create_album(name, conversion_status='converting') for name in ('plage', 'foret')]
+        self.url = f"{reverse('conversions_progress')}?ids={','.join(str(album.pk) for album in self.albums)}"
+
+    def test_all_albums_in_one_response(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.json()['albums']), sorted(str(album.pk) for album in self.albums))
+
+    def test_unchanged_progress_is_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        # La progression d'un album change : nouvelle réponse complète
+        Album.objects.filter(pk=self.albums[0].pk).update(conversion_progress=40)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_invalid_ids(self):
+        response = self.client.get(f"{reverse('conversions_progress')}?ids=abc")
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,65 @@
+import os
+import threading
+
+from ..conversion import ConversionInterrupted, get_conversion_executor, get_output_dir, run_album_conversion
+from ..imaging import get_partial_path
+from ..models import Album
+from .base import MediaTestCase, make_jpeg
+
+
+class ResumeConversionTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.album = self.create_album(conversion_status='converting')
+        self.output_dir = get_output_dir(self.album.old_path)
+        for name in ('a.jpg', 'b.jpg', 'c.jpg'):
+            with open(os.path.join(self.album.old_path, name), 'wb') as f:
+                f.write(make_jpeg(width=2400, height=1600))
+        self.executor = get_conversion_executor(1)
+        self.addCleanup(self.executor.shutdown)
+
+    def write_output(self, name, data):
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(os.path.join(self.output_dir, name), 'wb') as f:
+            f.write(data)
+
+    def test_interrupted_conversion_keeps_output(self):
+        stop_event = threading.Event()
+        stop_event.set()
+
+        with self.assertRaises(ConversionInterrupted):
+            run_album_conversion(self.album, executor=self.executor, stop_event=stop_event)
+
+        # Les sources et le dossier de sortie (point de reprise) sont conservés
+        self.assertTrue(os.path.isdir(self.output_dir))
+        self.assertEqual(sorted(os.listdir(self.album.old_path)), ['a.jpg', 'b.jpg', 'c.jpg'])
+        self.album.refresh_from_db()
+        self.assertEqual(self.album.conversion_status, 'converting')
+
+    def test_valid_outputs_are_kept(self):
+        # a.jpg déjà converti par le run précédent, b.jpg écrit à moitié (fichier temporaire)
+        converted = make_jpeg(width=30, height=20, color='yellow')
+        self.write_output('a.jpg', converted)
+        self.write_output(os.path.basename(get_partial_path('b.jpg')), b'\xff\xd8')
+        stats = {}
+
+        converted_count, total_files = run_album_conversion(self.album, executor=self.executor, stats=stats)
+
+        self.assertEqual((converted_count, total_files), (3, 3))
+        self.assertEqual(stats['images']['resumed'], 1)
+        self.assertEqual(stats['images']['reencoded'], 2)
+        with open(os.path.join(self.album.old_path, 'a.jpg'), 'rb') as f:
+            self.assertEqual(f.read(), converted)
+        # Aucun fichier temporaire ne reste dans l'album
+        self.assertEqual(sorted(os.listdir(self.album.old_path)), ['a.jpg', 'b.jpg', 'c.jpg'])
+        self.assertEqual(Album.objects.get(pk=self.album.pk).conversion_status, 'completed')
+
+    def test_invalid_output_is_converted_again(self):
+        self.write_output('a.jpg', b'')
+        self.write_output('b.jpg', b'tronque')
+        stats = {}
+
+        run_album_conversion(self.album, executor=self.executor, stats=stats)
+
+        self.assertEqual(stats['images']['resumed'], 0)
+        self.assertEqual(stats['images']['reencoded'], 3)
@@ -0,0 +1,101 @@
+import io
+import os
+
+from django.urls import reverse
+from PIL import Image
+
+from ..conversion import get_conversion_executor, retry_failed_images
+from ..jobs import enqueue_conversion
+from ..manifest import FAILED_DIR_NAME
+from ..models import Album, AlbumImage, ConversionJob
+from .base import MediaTestCase, make_jpeg
+
+
+class RetryFailedTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login()
+        self.album = self.create_album(conversion_status='completed', conversion_progress=100, file_count=2)
+        self.write(os.path.join(self.album.old_path, 'ok.jpg'), make_jpeg())
+        AlbumImage.objects.create(album=self.album, path='ok.jpg', source_path='ok.jpg', size=1, status='converted')
+        failed_path = os.path.join(FAILED_DIR_NAME, 'sous-dossier', 'raté.jpg')
+        self.write(os.path.join(self.album.old_path, failed_path), make_jpeg(width=300, height=200))
+        AlbumImage.objects.create(
+            album=self.album, path=failed_path.replace(os.sep, '/'), source_path='sous-dossier/raté.jpg',
+            size=1, status='error', error_type='UnidentifiedImageError', error_message='illisible',
+        )
+
+    def write(self, file_path, data):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as f:
+            f.write(data)
+
+    def test_view_queues_failed_only_job(self):
+        response = self.client.post(reverse('retry_failed'), {'album_id': self.album.pk})
+
+        self.assertRedirects(response, reverse('index'), fetch_redirect_response=False)
+        job = ConversionJob.objects.get(album=self.album)
+        self.assertTrue(job.failed_only)
+        self.assertEqual(job.status, 'queued')
+        self.album.refresh_from_db()
+        self.assertEqual(self.album.conversion_status, 'converting')
+
+    def test_view_without_failed_images(self):
+        self.album.images.filter(status='error').delete()
+
+        self.client.post(reverse('retry_failed'), {'album_id': self.album.pk})
+
+        self.assertFalse(ConversionJob.objects.exists())
+        self.album.refresh_from_db()
+        self.assertEqual(self.album.conversion_status, 'completed')
+
+    def test_view_requires_converted_album(self):
+        Album.objects.filter(pk=self.album.pk).update(conversion_status='pending')
+
+        self.client.post(reverse('retry_failed'), {'album_id': self.album.pk})
+
+        self.assertFalse(ConversionJob.objects.exists())
+
+    def test_retry_converts_failed_images(self):
+        enqueue_conversion(self.album, failed_only=True)
+        self.album.refresh_from_db()
+        executor = get_conversion_executor(1)
+        self.addCleanup(executor.shutdown)
+
+        converted_count, total_files = retry_failed_images(self.album, executor=executor)
+
+        self.assertEqual((converted_count, total_files), (1, 1))
+        self.album.refresh_from_db()
+        self.assertEqual(self.album.conversion_status, 'completed')
+        # L'image convertie rejoint l'album, à sa place d'origine
+        self.assertTrue(os.path.exists(os.path.join(self.album.old_path, 'sous-dossier', 'raté.jpg')))
+        self.assertFalse(os.path.exists(os.path.join(self.album.old_path, FAILED_DIR_NAME)))
+        self.assertEqual(
+            sorted(self.album.images.values_list('path', 'status')),
+            [('ok.jpg', 'converted'), ('sous-dossier/raté.jpg', 'converted')],
+        )
+
+    def test_retry_keeps_existing_outputs(self):
+        # photo.png en échec donnerait photo.jpg, déjà converti
+        original = make_jpeg(color='blue')
+        self.write(os.path.join(self.album.old_path, 'photo.jpg'), original)
+        AlbumImage.objects.create(album=self.album, path='photo.jpg', source_path='photo.jpg', size=1, status='converted')
+        buffer = io.BytesIO()
+        Image.new('RGB', (80, 60), 'green').save(buffer, 'PNG')
+        self.write(os.path.join(self.album.old_path, FAILED_DIR_NAME, 'photo.png'), buffer.getvalue())
+        AlbumImage.objects.create(
+            album=self.album, path=f'{FAILED_DIR_NAME}/photo.png', source_path='photo.png', size=1, status='error',
+        )
+        enqueue_conversion(self.album, failed_only=True)
+        executor = get_conversion_executor(1)
+        self.addCleanup(executor.shutdown)
+
+        retry_failed_images(self.album, executor=executor)
+
+        with open(os.path.join(self.album.old_path, 'photo.jpg'), 'rb') as f:
+            self.assertEqual(f.read(), original)
+        self.assertTrue(os.path.exists(os.path.join(self.album.old_path, 'photo_2.jpg')))
+        self.assertEqual(
+            sorted(self.album.images.filter(path__startswith='photo').values_list('path', 'source_path')),
+            [('photo.jpg', 'photo.jpg'), ('photo_2.jpg', 'photo.png')],
+        )
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+
+from django.test import override_settings
+from django.urls import reverse
+
+from ..models import Album, UploadSession
+from .base import MediaTestCase, make_jpeg
+
+
+class ChunkedUploadTests(MediaTestCase):
+    CHUNK_SIZE = 256
+
+    def setUp(self):
+        super().setUp()
+        self.login()
+        self.photo = make_jpeg(width=200, height=150, color='blue')
+
+    def create_session(self, files):
+        response = self.client.post(
+            reverse('create_upload'),
+            json.dumps({
+                'name': 'montagne',
+                'chunk_size': self.CHUNK_SIZE,
+                'files': [{'name': name, 'size': len(data)} for name, data in files],
+            }),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def put_chunk(self, session_id, file_index, number, data, **headers):
+        return self.client.put(
+            reverse('upload_chunk', args=[session_id, file_index, number]),
+            data,
+            content_type='application/octet-stream',
+            **headers,
+        )
+
+    def get_chunk(self, number):
+        return self.photo[number * self.CHUNK_SIZE:(number + 1) * self.CHUNK_SIZE]
+
+    def post_files(self, files):
+        return self.client.post(
+            reverse('create_upload'),
+            json.dumps({'name': 'montagne', 'chunk_size': self.CHUNK_SIZE, 'files': files}),
+            content_type='application/json',
+        )
+
+    def test_invalid_file_sizes_are_rejected(self):
+        for size in (-1, '100', 1.5, None, True):
+            with self.subTest(size=size):
+                response = self.post_files([{'name': 'photo.jpg', 'size': size}])
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.post_files([{'name': 'photo.jpg'}]).status_code, 400)
+        self.assertEqual(self.post_files({'name': 'photo.jpg', 'size': 1}).status_code, 400)
+        self.assertFalse(UploadSession.objects.exists())
+
+    @override_settings(UPLOAD_MAX_SIZE=1000)
+    def test_upload_size_limit(self):
+        self.assertEqual(self.post_files([{'name': 'photo.jpg', 'size': 10 ** 15}]).status_code, 400)
+        # La limite porte sur l'ensemble des fichiers de l'album
+        files = [{'name': 'a.jpg', 'size': 600}, {'name': 'b.jpg', 'size': 600}]
+        self.assertEqual(self.post_files(files).status_code, 400)
+        self.assertFalse(UploadSession.objects.exists())
+
+        self.assertEqual(self.post_files([{'name': 'a.jpg', 'size': 1000}]).status_code, 201)
+
+    def test_create_session_lists_missing_chunks(self):
+        status = self.create_session([('photo.jpg', self.photo)])
+        total_chunks = -(-len(self.photo) // self.CHUNK_SIZE)
+        self.assertEqual(status['files'][0]['total_chunks'], total_chunks)
+        self.assertEqual(status['files'][0]['missing_chunks'], list(range(total_chunks)))
+
+    def test_resume_and_finalize(self):
+        session_id = self.create_session([('photo.jpg', self.photo)])['session_id']
+        total_chunks = -(-len(self.photo) // self.CHUNK_SIZE)
+
+        # Upload interrompu : un morceau sur deux, dans le désordre
+        for number in reversed(range(0, total_chunks, 2)):
+            self.assertEqual(self.put_chunk(session_id, 0, number, self.get_chunk(number)).status_code, 201)
+
+        status = self.client.get(reverse('upload_status', args=[session_id])).json()
+        missing = list(range(1, total_chunks, 2))
+        self.assertEqual(status['files'][0]['missing_chunks'], missing)
+
+        response = self.client.post(reverse('finalize_upload', args=[session_id]))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['missing_chunks'], {'0': missing})
+
+        # Reprise : seuls les morceaux manquants sont envoyés
+        for number in missing:
+            checksum = hashlib.sha256(self.get_chunk(number)).hexdigest()
+            response = self.put_chunk(session_id, 0, number, self.get_chunk(number), HTTP_X_CHUNK_CHECKSUM=checksum)
+            self.assertEqual(response.status_code, 201)
+
+        response = self.client.post(reverse('finalize_upload', args=[session_id]))
+        self.assertEqual(response.status_code, 200)
+        album = Album.objects.get(pk=response.json()['album_id'])
+        self.assertEqual(album.file_count, 1)
+        with open(os.path.join(album.old_path, 'photo.jpg'), 'rb') as f:
+            self.assertEqual(f.read(), self.photo)
+        self.assertEqual(album.images.get().size, len(self.photo))
+        self.assertEqual(UploadSession.objects.get(token=session_id).status, 'finalized')
+
+        # Finalisation répétée (réponse perdue) : même album
+        response = self.client.post(reverse('finalize_upload', args=[session_id]))
+        self.assertEqual(response.json()['album_id'], album.pk)
+
+    def test_chunk_size_mismatch(self):
+        session_id = self.create_session([('photo.jpg', self.photo)])['session_id']
+
+        response = self.put_chunk(session_id, 0, 0, self.get_chunk(0)[:-1])
+
+        self.assertEqual(response.status_code, 400)
+        status = self.client.get(reverse('upload_status', args=[session_id])).json()
+        self.assertIn(0, status['files'][0]['missing_chunks'])
+
+    def test_chunk_checksum_mismatch(self):
+        session_id = self.create_session([('photo.jpg', self.photo)])['session_id']
+        self.assertEqual(self.put_chunk(session_id, 0, 0, self.get_chunk(0)).status_code, 201)
+
+        # Morceau déjà reçu puis renvoyé corrompu : il doit être renvoyé
+        response = self.put_chunk(session_id, 0, 0, self.get_chunk(0), HTTP_X_CHUNK_CHECKSUM='0' * 64)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['checksum'], hashlib.sha256(self.get_chunk(0)).hexdigest())
+        status = self.client.get(reverse('upload_status', args=[session_id])).json()
+        self.assertIn(0, status['files'][0]['missing_chunks'])
+
+    def test_chunk_out_of_range(self):
+        session_id = self.create_session([('photo.jpg', self.photo)])['session_id']
+        total_chunks = -(-len(self.photo) // self.CHUNK_SIZE)
+
+        response = self.put_chunk(session_id, 0, total_chunks, b'x')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_session_of_another_user(self):
+        session_id = self.create_session([('photo.jpg', self.photo)])['session_id']
+        self.login('autre')
+
+        self.assertEqual(self.client.get(reverse('upload_status', args=[session_id])).status_code, 404)
+        self.assertEqual(self.put_chunk(session_id, 0, 0, self.get_chunk(0)).status_code, 404)
+
+    def test_finalize_without_valid_file(self):
+        data = b'pas une image'
+        session_id = self.create_session([('notes.txt', data)])['session_id']
+        self.assertEqual(self.put_chunk(session_id, 0, 0, data).status_code, 201)
+
+        response = self.client.post(reverse('finalize_upload', args=[session_id]))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Album.objects.exists())
+        # La session reste ouverte : d'autres fichiers peuvent être envoyés
+        self.assertEqual(UploadSession.objects.get(token=session_id).status, 'open')
@@ -0,0 +1,96 @@
+import io
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.utils import timezone
+
+from ..conversion import ConversionPoolBroken, get_conversion_executor
+from ..jobs import claim_next_job, enqueue_conversion, get_worker_name, is_worker_alive, requeue_stale_conversions, run_job
+from ..management.commands.conversion_worker import Command
+from ..models import Album
+from .base import MediaTestCase, make_jpeg
+
+
+def get_broken_executor():
+    """Pool de conversion dont un processus s'est arrêté brutalement"""
+    executor = get_conversion_executor(1)
+    try:
+        executor.submit(os._exit, 1).result()
+    except Exception:
+        pass
+    return executor
+
+
+class BrokenPoolTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.album = self.create_album()
+        with open(os.path.join(self.album.old_path, 'photo.jpg'), 'wb') as f:
+            f.write(make_jpeg())
+
+    def test_job_is_requeued(self):
+        enqueue_conversion(self.album)
+        job = claim_next_job(get_worker_name())
+        executor = get_broken_executor()
+        self.addCleanup(executor.shutdown)
+
+        with self.assertRaises(ConversionPoolBroken):
+            run_job(job, executor)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.finished_at), ('queued', '', None))
+        self.album.refresh_from_db()
+        self.assertEqual(self.album.conversion_status, 'converting')
+        # L'image n'est pas comptée en échec : elle sera convertie à la reprise
+        self.assertFalse(self.album.images.filter(status='error').exists())
+
+    def test_worker_replaces_executor_once(self):
+        command = Command(stdout=io.StringIO())
+        command.pool_size = 1
+        broken_executor = get_broken_executor()
+        command.executor = broken_executor
+        command.executor_lock = threading.Lock()
+
+        command.replace_broken_executor(broken_executor)
+        new_executor = command.executor
+        self.addCleanup(new_executor.shutdown)
+        # Une autre conversion du même pool cassé ne le recrée pas une seconde fois
+        command.replace_broken_executor(broken_executor)
+
+        self.assertIsNot(new_executor, broken_executor)
+        self.assertIs(command.executor, new_executor)
+        self.assertEqual(new_executor.submit(abs, -1).result(), 1)
+
+
+class StaleConversionTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.album = self.create_album()
+        enqueue_conversion(self.album)
+
+    def make_stale(self, worker):
+        job = claim_next_job(worker)
+        Album.objects.filter(pk=self.album.pk).update(conversion_heartbeat=timezone.now() - timedelta(hours=1))
+        return job
+
+    def test_alive_worker_keeps_job(self):
+        job = self.make_stale(get_worker_name())
+
+        self.assertEqual(requeue_stale_conversions(60), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'running')
+
+    def test_dead_worker_job_is_requeued(self):
+        # Même pid qu'un processus précédent (conteneur redémarré), autre jeton
+        job = self.make_stale(f'{socket.gethostname()}:{os.getpid()}:ancien')
+
+        self.assertEqual(requeue_stale_conversions(60), [self.album])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), ('queued', ''))
+
+    def test_worker_alive(self):
+        self.assertTrue(is_worker_alive(get_worker_name()))
+        self.assertFalse(is_worker_alive('autre-machine:1:jeton'))
+        self.assertFalse(is_worker_alive(''))
@@ -0,0 +1,48 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+
+from django.test import TestCase
+
+from ..zipstream import iter_zip
+from .base import make_jpeg
+
+
+class IterZipTests(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def write(self, name, data):
+        file_path = os.path.join(self.temp_dir, name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as f:
+            f.write(data)
+        return file_path, name
+
+    def test_archive_is_valid(self):
+        files = {
+            'photo.jpg': make_jpeg(),
+            'sous-dossier/notes.txt': b'texte ' * 1000,
+            'vide.txt': b'',
+        }
+        entries = [self.write(name, data) for name, data in files.items()]
+
+        # Petits blocs : l'archive est produite en plusieurs morceaux
+        archive = b''.join(iter_zip(entries, chunk_size=1024))
+
+        with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual(sorted(zip_file.namelist()), sorted(files))
+            for name, data in files.items():
+                self.assertEqual(zip_file.read(name), data)
+            # Images déjà compressées : stockées sans recompression
+            self.assertEqual(zip_file.getinfo('photo.jpg').compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(zip_file.getinfo('sous-dossier/notes.txt').compress_type, zipfile.ZIP_DEFLATED)
+
+    def test_empty_archive(self):
+        archive = b''.join(iter_zip([]))
+        with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+            self.assertEqual(zip_file.namelist(), [])
@@ -0,0 +1,45 @@
+"""
+Réception des fichiers uploadés.
+
+Chaque fichier est écrit sur disque au fil de la réception, dans
+FILE_UPLOAD_TEMP_DIR (sur le même système de fichiers que les albums) : la
+mémoire du worker ne dépend plus de la taille de l'upload, et le fichier
+est ensuite simplement renommé vers son chemin final (voir save_uploaded_files).
+"""
+
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+from .imaging import CONVERTIBLE_EXTENSIONS, probe_image
+
+
+class HashingFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Écrit chaque fichier uploadé dans un fichier temporaire en calculant son
+    empreinte SHA-256, puis lit l'en-tête des images
+    Le fichier obtenu a deux attributs supplémentaires :
+    - sha256 : empreinte du contenu
+    - image_info : en-tête de l'image (voir probe_image), None pour les autres fichiers
+    """
+
+    def new_file(self, *args, **kwargs):
+        if settings.FILE_UPLOAD_TEMP_DIR:
+            os.makedirs(settings.FILE_UPLOAD_TEMP_DIR, exist_ok=True)
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.flush()
+        upload = super().file_complete(file_size)
+        upload.sha256 = self.hasher.hexdigest()
+        upload.image_info = None
+        if upload.name.lower().endswith(CONVERTIBLE_EXTENSIONS):
+            upload.image_info = probe_image(upload.temporary_file_path())
+        return upload
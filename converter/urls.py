@@ -1,6 +1,6 @@
 from django.urls import path
 
-from .views import converter, users
+from .views import converter, progress, uploads, users
 
 urlpatterns = [
     path("", converter.index, name="index"),
@@ -8,9 +8,17 @@ urlpatterns = [
     path("login/", users.user_login, name="login"),
     path("logout/", users.user_logout, name="logout"),
     path("upload/", converter.add , name="upload"),
+    path("uploads/", uploads.create_upload, name="create_upload"),
+    path("uploads/<uuid:session_id>/", uploads.upload_status, name="upload_status"),
+    path("uploads/<uuid:session_id>/files/<int:file_index>/chunks/<int:number>/", uploads.upload_chunk, name="upload_chunk"),
+    path("uploads/<uuid:session_id>/finalize/", uploads.finalize_upload, name="finalize_upload"),
     path("convert/", converter.convert, name="convert"),
+    path("retry-failed/", converter.retry_failed, name="retry_failed"),
+    path("cancel/", converter.cancel, name="cancel_conversion"),
     path("delete/", converter.delete, name="delete"),
     path("download/<int:album_id>/", converter.download, name="download"),
+    path("progress/", converter.get_conversion_progress, name="conversions_progress"),
+    path("progress/stream/", progress.progress_stream, name="progress_stream"),
     path("progress/<int:album_id>/", converter.get_conversion_progress, name="conversion_progress"),
     path("debug/", converter.debug_settings, name="debug_settings"),
 ]
\ No newline at end of file
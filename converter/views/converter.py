@@ -3,25 +3,36 @@ from django.http import HttpResponse, JsonResponse
 from django.template import loader
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.utils import timezone
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from functools import wraps
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import os
 import zipfile
 import tarfile
 import shutil
-import glob
 import tempfile
 from django.conf import settings
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
-from django.http import HttpResponse, Http404
+from django.http import HttpResponse, Http404, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
 from django.utils.encoding import smart_str
-from PIL import Image, ImageOps
 import logging
-import threading
 
-from ..models import Album, UserProfile
+from ..models import Album, AlbumImage
+from ..permissions import MISSING_PROFILE, PENDING, get_approval_status
 from ..forms import AlbumUploadForm
+from ..imaging import SOURCE_ARCHIVE_NAME, ArchiveMember, get_partial_path, list_archive_images
+from ..conversion import get_output_dir
+from ..manifest import add_album_images, get_album_files, get_relative_path
+from ..progress import get_albums_progress, get_progress_version
+from .progress import parse_album_ids
+from ..jobs import cancel_conversion, enqueue_conversion
+from ..zipstream import iter_album_files, iter_zip
+from ..archives import get_album_archive, remove_album_archive
+from ..downloads import get_download_filename, serve_file
 
 # Configuration du logging
 logger = logging.getLogger(__name__)
@@ -31,39 +42,135 @@ def is_image_file(filename):
     image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp']
     return any(filename.lower().endswith(ext) for ext in image_extensions)
 
+def clean_album_name(album_name):
+    """Nettoie le nom de l'album : remplace les caractères problématiques"""
+    return album_name.replace('/', '-').replace('\\', '-')
+
+# Nombre maximal de membres d'une archive ZIP extraits en parallèle
+EXTRACT_WORKERS = 4
+
+def extract_member(open_member, destination_path):
+    """Écrit un membre d'archive à son chemin final (fichier temporaire puis renommage)"""
+    partial_path = get_partial_path(destination_path)
+    try:
+        with open_member() as source, open(partial_path, 'wb') as destination:
+            shutil.copyfileobj(source, destination, 1024 * 1024)
+        os.replace(partial_path, destination_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+def extract_zip_members(archive_path, members):
+    """Extrait une partie des membres d'une archive ZIP (un descripteur par thread)"""
+    with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+        for member, destination_path in members:
+            extract_member(lambda: zip_ref.open(member), destination_path)
+
 def extract_archive(archive_file, extract_path):
-    """Extrait les fichiers d'une archive et retourne la liste des fichiers extraits"""
+    """
+    Extrait les images d'une archive directement dans extract_path et retourne
+    la liste des fichiers extraits
+    L'archive déjà reçue sur disque est lue sur place (pas de copie), chaque
+    image est écrite en un seul passage à son chemin final, et les membres
+    d'une archive ZIP sont extraits en parallèle
+    Les images sont placées à la racine de extract_path ; si plusieurs
+    membres ont le même nom, le dernier de l'archive est conservé
+    """
     extracted_files = []
+    archive_path = archive_file.temporary_file_path() if hasattr(archive_file, 'temporary_file_path') else None
+    archive_source = archive_path or archive_file.file
+    if archive_path is None:
+        archive_file.seek(0)
+    
+    def get_destination_path(member_name):
+        filename = os.path.basename(member_name)
+        # Fichiers cachés (métadonnées macOS "._photo.jpg", etc.) ignorés
+        if not filename or filename.startswith('.') or not is_image_file(filename):
+            return None
+        return os.path.join(extract_path, filename)
     
     try:
-        # Sauvegarder temporairement le fichier uploadé
-        temp_archive_path = os.path.join(extract_path, 'temp_archive')
-        with open(temp_archive_path, 'wb+') as destination:
-            for chunk in archive_file.chunks():
-                destination.write(chunk)
-        
         # Tenter d'extraire selon le type de fichier
         if archive_file.name.lower().endswith(('.zip',)):
-            with zipfile.ZipFile(temp_archive_path, 'r') as zip_ref:
-                for member in zip_ref.namelist():
-                    if not member.endswith('/') and is_image_file(member):
-                        zip_ref.extract(member, extract_path)
-                        extracted_files.append(os.path.join(extract_path, member))
+            with zipfile.ZipFile(archive_source, 'r') as zip_ref:
+                members = {}
+                for member in zip_ref.infolist():
+                    destination_path = None if member.is_dir() else get_destination_path(member.filename)
+                    if destination_path:
+                        members[destination_path] = member
+                
+                if archive_path is None or len(members) < 2:
+                    for destination_path, member in members.items():
+                        extract_member(lambda: zip_ref.open(member), destination_path)
+            
+            if archive_path is not None and len(members) >= 2:
+                # Répartir les membres entre plusieurs threads (la décompression libère le GIL)
+                worker_count = min(EXTRACT_WORKERS, len(members))
+                items = [(member, destination_path) for destination_path, member in members.items()]
+                with ThreadPoolExecutor(max_workers=worker_count) as executor:
+                    futures = [
+                        executor.submit(extract_zip_members, archive_path, items[i::worker_count])
+                        for i in range(worker_count)
+                    ]
+                    for future in futures:
+                        future.result()
+            extracted_files.extend(members)
         
         elif archive_file.name.lower().endswith(('.tar', '.tar.gz', '.tgz', '.tar.bz2')):
-            with tarfile.open(temp_archive_path, 'r:*') as tar_ref:
-                for member in tar_ref.getmembers():
-                    if member.isfile() and is_image_file(member.name):
-                        tar_ref.extract(member, extract_path)
-                        extracted_files.append(os.path.join(extract_path, member.name))
+            # Lecture séquentielle en flux (archive compressée)
+            tar_args = {'name': archive_path} if archive_path else {'fileobj': archive_source}
+            with tarfile.open(mode='r|*', **tar_args) as tar_ref:
+                for member in tar_ref:
+                    destination_path = get_destination_path(member.name) if member.isfile() else None
+                    if destination_path:
+                        extract_member(lambda: tar_ref.extractfile(member), destination_path)
+                        if destination_path not in extracted_files:
+                            extracted_files.append(destination_path)
     
     except Exception as e:
         raise Exception(f"Erreur lors de l'extraction de l'archive: {str(e)}")
     
     return extracted_files
 
-def save_uploaded_files(album_name, photos=None, compressed_file=None):
-    """Sauvegarde les fichiers uploadés et retourne le nombre de fichiers traités"""
+def keep_source_archive(archive_file, album_dir):
+    """
+    Place une archive ZIP telle quelle dans l'album (ARCHIVE_INGEST_MODE=direct)
+    et retourne la liste de ses images : la conversion les lira directement
+    dans l'archive, sans extraction
+    """
+    archive_path = os.path.join(album_dir, SOURCE_ARCHIVE_NAME)
+    place_uploaded_file(archive_file, archive_path)
+    try:
+        return list_archive_images(archive_path)
+    except Exception as e:
+        os.remove(archive_path)
+        raise Exception(f"Erreur lors de la lecture de l'archive: {str(e)}")
+
+def place_uploaded_file(uploaded_file, file_path):
+    """
+    Place un fichier uploadé à son chemin final
+    Un fichier déjà reçu sur disque est simplement renommé (pas de copie)
+    Le fichier n'apparaît sous son nom final qu'une fois complet (une
+    conversion peut déjà être en cours sur l'album, voir AUTO_CONVERT)
+    """
+    partial_path = get_partial_path(file_path)
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        # Renommage si possible, copie si le dossier temporaire est sur un autre système de fichiers
+        shutil.move(uploaded_file.temporary_file_path(), partial_path)
+    else:
+        with open(partial_path, 'wb+') as destination:
+            for chunk in uploaded_file.chunks():
+                destination.write(chunk)
+    os.replace(partial_path, file_path)
+
+def save_uploaded_files(album_name, photos=None, compressed_file=None, images=None):
+    """
+    Sauvegarde les fichiers uploadés et retourne le nombre de fichiers traités
+    La liste images, si elle est fournie, est complétée avec l'inventaire des
+    fichiers enregistrés (voir converter/manifest.py)
+    """
+    if images is None:
+        images = []
     # Créer le dossier de destination
     album_dir = os.path.join(settings.MEDIA_ROOT, 'albums', album_name)
     os.makedirs(album_dir, exist_ok=True)
@@ -74,140 +181,38 @@ def save_uploaded_files(album_name, photos=None, compressed_file=None):
     if photos:
         for photo in photos:
             if is_image_file(photo.name):
+                # Fichier illisible détecté à la réception (voir HashingFileUploadHandler)
+                image_info = getattr(photo, 'image_info', None)
+                if image_info and 'error' in image_info:
+                    logger.warning(f"Fichier ignoré (image illisible): {photo.name}: {image_info['error']}")
+                    continue
                 file_path = os.path.join(album_dir, photo.name)
-                with open(file_path, 'wb+') as destination:
-                    for chunk in photo.chunks():
-                        destination.write(chunk)
+                place_uploaded_file(photo, file_path)
                 file_count += 1
+                images.append({
+                    'path': photo.name,
+                    'size': photo.size,
+                    'width': image_info.get('width') if image_info else None,
+                    'height': image_info.get('height') if image_info else None,
+                    'sha256': getattr(photo, 'sha256', ''),
+                })
     
-    # Traiter le fichier compressé
+    # Traiter le fichier compressé : les images sont extraites directement dans l'album,
+    # ou lues dans l'archive au moment de la conversion (ZIP uniquement : accès direct aux membres)
     if compressed_file:
-        temp_extract_path = os.path.join(album_dir, 'temp_extract')
-        os.makedirs(temp_extract_path, exist_ok=True)
-        
-        try:
-            extracted_files = extract_archive(compressed_file, temp_extract_path)
-            
-            # Déplacer les fichiers extraits vers le dossier principal
-            for extracted_file in extracted_files:
-                filename = os.path.basename(extracted_file)
-                destination_path = os.path.join(album_dir, filename)
-                shutil.move(extracted_file, destination_path)
-                file_count += 1
-            
-        finally:
-            # Nettoyer le dossier temporaire
-            if os.path.exists(temp_extract_path):
-                shutil.rmtree(temp_extract_path)
+        if settings.ARCHIVE_INGEST_MODE == 'direct' and compressed_file.name.lower().endswith('.zip'):
+            extracted_files = keep_source_archive(compressed_file, album_dir)
+        else:
+            extracted_files = extract_archive(compressed_file, album_dir)
+        file_count += len(extracted_files)
+        for extracted_file in extracted_files:
+            images.append({
+                'path': get_relative_path(extracted_file, album_dir),
+                'size': extracted_file.size if isinstance(extracted_file, ArchiveMember) else os.path.getsize(extracted_file),
+            })
     
     return file_count
 
-def resize_images_with_pillow(input_dir, output_dir, album=None):
-    """
-    Redimensionne toutes les images d'un dossier à 1920x1080 en utilisant Pillow
-    Met à jour la progression si un album est fourni
-    Optimisé pour réduire l'utilisation mémoire
-    """
-    import gc  # Pour forcer le garbage collection
-
-    # Extensions d'images supportées par Pillow
-    image_extensions = ['*.jpg', '*.jpeg', '*.png', '*.tiff', '*.bmp', '*.webp', 
-                       '*.JPG', '*.JPEG', '*.PNG', '*.TIFF', '*.BMP', '*.WEBP']
-    
-    # Trouver tous les fichiers images dans le dossier
-    image_files = []
-    for extension in image_extensions:
-        image_files.extend(glob.glob(os.path.join(input_dir, extension)))
-        # Recherche récursive dans les sous-dossiers
-        image_files.extend(glob.glob(os.path.join(input_dir, '**', extension), recursive=True))
-    
-    if not image_files:
-        raise Exception("Aucune image trouvée dans le dossier")
-    
-    # Créer le dossier de sortie s'il n'existe pas
-    os.makedirs(output_dir, exist_ok=True)
-    
-    total_files = len(image_files)
-    converted_count = 0
-    errors = []
-    
-    for i, image_file in enumerate(image_files):
-        try:
-            # Nom du fichier de sortie
-            output_filename = os.path.basename(image_file)
-            # Changer l'extension en .jpg pour optimiser l'espace
-            name_without_ext = os.path.splitext(output_filename)[0]
-            output_filename = f"{name_without_ext}.jpg"
-            output_path = os.path.join(output_dir, output_filename)
-            
-            # Ouvrir l'image avec Pillow
-            with Image.open(image_file) as img:
-                # Corriger l'orientation EXIF si nécessaire
-                img = ImageOps.exif_transpose(img)
-                
-                # Convertir en RGB si nécessaire (pour les images RGBA, CMYK, etc.)
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    # Créer un fond blanc pour les images transparentes
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'P':
-                        img = img.convert('RGBA')
-                    background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                    img = background
-                elif img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # Redimensionner l'image en conservant les proportions
-                # Utilise LANCZOS pour une meilleure qualité
-                img.thumbnail((1920, 1080), Image.LANCZOS)
-                
-                # Sauvegarder l'image redimensionnée avec une qualité réduite pour économiser l'espace
-                img.save(output_path, 'JPEG', quality=85, optimize=True, progressive=True)
-                
-            converted_count += 1
-            
-            # Calculer le progrès et mettre à jour l'album si fourni
-            progress = ((i + 1) * 100) // total_files
-            
-            if album:
-                # Mettre à jour la progression dans la base de données
-                album.conversion_progress = progress
-                album.current_file_index = i + 1
-                album.current_file_name = output_filename
-                album.save(update_fields=['conversion_progress', 'current_file_index', 'current_file_name'])
-            
-            logger.info(f"Progression: {progress}% ({i + 1}/{total_files}) - {output_filename}")
-            
-            # Forcer le garbage collection toutes les 10 images pour libérer la mémoire
-            if (i + 1) % 10 == 0:
-                gc.collect()
-            
-        except Exception as e:
-            error_msg = f"Erreur lors de la conversion de {image_file}: {str(e)}"
-            logger.error(error_msg)
-            errors.append(error_msg)
-            
-            # Mettre à jour la progression même en cas d'erreur
-            if album:
-                progress = ((i + 1) * 100) // total_files
-                album.conversion_progress = progress
-                album.current_file_index = i + 1
-                album.current_file_name = f"Erreur: {os.path.basename(image_file)}"
-                album.save(update_fields=['conversion_progress', 'current_file_index', 'current_file_name'])
-            
-            # Forcer le garbage collection même en cas d'erreur
-            gc.collect()
-            continue
-
-    # Garbage collection final
-    gc.collect()
-    
-    if errors:
-        logger.warning(f"Conversion terminée avec {len(errors)} erreur(s)")
-        for error in errors[:5]:  # Afficher seulement les 5 premières erreurs
-            logger.warning(error)
-    
-    return converted_count, total_files
-
 def approved_user_required(view_func):
     """Décorateur pour vérifier que l'utilisateur est connecté et approuvé"""
     @wraps(view_func)
@@ -216,24 +221,93 @@ def approved_user_required(view_func):
             messages.error(request, 'Vous devez être connecté pour accéder à cette page.')
             return redirect('login')
         
-        try:
-            user_profile = UserProfile.objects.get(user=request.user)
-            if not user_profile.approved:
-                messages.error(request, 'Votre compte n\'est pas encore approuvé par un administrateur.')
-                return redirect('login')
-        except UserProfile.DoesNotExist:
+        # État d'approbation en cache (voir converter/permissions.py)
+        approval_status = get_approval_status(request.user)
+        if approval_status == PENDING:
+            messages.error(request, 'Votre compte n\'est pas encore approuvé par un administrateur.')
+            return redirect('login')
+        if approval_status == MISSING_PROFILE:
             messages.error(request, 'Profil utilisateur non trouvé.')
             return redirect('login')
         
         return view_func(request, *args, **kwargs)
     return _wrapped_view
 
+# Nombre d'albums par page de la liste
+ALBUMS_PER_PAGE = 50
+
+# Champs de l'album utilisés par la liste (index.html)
+ALBUM_LIST_FIELDS = (
+    'name', 'file_count', 'date', 'conversion_date', 'conversion_status',
+    'conversion_progress', 'upload_complete',
+)
+
+def get_album_cursor(album):
+    """Position d'un album dans la liste (date, id), utilisée dans les liens de pagination"""
+    return f"{album.date.isoformat()}_{album.id}"
+
+def parse_album_cursor(value):
+    """Retourne (date, id) ou None si la position est invalide"""
+    try:
+        date, album_id = value.rsplit('_', 1)
+        return datetime.fromisoformat(date), int(album_id)
+    except (ValueError, TypeError):
+        return None
+
 @approved_user_required
 def index(request):
-    latest_album_list = Album.objects.order_by("-date")
+    """
+    Liste des albums, des plus récents aux plus anciens
+    Pagination par position (date, id) plutôt que par numéro de page : le
+    coût d'une page ne dépend pas du nombre d'albums (index album_date_id_idx)
+    """
+    # Sous-requête corrélée plutôt qu'une jointure groupée : elle n'est évaluée
+    # que pour les albums de la page, après le tri et la limite
+    failed_images = (
+        AlbumImage.objects
+        .filter(album=OuterRef('pk'), status='error')
+        .order_by()
+        .values('album')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    albums = Album.objects.only(*ALBUM_LIST_FIELDS).annotate(
+        failed_count=Coalesce(Subquery(failed_images, output_field=IntegerField()), 0),
+    )
+
+    status = request.GET.get('status', '')
+    if status in dict(Album.CONVERSION_STATUS_CHOICES):
+        albums = albums.filter(conversion_status=status)
+    else:
+        status = ''
+
+    before = parse_album_cursor(request.GET.get('before', ''))
+    after = parse_album_cursor(request.GET.get('after', ''))
+    if after:
+        # Page précédente : albums plus récents que le premier de la page, lus dans l'ordre croissant
+        date, album_id = after
+        albums = albums.filter(Q(date__gt=date) | Q(date=date, id__gt=album_id)).order_by('date', 'id')
+        latest_album_list = list(albums[:ALBUMS_PER_PAGE + 1])
+        has_newer = len(latest_album_list) > ALBUMS_PER_PAGE
+        latest_album_list = latest_album_list[:ALBUMS_PER_PAGE][::-1]
+        has_older = True
+    else:
+        if before:
+            date, album_id = before
+            albums = albums.filter(Q(date__lt=date) | Q(date=date, id__lt=album_id))
+        albums = albums.order_by('-date', '-id')
+        latest_album_list = list(albums[:ALBUMS_PER_PAGE + 1])
+        has_older = len(latest_album_list) > ALBUMS_PER_PAGE
+        latest_album_list = latest_album_list[:ALBUMS_PER_PAGE]
+        has_newer = before is not None
+
     template = loader.get_template("converter/index.html")
     context = {
         "latest_album_list": latest_album_list,
+        "status": status,
+        "status_choices": Album.CONVERSION_STATUS_CHOICES,
+        "newer_cursor": get_album_cursor(latest_album_list[0]) if has_newer and latest_album_list else None,
+        "older_cursor": get_album_cursor(latest_album_list[-1]) if has_older and latest_album_list else None,
     }
     return HttpResponse(template.render(context, request))
 
@@ -245,20 +319,25 @@ def add(request):
             try:
                 album_name = form.cleaned_data['name']
                 # Nettoyer le nom de l'album : remplacer les caractères problématiques
-                album_name = album_name.replace('/', '-').replace('\\', '-')
+                album_name = clean_album_name(album_name)
                 photos = request.FILES.getlist('photos')
                 compressed_file = form.cleaned_data.get('compressed_file')
                 
                 # Sauvegarder les fichiers et compter
-                file_count = save_uploaded_files(album_name, photos, compressed_file)
+                images = []
+                file_count = save_uploaded_files(album_name, photos, compressed_file, images)
                 
                 if file_count > 0:
                     # Créer l'album dans la base de données
                     album = Album.objects.create(
                         name=album_name,
                         old_path=os.path.join(settings.MEDIA_ROOT, 'albums', album_name),
-                        file_count=file_count
+                        file_count=file_count,
+                        conversion_profile=form.cleaned_data['conversion_profile'],
                     )
+                    add_album_images(album, images)
+                    if settings.AUTO_CONVERT:
+                        enqueue_conversion(album)
                     
                     messages.success(request, f'Album "{album_name}" créé avec succès ! {file_count} fichier(s) uploadé(s).')
                     return redirect('index')
@@ -274,7 +353,11 @@ def add(request):
     else:
         form = AlbumUploadForm()
     
-    return render(request, 'converter/upload.html', {'form': form})
+    return render(request, 'converter/upload.html', {
+        'form': form,
+        'upload_chunk_size': settings.UPLOAD_CHUNK_SIZE,
+        'upload_parallel_chunks': settings.UPLOAD_PARALLEL_CHUNKS,
+    })
 
 @approved_user_required
 def delete(request):
@@ -287,6 +370,10 @@ def delete(request):
             album_path = album.old_path
             if os.path.exists(album_path):
                 shutil.rmtree(album_path)
+            # Sortie partielle d'une conversion interrompue ; une conversion en cours
+            # s'arrête d'elle-même en constatant la suppression de l'album
+            shutil.rmtree(get_output_dir(album_path), ignore_errors=True)
+            remove_album_archive(album)
             
             # Supprimer l'enregistrement de la base de données
             album_name = album.name
@@ -311,40 +398,24 @@ def download(request, album_id):
             messages.error(request, 'Le dossier de l\'album n\'existe pas.')
             return redirect('index')
         
-        # Créer un fichier ZIP temporaire
-        import tempfile
-        import re
-        temp_dir = tempfile.mkdtemp()
+        zip_filename = get_download_filename(album)
         
-        # Nettoyer le nom du fichier pour éviter les problèmes
-        safe_name = re.sub(r'[^a-zA-Z0-9_\-\s]', '', album.name)
-        safe_name = re.sub(r'\s+', '_', safe_name.strip())
-        zip_filename = f"{safe_name}.zip"
-        zip_path = os.path.join(temp_dir, zip_filename)
+        # Archive préconstruite à la fin de la conversion : envoi direct (reprise possible)
+        archive_path = get_album_archive(album)
+        if archive_path:
+            return serve_file(request, archive_path, zip_filename)
         
-        try:
-            # Créer le fichier ZIP
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                for root, dirs, files in os.walk(album_path):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        # Nom relatif dans le ZIP
-                        arcname = os.path.relpath(file_path, album_path)
-                        zip_file.write(file_path, arcname)
-            
-            # Retourner le fichier en téléchargement
-            with open(zip_path, 'rb') as zip_file:
-                response = HttpResponse(zip_file.read(), content_type='application/zip')
-                response['Content-Disposition'] = f'attachment; filename="{smart_str(zip_filename)}"'
-                
-            return response
-            
-        finally:
-            # Nettoyer le fichier temporaire
-            if os.path.exists(zip_path):
-                os.remove(zip_path)
-            if os.path.exists(temp_dir):
-                os.rmdir(temp_dir)
+        # Sinon l'archive est générée au fil de l'envoi (mémoire constante, pas de fichier temporaire)
+        # à partir de l'inventaire de l'album (ou du contenu du dossier pour les anciens albums)
+        album_files = get_album_files(album)
+        if album_files is None:
+            album_files = iter_album_files(album_path)
+        response = StreamingHttpResponse(
+            iter_zip(album_files),
+            content_type='application/zip',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{smart_str(zip_filename)}"'
+        return response
                 
     except Album.DoesNotExist:
         raise Http404("Album non trouvé")
@@ -373,104 +444,20 @@ def convert(request):
                 messages.error(request, error_msg)
                 return redirect('index')
             
-            # Mettre le statut à "en cours de conversion" et réinitialiser la progression
-            album.conversion_status = 'converting'
-            album.conversion_progress = 0
-            album.current_file_index = 0
-            album.current_file_name = ''
-            album.save()
+            # Ajouter la conversion à la file d'attente (exécutée par la commande conversion_worker)
+            job = enqueue_conversion(album)
             
-            # Pour les requêtes AJAX, démarrer la conversion en arrière-plan
+            # Pour les requêtes AJAX, répondre en JSON
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or 'fetch' in request.META.get('HTTP_SEC_FETCH_MODE', ''):
-                # Importer threading pour exécuter en arrière-plan
-                import threading
-                
-                def background_conversion():
-                    try:
-                        # Créer le nom du dossier de sortie (avec suffixe _resized)
-                        base_dir = os.path.dirname(source_dir)
-                        dir_name = os.path.basename(source_dir)
-                        output_dir = os.path.join(base_dir, f"{dir_name}_resized")
-                        
-                        # Effectuer la conversion avec Pillow
-                        converted_count, total_files = resize_images_with_pillow(source_dir, output_dir, album)
-                        
-                        if converted_count > 0:
-                            # Supprimer l'ancien dossier et renommer le nouveau
-                            if os.path.exists(source_dir):
-                                shutil.rmtree(source_dir)
-                            os.rename(output_dir, source_dir)
-                            
-                            # Mettre à jour la base de données
-                            album.conversion_status = 'completed'
-                            album.conversion_date = timezone.now()
-                            album.conversion_progress = 100
-                            album.save()
-                        else:
-                            album.conversion_status = 'error'
-                            album.save()
-                            # Nettoyer le dossier de sortie s'il est vide
-                            if os.path.exists(output_dir) and not os.listdir(output_dir):
-                                os.rmdir(output_dir)
-                    except Exception as e:
-                        # En cas d'erreur, mettre le statut à "error"
-                        album.conversion_status = 'error'
-                        album.save()
-                        logger.error(f'Erreur lors de la conversion: {str(e)}')
-                        # En cas d'erreur, nettoyer le dossier de sortie s'il existe
-                        if 'output_dir' in locals() and os.path.exists(output_dir):
-                            try:
-                                shutil.rmtree(output_dir)
-                            except:
-                                pass
-                
-                # Démarrer la conversion en arrière-plan
-                thread = threading.Thread(target=background_conversion)
-                thread.daemon = True
-                thread.start()
-                
                 return JsonResponse({
                     'success': True, 
-                    'message': f'Conversion de l\'album "{album.name}" démarrée',
-                    'album_id': album.id
+                    'message': f'Conversion de l\'album "{album.name}" ajoutée à la file d\'attente',
+                    'album_id': album.id,
+                    'job_id': job.id,
                 })
             
-            # Pour les requêtes classiques (form submit), traitement synchrone
-            else:
-                # Créer le nom du dossier de sortie (avec suffixe _resized)
-                base_dir = os.path.dirname(source_dir)
-                dir_name = os.path.basename(source_dir)
-                output_dir = os.path.join(base_dir, f"{dir_name}_resized")
-                
-                # Effectuer la conversion avec Pillow
-                messages.info(request, f'Début de la conversion de l\'album "{album.name}"...')
-                
-                converted_count, total_files = resize_images_with_pillow(source_dir, output_dir, album)
-                
-                if converted_count > 0:
-                    # Supprimer l'ancien dossier et renommer le nouveau
-                    if os.path.exists(source_dir):
-                        shutil.rmtree(source_dir)
-                    os.rename(output_dir, source_dir)
-                    
-                    # Mettre à jour la base de données
-                    album.conversion_status = 'completed'
-                    album.conversion_date = timezone.now()
-                    album.save()
-                    
-                    messages.success(request, 
-                        f'Album "{album.name}" converti avec succès ! '
-                        f'{converted_count}/{total_files} images redimensionnées à 1920x1080.'
-                    )
-                else:
-                    album.conversion_status = 'error'
-                    album.save()
-                    messages.error(request, 'Aucune image n\'a pu être convertie.')
-                    # Nettoyer le dossier de sortie s'il est vide
-                    if os.path.exists(output_dir) and not os.listdir(output_dir):
-                        os.rmdir(output_dir)
-                
-                return redirect('index')
+            messages.info(request, f'Conversion de l\'album "{album.name}" ajoutée à la file d\'attente.')
+            return redirect('index')
             
         except Album.DoesNotExist:
             error_msg = 'Album non trouvé.'
@@ -486,6 +473,53 @@ def convert(request):
     
     return redirect('index')
 
+@approved_user_required
+def retry_failed(request):
+    """Nouvel essai des seules images en échec d'un album converti"""
+    if request.method == 'POST' and 'album_id' in request.POST:
+        try:
+            album = Album.objects.get(id=request.POST.get('album_id'))
+            failed_count = album.images.filter(status='error').count()
+            if album.conversion_status != 'completed' or not failed_count:
+                messages.error(request, f'Aucune image en échec à convertir dans l\'album "{album.name}".')
+                return redirect('index')
+            
+            enqueue_conversion(album, failed_only=True)
+            messages.info(request, f'Nouvel essai de {failed_count} image(s) en échec de l\'album "{album.name}" ajouté à la file d\'attente.')
+            
+        except Album.DoesNotExist:
+            messages.error(request, 'Album non trouvé.')
+        except Exception as e:
+            error_msg = f'Erreur lors de la conversion: {str(e)}'
+            logger.error(error_msg)
+            messages.error(request, error_msg)
+    
+    return redirect('index')
+
+@approved_user_required
+def cancel(request):
+    """Annule la conversion (en file d'attente ou en cours) d'un album"""
+    if request.method == 'POST' and 'album_id' in request.POST:
+        try:
+            album = Album.objects.get(id=request.POST.get('album_id'))
+            job = cancel_conversion(album)
+            if job is None:
+                messages.error(request, f'Aucune conversion en cours pour l\'album "{album.name}".')
+            elif job.status == 'cancelled':
+                messages.info(request, f'Conversion de l\'album "{album.name}" annulée.')
+            else:
+                # Le worker s'arrête après les images en cours de traitement
+                messages.info(request, f'Annulation de la conversion de l\'album "{album.name}" demandée.')
+            
+        except Album.DoesNotExist:
+            messages.error(request, 'Album non trouvé.')
+        except Exception as e:
+            error_msg = f'Erreur lors de l\'annulation: {str(e)}'
+            logger.error(error_msg)
+            messages.error(request, error_msg)
+    
+    return redirect('index')
+
 @approved_user_required
 def debug_settings(request):
     """Vue de debug pour afficher les paramètres d'upload"""
@@ -502,38 +536,40 @@ def debug_settings(request):
     return HttpResponse(debug_info)
 
 @approved_user_required
-def get_conversion_progress(request, album_id):
-    """Vue AJAX pour récupérer la progression de conversion d'un album"""
+def get_conversion_progress(request, album_id=None):
+    """
+    Vue AJAX pour récupérer la progression de conversion d'un album, ou de
+    plusieurs albums en une requête (/progress/?ids=1,2,3)
+    """
+    if album_id is None:
+        return get_conversions_progress(request)
     try:
-        album = Album.objects.get(id=album_id)
-        
-        data = {
-            'album_id': album.id,
-            'album_name': album.name,
-            'status': album.conversion_status,
-            'progress': album.conversion_progress,
-            'current_file_index': album.current_file_index,
-            'current_file_name': album.current_file_name,
-            'total_files': album.file_count,
-        }
-        
-        # Ajouter des informations supplémentaires selon le statut
-        if album.conversion_status == 'completed':
-            data['completion_date'] = album.conversion_date.strftime('%d/%m/%Y %H:%M:%S') if album.conversion_date else None
-            data['message'] = f'Conversion terminée ! {album.current_file_index}/{album.file_count} images traitées.'
-        elif album.conversion_status == 'converting':
-            data['message'] = f'Conversion en cours... {album.current_file_index}/{album.file_count} images'
-            if album.current_file_name:
-                data['current_message'] = f'Traitement de: {album.current_file_name}'
-        elif album.conversion_status == 'error':
-            data['message'] = 'Erreur lors de la conversion'
-            data['error'] = True
-        else:  # pending
-            data['message'] = 'En attente de conversion'
-        
+        data = get_albums_progress([album_id]).get(album_id)
+        if data is None:
+            raise Album.DoesNotExist
         return JsonResponse(data)
         
     except Album.DoesNotExist:
         return JsonResponse({'error': 'Album non trouvé'}, status=404)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
+
+def get_conversions_progress(request):
+    """
+    Progression de plusieurs albums : {"albums": {id: données}}
+    L'ETag dépend des valeurs de progression : tant que rien ne change, le
+    navigateur reçoit une réponse 304 vide
+    """
+    album_ids = parse_album_ids(request.GET.get('ids', ''))
+    if not album_ids:
+        return JsonResponse({'error': 'Paramètre ids invalide'}, status=400)
+
+    albums = get_albums_progress(album_ids)
+    etag = f'"{get_progress_version(albums)}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse({'albums': albums})
+    response['ETag'] = etag
+    # Toujours revalider auprès du serveur (réponse 304 si inchangée)
+    response['Cache-Control'] = 'no-cache'
+    return response
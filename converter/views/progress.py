@@ -0,0 +1,124 @@
+"""
+Suivi en direct de la progression de plusieurs albums sur une seule connexion.
+
+GET /progress/stream/?ids=1,2,3
+
+- Servi en ASGI (RockyConverterWeb.asgi) : flux Server-Sent Events. Seules
+  les progressions qui ont changé sont envoyées (événement "progress", un
+  album par événement) ; un événement "done" est envoyé quand plus aucun des
+  albums n'est en cours de conversion ou d'annulation.
+- Sinon (WSGI, ou paramètre transport=poll) : long-polling. La réponse JSON
+  {"version": ..., "albums": {...}} est envoyée dès que la progression
+  diffère de la version "since" transmise par le client, ou à l'expiration du délai.
+
+Les droits de l'utilisateur ne sont vérifiés qu'une fois par connexion.
+"""
+
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+
+from ..permissions import APPROVED, get_approval_status
+from ..progress import get_albums_progress, get_progress_version
+
+# Durée maximale d'une connexion SSE (le navigateur se reconnecte automatiquement)
+STREAM_MAX_DURATION = 300
+# Commentaire envoyé périodiquement pour garder la connexion ouverte (proxies)
+STREAM_KEEPALIVE_INTERVAL = 15
+# Attente maximale d'une requête de long-polling
+LONG_POLL_TIMEOUT = 25
+# Nombre maximal d'albums suivis par connexion
+MAX_WATCHED_ALBUMS = 100
+
+
+async def is_approved_user(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return False
+    return await sync_to_async(get_approval_status)(user) == APPROVED
+
+
+def parse_album_ids(value):
+    try:
+        album_ids = {int(album_id) for album_id in value.split(',') if album_id.strip()}
+    except ValueError:
+        return None
+    return sorted(album_ids)[:MAX_WATCHED_ALBUMS]
+
+
+def is_finished(albums):
+    return all(data['status'] not in ('converting', 'cancelling') for data in albums.values())
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_progress(album_ids):
+    """Flux SSE : un événement par album dont la progression a changé"""
+    sent = {}
+    started = time.monotonic()
+    last_write = started
+    interval = max(settings.CONVERSION_PROGRESS_INTERVAL, 0.5)
+
+    # Délai de reconnexion du navigateur après la fin du flux
+    yield "retry: 2000\n\n"
+    while time.monotonic() - started < STREAM_MAX_DURATION:
+        albums = await sync_to_async(get_albums_progress)(album_ids)
+        for album_id, data in albums.items():
+            if sent.get(album_id) != data:
+                sent[album_id] = data
+                last_write = time.monotonic()
+                yield format_event('progress', data)
+
+        if is_finished(albums):
+            yield format_event('done', {'album_ids': sorted(albums)})
+            return
+
+        if time.monotonic() - last_write >= STREAM_KEEPALIVE_INTERVAL:
+            last_write = time.monotonic()
+            yield ": keepalive\n\n"
+        await asyncio.sleep(interval)
+
+
+async def long_poll_progress(album_ids, since, timeout):
+    """Attend que la progression diffère de la version since (ou l'expiration du délai)"""
+    deadline = time.monotonic() + timeout
+    interval = max(settings.CONVERSION_PROGRESS_INTERVAL, 0.5)
+    while True:
+        albums = await sync_to_async(get_albums_progress)(album_ids)
+        version = get_progress_version(albums)
+        if version != since or is_finished(albums) or time.monotonic() >= deadline:
+            return {'version': version, 'albums': albums}
+        await asyncio.sleep(interval)
+
+
+async def progress_stream(request):
+    if not await is_approved_user(request):
+        return JsonResponse({'error': 'Authentification requise'}, status=403)
+
+    album_ids = parse_album_ids(request.GET.get('ids', ''))
+    if not album_ids:
+        return JsonResponse({'error': 'Paramètre ids invalide'}, status=400)
+
+    # SSE uniquement en ASGI : en WSGI, la connexion bloquerait un worker
+    is_asgi = isinstance(request, ASGIRequest)
+    wants_stream = 'text/event-stream' in request.headers.get('Accept', '') and request.GET.get('transport') != 'poll'
+    if is_asgi and wants_stream:
+        response = StreamingHttpResponse(stream_progress(album_ids), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Pas de mise en tampon par nginx
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    # Long-polling ; en WSGI la réponse est immédiate (le client interroge à intervalle régulier)
+    timeout = LONG_POLL_TIMEOUT if is_asgi else 0
+    data = await long_poll_progress(album_ids, request.GET.get('since', ''), timeout)
+    response = JsonResponse(data)
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,374 @@
+"""
+Upload des albums en plusieurs morceaux, reprenable.
+
+1. POST /uploads/ : crée une session d'upload (nom de l'album, profil de
+   conversion, liste des fichiers avec leur taille)
+2. PUT /uploads/<session>/files/<fichier>/chunks/<numéro>/ : envoie un
+   morceau (corps brut, en-tête X-Chunk-Checksum facultatif : SHA-256 du morceau)
+3. GET /uploads/<session>/ : liste les morceaux encore manquants (reprise)
+4. POST /uploads/<session>/finalize/ : crée l'album à partir des fichiers reçus
+
+Avec AUTO_CONVERT, l'album est créé et sa conversion mise en file d'attente
+dès la création de la session : chaque fichier est placé dans l'album dès
+que son dernier morceau est reçu, et la conversion le prend en charge
+pendant l'envoi des fichiers suivants ; la finalisation marque la fin de l'upload.
+
+Chaque morceau est écrit directement à sa position dans le fichier de
+destination, sans être gardé en mémoire ; les morceaux peuvent être envoyés
+en parallèle et dans n'importe quel ordre.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.files.uploadedfile import UploadedFile
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_http_methods
+
+from ..imaging import CONVERTIBLE_EXTENSIONS, probe_image
+from ..jobs import enqueue_conversion
+from ..manifest import add_album_images
+from ..models import Album, UploadChunk, UploadFile, UploadSession
+from .converter import approved_user_required, clean_album_name, is_image_file, save_uploaded_files
+
+logger = logging.getLogger(__name__)
+
+# Archives acceptées (voir extract_archive)
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2')
+
+# Taille des lectures du corps des requêtes
+READ_SIZE = 64 * 1024
+
+
+class AssembledUploadedFile(UploadedFile):
+    """Fichier reconstitué à partir de ses morceaux, utilisable comme un fichier uploadé"""
+
+    def __init__(self, file_path, name, size):
+        super().__init__(open(file_path, 'rb'), name, 'application/octet-stream', size)
+        self.file_path = file_path
+        self.image_info = probe_image(file_path) if name.lower().endswith(CONVERTIBLE_EXTENSIONS) else None
+
+    def temporary_file_path(self):
+        return self.file_path
+
+
+def get_session_dir(session):
+    return os.path.join(settings.FILE_UPLOAD_TEMP_DIR, 'sessions', str(session.token))
+
+
+def get_upload_file_path(upload_file):
+    return os.path.join(get_session_dir(upload_file.session), f'{upload_file.index}.upload')
+
+
+def get_missing_chunks(upload_file):
+    received = set(upload_file.chunks.values_list('number', flat=True))
+    return [number for number in range(upload_file.total_chunks) if number not in received]
+
+
+def get_session_status(session):
+    files = []
+    for upload_file in session.files.all():
+        files.append({
+            'index': upload_file.index,
+            'name': upload_file.name,
+            'size': upload_file.size,
+            'total_chunks': upload_file.total_chunks,
+            'missing_chunks': get_missing_chunks(upload_file),
+        })
+    return {
+        'session_id': str(session.token),
+        'status': session.status,
+        'chunk_size': session.chunk_size,
+        'files': files,
+    }
+
+
+def get_user_session(request, session_id):
+    return UploadSession.objects.filter(token=session_id, user=request.user).first()
+
+
+def remove_session_files(session):
+    shutil.rmtree(get_session_dir(session), ignore_errors=True)
+
+
+def place_completed_file(session, upload_file):
+    """
+    Place un fichier entièrement reçu dans l'album de la session (AUTO_CONVERT) :
+    image déplacée, archive extraite ; retourne le nombre d'images ajoutées
+    """
+    # Mise à jour conditionnelle : le dernier morceau peut être reçu deux fois en parallèle
+    if not UploadFile.objects.filter(pk=upload_file.pk, placed=False).update(placed=True):
+        return 0
+
+    uploaded = AssembledUploadedFile(get_upload_file_path(upload_file), upload_file.name, upload_file.size)
+    images = []
+    try:
+        if upload_file.name.lower().endswith(ARCHIVE_EXTENSIONS):
+            file_count = save_uploaded_files(session.album_name, compressed_file=uploaded, images=images)
+        elif is_image_file(upload_file.name):
+            file_count = save_uploaded_files(session.album_name, photos=[uploaded], images=images)
+        else:
+            file_count = 0
+    except Exception:
+        UploadFile.objects.filter(pk=upload_file.pk).update(placed=False)
+        raise
+    finally:
+        uploaded.close()
+
+    add_album_images(session.album, images)
+    Album.objects.filter(pk=session.album_id).update(uploaded_count=F('uploaded_count') + file_count)
+    return file_count
+
+
+@approved_user_required
+@require_http_methods(['POST'])
+def create_upload(request):
+    try:
+        data = json.loads(request.body)
+        album_name = clean_album_name(data['name'].strip())
+        files = data['files']
+        conversion_profile = data.get('conversion_profile', 'default')
+        chunk_size = int(data.get('chunk_size') or settings.UPLOAD_CHUNK_SIZE)
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Requête invalide'}, status=400)
+
+    if not album_name or not files:
+        return JsonResponse({'error': 'Nom de l\'album et fichiers requis'}, status=400)
+    if conversion_profile not in settings.CONVERSION_PROFILES:
+        return JsonResponse({'error': 'Profil de conversion inconnu'}, status=400)
+    if not 0 < chunk_size <= settings.UPLOAD_CHUNK_MAX_SIZE:
+        return JsonResponse({'error': f'Taille de morceau invalide (maximum {settings.UPLOAD_CHUNK_MAX_SIZE})'}, status=400)
+    if not isinstance(files, list):
+        return JsonResponse({'error': 'Liste de fichiers invalide'}, status=400)
+    if len(files) > settings.DATA_UPLOAD_MAX_NUMBER_FILES:
+        return JsonResponse({'error': 'Trop de fichiers'}, status=400)
+
+    try:
+        upload_files = [(os.path.basename(str(file_info['name'])), file_info['size']) for file_info in files]
+    except (KeyError, TypeError):
+        return JsonResponse({'error': 'Liste de fichiers invalide'}, status=400)
+    # Tailles entières et positives : elles déterminent les morceaux attendus et leur position
+    if any(type(size) is not int or size < 0 for _, size in upload_files):
+        return JsonResponse({'error': 'Taille de fichier invalide'}, status=400)
+    # Même limite que l'upload par formulaire (client_max_body_size de nginx)
+    if sum(size for _, size in upload_files) > settings.UPLOAD_MAX_SIZE:
+        return JsonResponse({'error': f'Album trop volumineux (maximum {settings.UPLOAD_MAX_SIZE} octets)'}, status=400)
+
+    # Mêmes règles que le formulaire : des images et/ou une seule archive
+    archives = [name for name, _ in upload_files if name.lower().endswith(ARCHIVE_EXTENSIONS)]
+    if len(archives) > 1:
+        return JsonResponse({'error': 'Une seule archive par album'}, status=400)
+
+    session = UploadSession.objects.create(
+        user=request.user,
+        album_name=album_name,
+        conversion_profile=conversion_profile,
+        chunk_size=chunk_size,
+    )
+    UploadFile.objects.bulk_create(
+        UploadFile(session=session, index=index, name=name, size=size)
+        for index, (name, size) in enumerate(upload_files)
+    )
+
+    os.makedirs(get_session_dir(session), exist_ok=True)
+
+    if settings.AUTO_CONVERT:
+        # L'album est converti au fur et à mesure de l'upload
+        album_path = os.path.join(settings.MEDIA_ROOT, 'albums', album_name)
+        os.makedirs(album_path, exist_ok=True)
+        session.album = Album.objects.create(
+            name=album_name,
+            old_path=album_path,
+            conversion_profile=conversion_profile,
+            upload_complete=False,
+            upload_activity=timezone.now(),
+        )
+        session.save(update_fields=['album'])
+        enqueue_conversion(session.album)
+
+    return JsonResponse(get_session_status(session), status=201)
+
+
+@approved_user_required
+@require_http_methods(['GET'])
+def upload_status(request, session_id):
+    session = get_user_session(request, session_id)
+    if session is None:
+        return JsonResponse({'error': 'Session d\'upload non trouvée'}, status=404)
+    return JsonResponse(get_session_status(session))
+
+
+@approved_user_required
+@require_http_methods(['PUT'])
+def upload_chunk(request, session_id, file_index, number):
+    session = get_user_session(request, session_id)
+    if session is None or session.status != 'open':
+        return JsonResponse({'error': 'Session d\'upload non trouvée'}, status=404)
+
+    upload_file = session.files.filter(index=file_index).first()
+    if upload_file is None or not 0 <= number < upload_file.total_chunks:
+        return JsonResponse({'error': 'Morceau invalide'}, status=404)
+
+    offset = number * session.chunk_size
+    expected_size = min(session.chunk_size, upload_file.size - offset)
+    if request.META.get('CONTENT_LENGTH') != str(expected_size):
+        return JsonResponse({'error': f'Taille du morceau incorrecte (attendu: {expected_size} octets)'}, status=400)
+
+    # Écriture au fil de la lecture, à la position du morceau dans le fichier
+    hasher = hashlib.sha256()
+    received = 0
+    fd = os.open(get_upload_file_path(upload_file), os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        while received < expected_size:
+            data = request.read(min(READ_SIZE, expected_size - received))
+            if not data:
+                break
+            os.pwrite(fd, data, offset + received)
+            hasher.update(data)
+            received += len(data)
+    finally:
+        os.close(fd)
+
+    if received != expected_size:
+        return JsonResponse({'error': 'Morceau incomplet'}, status=400)
+
+    checksum = hasher.hexdigest()
+    expected_checksum = request.META.get('HTTP_X_CHUNK_CHECKSUM', '').lower()
+    if expected_checksum and expected_checksum != checksum:
+        # Les données écrites ont pu remplacer un morceau déjà reçu : il est à renvoyer
+        UploadChunk.objects.filter(upload_file=upload_file, number=number).delete()
+        return JsonResponse({'error': 'Somme de contrôle incorrecte', 'checksum': checksum}, status=400)
+
+    try:
+        UploadChunk.objects.update_or_create(
+            upload_file=upload_file,
+            number=number,
+            defaults={'size': received, 'checksum': checksum},
+        )
+    except IntegrityError:
+        # Même morceau envoyé deux fois en parallèle : il est déjà enregistré
+        pass
+
+    if session.album_id:
+        # Signe de vie de l'upload pour la conversion en cours (AUTO_CONVERT_IDLE_TIMEOUT)
+        Album.objects.filter(pk=session.album_id).update(upload_activity=timezone.now())
+
+    if session.album_id and not get_missing_chunks(upload_file):
+        # Fichier complet : il peut être converti sans attendre la fin de l'upload
+        try:
+            place_completed_file(session, upload_file)
+        except Exception as e:
+            # Nouvel essai à la finalisation
+            logger.error(f'Erreur lors du placement de "{upload_file.name}" dans l\'album "{session.album_name}": {str(e)}')
+
+    return JsonResponse({'number': number, 'checksum': checksum}, status=201)
+
+
+@approved_user_required
+@require_http_methods(['POST'])
+def finalize_upload(request, session_id):
+    session = get_user_session(request, session_id)
+    if session is None:
+        return JsonResponse({'error': 'Session d\'upload non trouvée'}, status=404)
+    if session.status == 'finalized':
+        return JsonResponse({'success': True, 'album_id': session.album_id, 'redirect': reverse('index')})
+
+    upload_files = list(session.files.all())
+    missing = {upload_file.index: get_missing_chunks(upload_file) for upload_file in upload_files}
+    missing = {index: chunks for index, chunks in missing.items() if chunks}
+    if missing:
+        return JsonResponse({'error': 'Morceaux manquants', 'missing_chunks': missing}, status=409)
+
+    # Mise à jour conditionnelle : une seule finalisation à la fois
+    if not UploadSession.objects.filter(pk=session.pk, status='open').update(status='finalizing'):
+        return JsonResponse({'error': 'Upload déjà en cours de finalisation'}, status=409)
+
+    if session.album_id:
+        return finalize_album_upload(request, session, upload_files)
+
+    photos = []
+    compressed_file = None
+    try:
+        for upload_file in upload_files:
+            uploaded = AssembledUploadedFile(get_upload_file_path(upload_file), upload_file.name, upload_file.size)
+            if upload_file.name.lower().endswith(ARCHIVE_EXTENSIONS):
+                compressed_file = uploaded
+            elif is_image_file(upload_file.name):
+                photos.append(uploaded)
+            else:
+                uploaded.close()
+
+        images = []
+        file_count = save_uploaded_files(session.album_name, photos, compressed_file, images)
+    except Exception as e:
+        logger.error(f'Erreur lors de la finalisation de l\'upload "{session.album_name}": {str(e)}')
+        UploadSession.objects.filter(pk=session.pk).update(status='open')
+        return JsonResponse({'error': f'Erreur lors de l\'upload: {str(e)}'}, status=500)
+    finally:
+        for uploaded in photos + ([compressed_file] if compressed_file else []):
+            uploaded.close()
+
+    if file_count == 0:
+        UploadSession.objects.filter(pk=session.pk).update(status='open')
+        return JsonResponse({'error': 'Aucun fichier valide n\'a été uploadé.'}, status=400)
+
+    album = Album.objects.create(
+        name=session.album_name,
+        old_path=os.path.join(settings.MEDIA_ROOT, 'albums', session.album_name),
+        file_count=file_count,
+        conversion_profile=session.conversion_profile,
+    )
+    add_album_images(album, images)
+    session.status = 'finalized'
+    session.album = album
+    session.save(update_fields=['status', 'album'])
+    remove_session_files(session)
+    if settings.AUTO_CONVERT:
+        enqueue_conversion(album)
+
+    messages.success(request, f'Album "{album.name}" créé avec succès ! {file_count} fichier(s) uploadé(s).')
+    return JsonResponse({'success': True, 'album_id': album.id, 'file_count': file_count, 'redirect': reverse('index')})
+
+
+def finalize_album_upload(request, session, upload_files):
+    """Fin d'un upload dont l'album est déjà en cours de conversion (AUTO_CONVERT)"""
+    try:
+        for upload_file in upload_files:
+            if not upload_file.placed:
+                place_completed_file(session, upload_file)
+    except Exception as e:
+        logger.error(f'Erreur lors de la finalisation de l\'upload "{session.album_name}": {str(e)}')
+        UploadSession.objects.filter(pk=session.pk).update(status='open')
+        return JsonResponse({'error': f'Erreur lors de l\'upload: {str(e)}'}, status=500)
+
+    # Verrou partagé avec conversion.pause_conversion : la conversion en cours voit
+    # la fin de l'upload, ou s'est mise en pause avant et doit être relancée
+    with transaction.atomic():
+        album = Album.objects.select_for_update().get(pk=session.album_id)
+        if album.uploaded_count == 0:
+            UploadSession.objects.filter(pk=session.pk).update(status='open')
+            return JsonResponse({'error': 'Aucun fichier valide n\'a été uploadé.'}, status=400)
+
+        # La conversion en cours traite les derniers fichiers puis se termine
+        album.file_count = album.uploaded_count
+        album.upload_complete = True
+        album.save(update_fields=['file_count', 'upload_complete'])
+        if album.conversion_status in ('pending', 'error'):
+            # Conversion en pause (AUTO_CONVERT_IDLE_TIMEOUT) ou en erreur : les images déjà
+            # converties sont conservées (reprise), seules les autres sont converties
+            enqueue_conversion(album)
+    session.status = 'finalized'
+    session.save(update_fields=['status'])
+    remove_session_files(session)
+
+    messages.success(request, f'Album "{album.name}" créé avec succès ! {album.file_count} fichier(s) uploadé(s).')
+    return JsonResponse({'success': True, 'album_id': album.id, 'file_count': album.file_count, 'redirect': reverse('index')})
@@ -0,0 +1,84 @@
+"""
+Génération d'archives ZIP en flux.
+
+L'archive est produite au fil de la lecture des fichiers, sans fichier
+temporaire ni copie complète en mémoire : la mémoire utilisée reste constante
+quelle que soit la taille de l'album, et les premiers octets sont envoyés
+immédiatement. Les images déjà compressées (JPEG, PNG, WebP) sont stockées
+sans recompression ; Zip64 est utilisé automatiquement au-delà de 4 Go.
+"""
+
+import os
+import zipfile
+
+
+# Taille des blocs lus et envoyés
+ZIP_CHUNK_SIZE = 1024 * 1024
+
+# Formats déjà compressés : stockés tels quels (la compression ne ferait que coûter du CPU)
+STORED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.zip', '.gz', '.mp4')
+
+
+class _StreamBuffer:
+    """Flux non positionnable dans lequel zipfile écrit ; vidé après chaque bloc"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def get_compress_type(filename):
+    if filename.lower().endswith(STORED_EXTENSIONS):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def iter_album_files(album_path):
+    """Fichiers d'un dossier, triés : [(chemin, nom dans l'archive)]"""
+    files = []
+    for root, dirs, filenames in os.walk(album_path):
+        dirs.sort()
+        for filename in sorted(filenames):
+            file_path = os.path.join(root, filename)
+            files.append((file_path, os.path.relpath(file_path, album_path)))
+    return files
+
+
+def iter_zip(files, chunk_size=ZIP_CHUNK_SIZE):
+    """
+    Génère une archive ZIP bloc par bloc
+    files : itérable de (chemin du fichier, nom dans l'archive)
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', allowZip64=True) as zip_file:
+        for file_path, arcname in files:
+            zip_info = zipfile.ZipInfo.from_file(file_path, arcname)
+            zip_info.compress_type = get_compress_type(arcname)
+
+            with open(file_path, 'rb') as src, zip_file.open(zip_info, 'w') as dest:
+                while True:
+                    chunk = src.read(chunk_size)
+                    if not chunk:
+                        break
+                    dest.write(chunk)
+                    data = buffer.pop()
+                    if data:
+                        yield data
+
+            data = buffer.pop()
+            if data:
+                yield data
+
+    # Répertoire central de l'archive
+    yield buffer.pop()
@@ -318,6 +318,9 @@ if [[ "$ENVIRONMENT" == "prod" ]]; then
     echo "   sudo systemctl enable rockyconverter"
     echo "   sudo systemctl start rockyconverter"
     echo "   sudo systemctl status rockyconverter"
+    echo "   # Worker de conversion (modifier les chemins dans le fichier) :"
+    echo "   sudo cp rockyconverter-worker.service /etc/systemd/system/"
+    echo "   sudo systemctl enable --now rockyconverter-worker"
     echo ""
     echo "4️⃣ Installer et configurer Nginx :"
     echo "   sudo apt install nginx"
@@ -124,10 +124,19 @@ stop_services() {
         sudo systemctl disable rockyconverter
         echo -e "${GREEN}✅ Service rockyconverter arrêté${NC}"
     fi
+
+    # Arrêter le worker de conversion si il existe
+    if systemctl is-active --quiet rockyconverter-worker 2>/dev/null; then
+        echo "Arrêt du service rockyconverter-worker..."
+        sudo systemctl stop rockyconverter-worker
+        sudo systemctl disable rockyconverter-worker
+        echo -e "${GREEN}✅ Service rockyconverter-worker arrêté${NC}"
+    fi
     
     # Arrêter les processus Django en cours
     pkill -f "manage.py runserver" 2>/dev/null || true
     pkill -f "gunicorn.*rockyconverter" 2>/dev/null || true
+    pkill -f "manage.py conversion_worker" 2>/dev/null || true
     echo -e "${GREEN}✅ Processus Django arrêtés${NC}"
 }
 
@@ -160,6 +169,12 @@ remove_system_files() {
         echo -e "${GREEN}✅ Fichier de service supprimé${NC}"
     fi
     
+    if [ -f "/etc/systemd/system/rockyconverter-worker.service" ]; then
+        sudo rm -f "/etc/systemd/system/rockyconverter-worker.service"
+        sudo systemctl daemon-reload
+        echo -e "${GREEN}✅ Service du worker de conversion supprimé${NC}"
+    fi
+    
     # Supprimer les logs système
     sudo rm -f /var/log/rocky_converter*.log 2>/dev/null || true
     echo -e "${GREEN}✅ Logs système supprimés${NC}"